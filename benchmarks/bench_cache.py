@@ -0,0 +1,90 @@
+"""Benchmark: TieredCache disk load — legacy JSON and SQLite store.
+
+Writes synthetic master (~4,000 names), fee and Rakuten datasets in each
+format and times a cold load of each, the way a fresh process would, plus
+a single-code lookup from the SQLite store (what ``ETF.fee`` does).
+
+    python benchmarks/bench_cache.py --repeat 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from pyjpx_etf._internal._cache import TieredCache
+from pyjpx_etf._internal.cache_store import SQLiteStore
+from pyjpx_etf._internal.rakuten import PERIOD_COLUMNS
+
+
+def _datasets() -> dict[str, dict]:
+    rng = random.Random(42)
+    codes = [str(1300 + i) for i in range(4000)]
+    etfs = codes[:400]
+    return {
+        "master": {c: f"銘柄{c}株式会社ホールディングス" for c in codes},
+        "fees": {c: round(rng.uniform(0.05, 1.0), 4) for c in etfs},
+        "rakuten": {
+            c: {
+                "name_ja": f"ETF {c} 上場投資信託",
+                "name_en": f"ETF {c} Exchange Traded Fund",
+                "fee": round(rng.uniform(0.05, 1.0), 4),
+                "dividend_yield": round(rng.uniform(0, 5), 2),
+                **{p: round(rng.uniform(-50, 80), 2) for p in PERIOD_COLUMNS},
+            }
+            for c in etfs
+        },
+    }
+
+
+def _median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'dataset':<10}{'json KB':>10}"
+        f"{'json ms':>10}{'sqlite ms':>11}{'lookup ms':>11}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, data in _datasets().items():
+            json_path = Path(tmp) / f"{name}.json"
+            json_path.write_text(
+                json.dumps({"timestamp": time.time(), name: data}, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            store = TieredCache(
+                Path(tmp) / "cache.db", 3600, name, dict, store=SQLiteStore(name)
+            )
+            store._save_disk(data)
+            code = next(iter(data))
+
+            t_json = _median_ms(
+                lambda p=json_path: json.loads(p.read_text(encoding="utf-8")),
+                args.repeat,
+            )
+            t_sqlite = _median_ms(store._read_disk, args.repeat)
+            t_lookup = _median_ms(lambda c=code: store.lookup(c), args.repeat)
+            kb_json = json_path.stat().st_size / 1024
+            print(
+                f"{name:<10}{kb_json:>10.1f}"
+                f"{t_json:>10.3f}{t_sqlite:>11.3f}{t_lookup:>11.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Benchmark: JPX fee page parsing — pd.read_html vs targeted lxml scan.
+
+Builds a synthetic page shaped like the JPX ETF listing (one fee table per
+category plus unrelated navigation/notice tables) and reports parse time
+and peak traced memory for both parsers. Pass ``--html`` to use a saved
+copy of the real page instead.
+
+    python benchmarks/bench_fees.py --etfs 400 --repeat 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import random
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+from pyjpx_etf._internal.fees import _FEE_RE, _parse_fee_html
+
+_CATEGORIES = ["国内株式", "外国株式", "債券", "REIT", "コモディティ", "レバレッジ"]
+
+
+def _page(etfs: int) -> str:
+    rng = random.Random(42)
+    parts = ["<html><body>"]
+    for i in range(20):  # navigation and notice tables without fees
+        parts.append("<table><tr><th>お知らせ</th><th>日付</th></tr>")
+        parts.extend(
+            f"<tr><td><a href='/n/{i}-{j}'>お知らせ {j}</a></td><td>2026/02/27</td>"
+            "</tr>"
+            for j in range(10)
+        )
+        parts.append("</table>")
+    per_table = etfs // len(_CATEGORIES)
+    code = 1300
+    for category in _CATEGORIES:
+        parts.append(
+            f"<h3>{category}</h3><table><thead><tr><th>コード</th><th>銘柄名</th>"
+            "<th>連動対象指標</th><th>管理会社</th><th>売買単位</th>"
+            "<th>信託 報酬</th><th>上場日</th></tr></thead><tbody>"
+        )
+        for _ in range(per_table):
+            code += 1
+            fee = round(rng.uniform(0.05, 1.0), 4)
+            note = "（注10）" if rng.random() < 0.2 else ""
+            parts.append(
+                f"<tr><td><a href='/etf/{code}'>{code}</a></td>"
+                f"<td>{category} ETF {code} 上場投資信託</td>"
+                "<td>ＴＯＰＩＸ（東証株価指数）</td><td>○○アセットマネジメント</td>"
+                f"<td>1口</td><td>{fee}％{note}</td><td>2020/01/01</td></tr>"
+            )
+        parts.append("</tbody></table>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def _parse_with_pandas(html: str) -> dict[str, float]:
+    """The previous parser: read_html every table, then iterrows()."""
+    fees: dict[str, float] = {}
+    for df in pd.read_html(io.StringIO(html)):
+        code_col = fee_col = None
+        for col in df.columns:
+            col_norm = "".join(str(col).split())
+            if code_col is None and col_norm == "コード":
+                code_col = col
+            if "信託報酬" in col_norm:
+                fee_col = col
+        if code_col is None or fee_col is None:
+            continue
+        for _, row in df.iterrows():
+            code = str(row[code_col]).strip()
+            if code.endswith(".0"):
+                code = code[:-2]
+            if not code or code == "nan" or not code.isalnum():
+                continue
+            match = _FEE_RE.search(str(row[fee_col]))
+            if match is not None:
+                fees[code] = float(match.group(1))
+    return fees
+
+
+def _measure(fn, html: str, repeat: int) -> tuple[float, float]:
+    """Return median ms and peak traced MB of ``fn(html)``."""
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(html)
+        timings.append((time.perf_counter() - t0) * 1000)
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / 1024 / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--etfs", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--html", type=Path, help="saved copy of the JPX page")
+    args = parser.parse_args()
+
+    html = args.html.read_text(encoding="utf-8") if args.html else _page(args.etfs)
+    old, new = _parse_with_pandas(html), _parse_fee_html(html)
+    if old != new:
+        print(f"warning: parsers disagree on {len(old.items() ^ new.items())} items")
+
+    print(f"page: {len(html) / 1024:.0f} KB, {len(new)} fees")
+    print(f"{'parser':<20}{'ms':>10}{'peak MB':>10}")
+    for label, fn in (("pd.read_html", _parse_with_pandas), ("lxml", _parse_fee_html)):
+        ms, mb = _measure(fn, html, args.repeat)
+        print(f"{label:<20}{ms:>10.1f}{mb:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
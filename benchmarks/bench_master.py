@@ -0,0 +1,100 @@
+"""Benchmark: JPX master XLS parsing — pandas + iterrows vs xlrd columns.
+
+Writes a synthetic workbook shaped like ``data_j.xls`` (date, code, name and
+seven classification columns, ~4,000 rows) and times both parsers on it.
+Needs ``xlwt`` to write the workbook (``pip install xlwt``).
+
+    python benchmarks/bench_master.py --rows 4000 --repeat 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import statistics
+import time
+
+import pandas as pd
+import xlwt
+
+from pyjpx_etf._internal.master import _parse_master_xls
+
+_HEADER = [
+    "日付",
+    "コード",
+    "銘柄名",
+    "市場・商品区分",
+    "33業種コード",
+    "33業種区分",
+    "17業種コード",
+    "17業種区分",
+    "規模コード",
+    "規模区分",
+]
+
+
+def _workbook(rows: int) -> bytes:
+    book = xlwt.Workbook(encoding="utf-8")
+    sheet = book.add_sheet("Sheet1")
+    for col, title in enumerate(_HEADER):
+        sheet.write(0, col, title)
+    for i in range(1, rows + 1):
+        code = 1300 + i
+        values = [
+            20260227,
+            code if i % 10 else f"{code % 1000}A",  # numeric and alphanumeric
+            f"銘柄{code}株式会社ホールディングス",
+            "プライム（内国株式）",
+            "3050",
+            "食料品",
+            "2",
+            "食品",
+            "7",
+            "TOPIX Small 2",
+        ]
+        for col, value in enumerate(values):
+            sheet.write(i, col, value)
+    buf = io.BytesIO()
+    book.save(buf)
+    return buf.getvalue()
+
+
+def _parse_with_pandas(content: bytes) -> dict[str, str]:
+    """The previous parser: read every column as str, then iterrows()."""
+    df = pd.read_excel(io.BytesIO(content), header=None, dtype=str)
+    lookup: dict[str, str] = {}
+    for _, row in df.iterrows():
+        code = str(row.iloc[1]).strip()
+        name = str(row.iloc[2]).strip()
+        if code and name and code != "nan" and name != "nan":
+            lookup[code] = name
+    return lookup
+
+
+def _median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    content = _workbook(args.rows)
+    assert _parse_with_pandas(content) == _parse_master_xls(content)
+
+    t_pandas = _median_ms(lambda: _parse_with_pandas(content), args.repeat)
+    t_xlrd = _median_ms(lambda: _parse_master_xls(content), args.repeat)
+    print(f"workbook: {args.rows} rows, {len(content) / 1024:.0f} KB")
+    print(f"pandas + iterrows: {t_pandas:8.1f} ms")
+    print(f"xlrd col_values:   {t_xlrd:8.1f} ms  ({t_pandas / t_xlrd:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Benchmark: pcf.db schema v1 vs v2 — file size, sync transfer and query latency.
+
+Builds a synthetic schema v1 database, migrates a copy to v2 with
+``init_schema`` and compares the two. Query latency is measured on the SQL
+each public read function issues, so the numbers exclude DataFrame building.
+
+    python benchmarks/bench_schema.py --etfs 100 --holdings 500 --days 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from pyjpx_etf._internal import db
+from pyjpx_etf.config import config
+
+_V1_SCHEMA_SQL = """\
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE etfs (code TEXT PRIMARY KEY, name_ja TEXT, name_en TEXT, fee REAL);
+CREATE TABLE pcf_info (
+    code TEXT NOT NULL, date TEXT NOT NULL, name TEXT,
+    cash_component REAL, shares_outstanding INTEGER,
+    PRIMARY KEY (code, date)
+);
+CREATE TABLE pcf_holdings (
+    code TEXT NOT NULL, date TEXT NOT NULL, holding_code TEXT NOT NULL,
+    name TEXT, isin TEXT, exchange TEXT, currency TEXT,
+    shares REAL, price REAL, weight REAL,
+    PRIMARY KEY (code, date, holding_code)
+);
+CREATE INDEX idx_holdings_stock ON pcf_holdings(holding_code);
+CREATE TABLE securities (code TEXT PRIMARY KEY, name_ja TEXT, name_en TEXT);
+INSERT INTO meta VALUES ('version', '1');
+"""
+
+_ID = "(SELECT id FROM securities WHERE code = ?)"
+
+# (label, v1 SQL, v2 SQL) — parameters are filled in by _params().
+_QUERIES = [
+    (
+        "read_etf_info",
+        "SELECT * FROM pcf_info WHERE code = ? ORDER BY date DESC LIMIT 1",
+        f"SELECT * FROM pcf_info WHERE etf_id = {_ID} ORDER BY date DESC LIMIT 1",
+    ),
+    (
+        "read_holdings",
+        "SELECT * FROM pcf_holdings WHERE code = ? AND date = "
+        "(SELECT MAX(date) FROM pcf_holdings WHERE code = ?) ORDER BY weight DESC",
+        "SELECT s.code, i.name, i.isin, i.exchange, i.currency, "
+        "h.shares, h.price, h.weight FROM pcf_holdings h "
+        "JOIN securities s ON s.id = h.security_id "
+        "JOIN instruments i ON i.id = h.instrument_id "
+        f"WHERE h.etf_id = {_ID} AND h.date = "
+        f"(SELECT MAX(date) FROM pcf_holdings WHERE etf_id = {_ID}) "
+        "ORDER BY h.weight DESC, s.code",
+    ),
+    (
+        "search_by_holding",
+        "SELECT h.code, e.name_ja, h.weight, h.shares, h.name FROM pcf_holdings h "
+        "LEFT JOIN etfs e ON h.code = e.code WHERE h.holding_code = ? "
+        "AND h.date = (SELECT MAX(h2.date) FROM pcf_holdings h2 "
+        "WHERE h2.code = h.code AND h2.holding_code = h.holding_code) "
+        "ORDER BY h.weight DESC LIMIT 10",
+        "SELECT e.code, t.name_ja, h.weight, h.shares, i.name FROM pcf_holdings h "
+        "JOIN securities e ON e.id = h.etf_id "
+        "JOIN instruments i ON i.id = h.instrument_id "
+        f"LEFT JOIN etfs t ON t.code = e.code WHERE h.security_id = {_ID} "
+        "AND h.date = (SELECT MAX(h2.date) FROM pcf_holdings h2 "
+        "WHERE h2.etf_id = h.etf_id AND h2.security_id = h.security_id) "
+        "ORDER BY h.weight DESC, e.code LIMIT 10",
+    ),
+    (
+        "read_history",
+        "SELECT date, weight, shares, price FROM pcf_holdings "
+        "WHERE code = ? AND holding_code = ? ORDER BY date",
+        "SELECT date, weight, shares, price FROM pcf_holdings "
+        f"WHERE etf_id = {_ID} AND security_id = {_ID} ORDER BY date",
+    ),
+]
+
+
+def _params(label: str, etf: str, stock: str) -> tuple[str, ...]:
+    return {
+        "read_etf_info": (etf,),
+        "read_holdings": (etf, etf),
+        "search_by_holding": (stock,),
+        "read_history": (etf, stock),
+    }[label]
+
+
+def build_v1(path: Path, n_etfs: int, n_holdings: int, n_days: int) -> None:
+    """Write a synthetic schema v1 DB shaped like the daily pipeline output."""
+    rng = random.Random(42)
+    universe = [str(1300 + i) for i in range(4000)]
+    names = {
+        c: f"{rng.choice(['NIPPON', 'TOKYO', 'OSAKA', 'SANWA'])} "
+        f"{rng.choice(['ELECTRIC', 'MOTOR', 'STEEL', 'HOLDINGS'])} CO LTD {c}"
+        for c in universe
+    }
+    etfs = [str(1306 + i) for i in range(n_etfs)]
+    start = date(2026, 1, 5)
+    days = [(start + timedelta(days=d)).isoformat() for d in range(n_days)]
+
+    conn = sqlite3.connect(path)
+    conn.executescript(_V1_SCHEMA_SQL)
+    for code in etfs:
+        conn.execute("INSERT INTO etfs VALUES (?, ?, ?, ?)", (code, "ETF", "ETF", 0.1))
+        members = rng.sample(universe, min(n_holdings, len(universe)))
+        for day in days:
+            conn.execute(
+                "INSERT INTO pcf_info VALUES (?, ?, ?, ?, ?)",
+                (code, day, f"ETF {code}", 1e9, 10_000_000),
+            )
+            weights = [rng.random() for _ in members]
+            total = sum(weights)
+            conn.executemany(
+                "INSERT INTO pcf_holdings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        code,
+                        day,
+                        m,
+                        names[m],
+                        f"JP3{int(m):09d}",
+                        "TSE",
+                        "JPY",
+                        float(rng.randrange(100, 1_000_000, 100)),
+                        round(rng.uniform(100, 20000), 1),
+                        w / total,
+                    )
+                    for m, w in zip(members, weights)
+                ],
+            )
+    conn.executemany(
+        "INSERT INTO securities VALUES (?, ?, NULL)",
+        [(c, f"銘柄{c}") for c in universe],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _latency(path: Path, sql: str, params: tuple[str, ...], repeat: int) -> float:
+    """Median latency in milliseconds, opening a connection per call like db_read."""
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        conn.execute(sql, params).fetchall()
+        conn.close()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--etfs", type=int, default=100)
+    parser.add_argument("--holdings", type=int, default=500)
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument(
+        "--mbps", type=float, default=50.0, help="Bandwidth for sync estimates"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        v1 = Path(tmp) / "v1.db"
+        v2 = Path(tmp) / "v2.db"
+        build_v1(v1, args.etfs, args.holdings, args.days)
+        shutil.copyfile(v1, v2)
+
+        config.db_path = v2
+        t0 = time.perf_counter()
+        conn = db.get_connection(readonly=False)
+        db.init_schema(conn)
+        conn.close()
+        migrate_s = time.perf_counter() - t0
+
+        rows = args.etfs * args.holdings * args.days
+        print(
+            f"{rows:,} holding rows ({args.etfs} ETFs x {args.holdings} holdings"
+            f" x {args.days} days), v1 -> v2 migration {migrate_s:.2f}s\n"
+        )
+
+        print(f"{'':<22}{'v1':>12}{'v2':>12}{'ratio':>8}")
+        s1, s2 = v1.stat().st_size / 1e6, v2.stat().st_size / 1e6
+        print(f"{'file size (MB)':<22}{s1:>12.1f}{s2:>12.1f}{s1 / s2:>8.2f}")
+        d1, d2 = s1 * 8 / args.mbps, s2 * 8 / args.mbps
+        label = f"sync @{args.mbps:g}Mbps (s)"
+        print(f"{label:<22}{d1:>12.2f}{d2:>12.2f}{d1 / d2:>8.2f}")
+
+        etf, stock = "1306", "1400"
+        for name, sql1, sql2 in _QUERIES:
+            params = _params(name, etf, stock)
+            t1 = _latency(v1, sql1, params, args.repeat)
+            t2 = _latency(v2, sql2, params, args.repeat)
+            print(f"{name + ' (ms)':<22}{t1:>12.3f}{t2:>12.3f}{t1 / t2:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark: ``etf <code> -a`` holdings table — iterrows vs format_table.
+
+Renders a synthetic holdings list the size of the TOPIX ETF (~2,000 rows,
+mostly Japanese names) with the previous per-row printing and with the
+column-based renderer, output captured in memory.
+
+    python benchmarks/bench_table.py --rows 2000 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import statistics
+import time
+import unicodedata
+from types import SimpleNamespace
+
+import pandas as pd
+
+from pyjpx_etf._internal.cli_fmt import display_width
+from pyjpx_etf._internal.cli_show import _print_holdings
+from pyjpx_etf.models import Holding
+
+
+def _holdings(rows: int) -> list[Holding]:
+    holdings = []
+    for i in range(rows):
+        code = str(1300 + i)
+        name = f"銘柄{code}ホールディングス" if i % 5 else f"COMPANY {code} CORP"
+        weight = 1 / (i + 2) / 8
+        holdings.append(
+            Holding(code, name, f"JP{code}", "TSE", "JPY", 1e5 + i, 2500.0, weight)
+        )
+    return holdings
+
+
+def _width(s: str) -> int:
+    """The previous display_width: one unicodedata lookup per character."""
+    return sum(2 if unicodedata.east_asian_width(c) in ("F", "W") else 1 for c in s)
+
+
+def _print_with_iterrows(holdings: list[Holding]) -> None:
+    """The previous renderer: DataFrame, iterrows() and a print() per row."""
+    df = pd.DataFrame([h.to_dict() for h in holdings])
+    df = (
+        df[["code", "name", "weight"]]
+        .assign(weight=lambda d: d["weight"] * 100)
+        .reset_index(drop=True)
+    )
+    name_width = max(_width(n) for n in df["name"])
+    print(f" {'Code':<5}  {'Name' + ' ' * (name_width - 4)}  {'Weight':>6}")
+    print(f"{'─' * 5}  {'─' * name_width}  {'─' * 6}")
+    for _, row in df.iterrows():
+        name = row["name"] + " " * (name_width - _width(row["name"]))
+        print(f" {row['code']:<5}  {name}  {row['weight']:>5.1f}%")
+    print()
+
+
+def _render(fn, arg) -> str:
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        fn(arg)
+    return buf.getvalue()
+
+
+def _median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    holdings = _holdings(args.rows)
+    etf = SimpleNamespace(holdings=holdings)
+
+    def new() -> str:
+        return _render(lambda e: _print_holdings(e, show_all=True), etf)
+
+    assert _render(_print_with_iterrows, holdings) == new()
+
+    t_old = _median_ms(lambda: _render(_print_with_iterrows, holdings), args.repeat)
+    display_width.cache_clear()
+    t_cold = _median_ms(new, 1)
+    t_new = _median_ms(new, args.repeat)
+    print(f"holdings: {args.rows} rows")
+    print(f"iterrows + print per row: {t_old:8.2f} ms")
+    print(f"format_table, cold cache: {t_cold:8.2f} ms  ({t_old / t_cold:.1f}x)")
+    print(f"format_table, warm cache: {t_new:8.2f} ms  ({t_old / t_new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
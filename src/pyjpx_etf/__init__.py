@@ -2,33 +2,87 @@
 
 __version__ = "0.5.0"
 
+import sys
+from importlib import import_module
+from types import ModuleType
+from typing import TYPE_CHECKING
+
 from .config import config
-from .etf import ETF
+from .events import Event
 from .exceptions import (
     DatabaseError,
     ETFNotFoundError,
     FetchError,
     ParseError,
     PyJPXETFError,
+    StaleDataWarning,
 )
-from .history import history
 from .models import ETFInfo, Holding
-from .ranking import ranking
-from .search import search
-from .sync import sync
+
+if TYPE_CHECKING:
+    from .as_of import as_of
+    from .etf import ETF
+    from .history import history
+    from .ranking import ranking, ranking_table
+    from .search import search
+    from .sync import sync
+
+# Names imported on first access (PEP 562), so that ``import pyjpx_etf`` and
+# the CLI do not pay for pandas and requests up front.
+_LAZY = {
+    "ETF": "etf",
+    "as_of": "as_of",
+    "history": "history",
+    "ranking": "ranking",
+    "ranking_table": "ranking",
+    "search": "search",
+    "sync": "sync",
+}
+
+
+def __getattr__(name: str) -> object:
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_LAZY[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_LAZY})
+
+
+class _Package(ModuleType):
+    """Keeps ``pyjpx_etf.search`` etc. the function, not the submodule.
+
+    Importing a submodule binds it on the package under its own name, which
+    would shadow the lazily imported function of the same name.
+    """
+
+    def __setattr__(self, name: str, value: object) -> None:
+        if isinstance(value, ModuleType) and _LAZY.get(name) == name:
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
 
 __all__ = [
     "ETF",
     "config",
     "ranking",
+    "ranking_table",
     "search",
     "history",
+    "as_of",
     "sync",
     "ETFInfo",
     "Holding",
+    "Event",
     "ETFNotFoundError",
     "FetchError",
     "ParseError",
     "DatabaseError",
     "PyJPXETFError",
+    "StaleDataWarning",
 ]
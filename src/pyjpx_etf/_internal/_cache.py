@@ -1,27 +1,92 @@
-"""Generic 2-tier cache: memory → disk (JSON with TTL) → fetch."""
+"""Generic 2-tier cache: memory → disk (SQLite store with TTL) → fetch."""
 
 from __future__ import annotations
 
+import datetime
 import json
+import os
+import sys
+import threading
 import time
+import warnings
 from collections.abc import Callable
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+from ..config import config
+from ..exceptions import StaleDataWarning
+from ._lock import FileLock
+from ._trace import count, span
+
+if TYPE_CHECKING:
+    from .cache_store import SQLiteStore
+
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(__file__)) + os.sep
+
+
+def _user_stacklevel() -> int:
+    """``stacklevel`` for a warning issued by the caller of this function
+    that points at the first frame outside the package.
+
+    The call depth differs between entry points (``get_fees()``,
+    ``get_fee()``, ...), so a fixed level would point inside the library.
+    """
+    level, frame = 1, sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename.startswith(_PACKAGE_DIR):
+        level, frame = level + 1, frame.f_back
+    return level
+
+
+@dataclass(frozen=True)
+class CacheStatus:
+    """Snapshot of a :class:`TieredCache`, for diagnostics."""
+
+    fetched_at: float | None  # when the data being served was fetched
+    stale: bool  # served data is past its TTL because fetching failed
+    failures: int  # consecutive fetch failures
+    retry_at: float | None  # no fetch is attempted before this time
+    last_error: str | None
 
 
 class TieredCache:
     """Memory + disk cache with TTL, backed by a fetch function.
 
+    A failed fetch is not retried until a backoff delay has passed
+    (*backoff* seconds, doubling per consecutive failure up to
+    *max_backoff*). Meanwhile the last copy on disk is served even past its
+    TTL, with a :class:`~pyjpx_etf.exceptions.StaleDataWarning` on the first
+    failure; see :meth:`status`.
+
+    With a *soft_ttl* and ``config.background_refresh`` enabled, data older
+    than *soft_ttl* but younger than *ttl* is returned immediately while a
+    single background thread refreshes it (stale-while-revalidate). Past
+    *ttl* the fetch blocks as usual. Every fetch outcome is reported to
+    ``config.on_cache_refresh``.
+
+    Safe to share between threads: concurrent misses are coalesced into a
+    single fetch whose result the other callers reuse.
+
     Parameters
     ----------
     disk_path : Path
-        JSON file for disk persistence.
+        SQLite database holding the dataset, shared with other caches.
     ttl : int
         Time-to-live in seconds for the disk cache.
+    soft_ttl : int, optional
+        Age in seconds after which data is refreshed in the background.
     key : str
-        JSON key under which data is stored (e.g. "names", "fees").
+        Name of the dataset (e.g. "names", "fees"), also the key under which
+        legacy JSON files stored it.
     fetcher : callable
         Zero-arg function that returns fresh data.
+    backoff : float
+        Delay in seconds after the first failed fetch.
+    max_backoff : float
+        Upper bound for the delay between failed fetches.
+    store : SQLiteStore
+        Keeps the ``{code: value}`` dataset as rows of *disk_path*, which
+        enables indexed :meth:`lookup`.
     """
 
     def __init__(
@@ -30,57 +95,246 @@ class TieredCache:
         ttl: int,
         key: str,
         fetcher: Callable[[], Any],
+        *,
+        store: SQLiteStore,
+        soft_ttl: int | None = None,
+        backoff: float = 30.0,
+        max_backoff: float = 3600.0,
     ) -> None:
         self._disk_path = disk_path
         self._ttl = ttl
+        self._soft_ttl = soft_ttl
+        self._flight = threading.Lock()
+        self._refresh_guard = threading.Lock()
+        self._refresh_thread: threading.Thread | None = None
         self._key = key
         self._fetcher = fetcher
-        self._memory: Any | None = None
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._store = store
+        self.reset()
 
     def get(self, *, refresh: bool = False) -> Any:
         """Return cached data. Lookup: memory → disk → fetch.
 
         Pass ``refresh=True`` to skip caches and fetch fresh data.
-        Returns an empty dict if fetch fails (graceful degradation).
+        While fetches are failing, returns the last cached copy regardless
+        of its age, or an empty dict if there is none (graceful degradation).
         """
-        if not refresh and self._memory is not None:
-            return self._memory
+        if config.on_event is None:
+            return self._get(refresh)[0]
+        with span("cache_get", self._key) as s:
+            data, s.cache = self._get(refresh)
+            s.rows = count(data)
+            return data
+
+    def _get(self, refresh: bool) -> tuple[Any, str]:
+        """:meth:`get`, plus whether it was a cache ``hit``, ``miss`` or
+        ``stale`` (see :class:`~pyjpx_etf.events.Event`)."""
+        if not refresh and self._memory is not None and not self._stale:
+            if not self._revalidating():
+                return self._memory, "hit"
+            if self._is_fresh(self._fetched_at):
+                self._refresh_if_due(self._fetched_at)
+                return self._memory, "hit"
 
         if not refresh:
-            disk = self._load_disk()
-            if disk is not None:
-                self._memory = disk
+            entry = self._read_disk()
+            if entry is not None and self._is_fresh(entry[0]):
+                self._refresh_if_due(entry[0])
+                return self._serve(entry), "hit"
+
+        if time.time() < self._retry_at:
+            return self._fallback(), "stale"  # backing off after failures
+        data = self._fetch_once(None if refresh else self._ttl)
+        return data, "stale" if self._stale else "miss"
+
+    def lookup(self, code: str) -> Any | None:
+        """Return the value for *code* of a ``{code: value}`` dataset.
+
+        With nothing in memory yet, a fresh disk copy is queried for that row
+        alone. Otherwise like ``get().get(code)``.
+        """
+        if self._memory is None:
+            with span("cache_lookup", self._key) as s:
+                found = self._store.lookup(self._disk_path, code)
+                fresh = found is not None and self._is_fresh(found[0])
+                s.cache = "hit" if fresh else "miss"
+                s.rows = int(fresh)
+            if found is not None and fresh:
+                self._refresh_if_due(found[0])
+                return found[1]
+        return self.get().get(code)
+
+    def status(self) -> CacheStatus:
+        """Return whether stale data is being served and why."""
+        return CacheStatus(
+            fetched_at=self._fetched_at,
+            stale=self._stale,
+            failures=self._failures,
+            retry_at=self._retry_at or None,
+            last_error=self._last_error,
+        )
+
+    def reset(self) -> None:
+        """Clear in-memory cache and failure state. Intended for testing."""
+        self._memory: Any | None = None
+        self._fetched_at: float | None = None
+        self._stale = False
+        self._failures = 0
+        self._retry_at = 0.0
+        self._last_error: str | None = None
+
+    def _is_fresh(self, timestamp: float, ttl: float | None = None) -> bool:
+        return time.time() - timestamp < (self._ttl if ttl is None else ttl)
+
+    def _revalidating(self) -> bool:
+        return self._soft_ttl is not None and config.background_refresh
+
+    def _refresh_if_due(self, timestamp: float) -> None:
+        """Start a background refresh if *timestamp* is past the soft TTL."""
+        if (
+            not self._revalidating()
+            or self._is_fresh(timestamp, self._soft_ttl)
+            or time.time() < self._retry_at
+        ):
+            return
+        with self._refresh_guard:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._fetch_once,
+                args=(self._soft_ttl,),
+                kwargs={"background": True},
+                name=f"pyjpx-etf-refresh-{self._key}",
+                daemon=True,
+            )
+            self._refresh_thread.start()
+
+    def _fetch_once(self, max_age: float | None, *, background: bool = False) -> Any:
+        """Fetch unless another thread did while this one waited (single-flight).
+
+        All fetches and failure bookkeeping happen under ``_flight``.
+        """
+        seen = self._fetched_at
+        with self._flight:
+            fresh = self._memory is not None and not self._stale
+            if fresh and self._fetched_at != seen:
                 return self._memory
+            if time.time() < self._retry_at:
+                return self._fallback()
+            return self._locked_fetch(max_age, background=background)
 
+    def _locked_fetch(self, max_age: float | None, *, background: bool = False) -> Any:
+        """Fetch under the file lock, unless another holder just did.
+
+        Only one process fetches at a time; the others wait for the lock and
+        then use what it wrote if that is younger than *max_age*. Without the
+        lock, fetch anyway.
+        """
+        lock = FileLock(self._lock_path(), config.lock_timeout)
         try:
-            data = self._fetcher()
-            self._memory = data
-            self._save_disk(data)
-            return self._memory
-        except Exception:
-            if self._memory is None:
-                self._memory = {}
+            lock.acquire()
+        except (OSError, TimeoutError):
+            return self._fetch(background=background)
+        try:
+            if lock.waited and max_age is not None:
+                entry = self._read_disk()
+                if entry is not None and self._is_fresh(entry[0], max_age):
+                    return self._serve(entry)
+            return self._fetch(background=background)
+        finally:
+            lock.release()
+
+    def _serve(self, entry: tuple[float, Any], *, stale: bool = False) -> Any:
+        self._fetched_at, self._memory = entry
+        self._stale = stale
+        return self._memory
+
+    def _fetch(self, *, background: bool = False) -> Any:
+        try:
+            with span("cache_fetch", self._key) as s:
+                data = self._fetcher()
+                s.rows = count(data)
+                # Stored before the span reports, so the event hook sees
+                # (and cannot lose) the new data.
+                data = self._store_fetched(data)
+        except Exception as e:
+            return self._fail(e, warn=not background)
+        self._notify(None)
+        return data
+
+    def _store_fetched(self, data: Any) -> Any:
+        self._failures = 0
+        self._retry_at = 0.0
+        self._last_error = None
+        self._save_disk(data)
+        return self._serve((time.time(), data))
+
+    def _notify(self, error: Exception | None) -> None:
+        if config.on_cache_refresh is not None:
+            config.on_cache_refresh(self._key, error)
+
+    def _fail(self, error: Exception, *, warn: bool = True) -> Any:
+        """Schedule the next retry and serve the last-known-good data.
+
+        Background refreshes don't warn; their errors reach the hook only.
+        """
+        self._failures += 1
+        delay = min(self._backoff * 2 ** (self._failures - 1), self._max_backoff)
+        self._retry_at = time.time() + delay
+        self._last_error = f"{type(error).__name__}: {error}"
+        data = self._fallback()
+        self._notify(error)
+        if warn and self._failures == 1:
+            if self._fetched_at is not None:
+                fetched = datetime.datetime.fromtimestamp(self._fetched_at)
+                served = f"serving cached data from {fetched:%Y-%m-%d %H:%M}"
+            else:
+                served = "no cached data available"
+            warnings.warn(
+                f"Could not fetch {self._key} ({self._last_error}); {served}. "
+                f"Retrying in {delay:.0f}s.",
+                StaleDataWarning,
+                stacklevel=_user_stacklevel(),
+            )
+        return data
+
+    def _fallback(self) -> Any:
+        """Return the newest data at hand, ignoring the TTL, or ``{}``."""
+        if self._memory is not None:
             return self._memory
+        entry = self._read_disk()
+        if entry is not None:
+            return self._serve(entry, stale=not self._is_fresh(entry[0]))
+        return {}
 
-    def reset(self) -> None:
-        """Clear in-memory cache. Intended for testing."""
-        self._memory = None
+    def _lock_path(self) -> Path:
+        # Datasets sharing a store refresh independently.
+        return self._disk_path.with_name(f"{self._disk_path.name}.{self._key}.lock")
+
+    def _read_disk(self) -> tuple[float, Any] | None:
+        """Return ``(timestamp, data)`` from disk regardless of age."""
+        entry = self._store.read(self._disk_path)
+        return entry if entry is not None else self._migrate_json()
 
-    def _load_disk(self) -> Any | None:
+    def _migrate_json(self) -> tuple[float, Any] | None:
+        """Read the JSON cache file of older versions into the store."""
+        if self._store.legacy is None:
+            return None
+        legacy = self._disk_path.with_name(self._store.legacy)
         try:
-            raw = json.loads(self._disk_path.read_text(encoding="utf-8"))
-            if time.time() - raw["timestamp"] < self._ttl:
-                return raw[self._key]
+            raw = json.loads(legacy.read_text(encoding="utf-8"))
+            timestamp, data = float(raw["timestamp"]), raw[self._key]
         except Exception:
-            pass
-        return None
+            return None
+        self._save_disk(data, timestamp=timestamp)
+        legacy.unlink(missing_ok=True)
+        return timestamp, data
 
-    def _save_disk(self, data: Any) -> None:
+    def _save_disk(self, data: Any, *, timestamp: float | None = None) -> None:
+        """Replace the dataset in one transaction; readers see old or new rows."""
         try:
-            self._disk_path.parent.mkdir(parents=True, exist_ok=True)
-            payload = {"timestamp": time.time(), self._key: data}
-            self._disk_path.write_text(
-                json.dumps(payload, ensure_ascii=False), encoding="utf-8"
-            )
+            self._store.write(self._disk_path, data, timestamp or time.time())
         except Exception:
-            pass
+            pass  # the data is still served from memory
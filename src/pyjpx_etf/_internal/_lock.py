@@ -0,0 +1,106 @@
+"""Inter-process file lock and unique temp files for shared cache files."""
+
+from __future__ import annotations
+
+import glob
+import os
+import tempfile
+import time
+from pathlib import Path
+from types import TracebackType
+
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def _unlock(fd: int) -> None:
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def _unlock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class FileLock:
+    """Exclusive advisory lock on *path*, shared by processes and threads.
+
+    Use as a context manager. Acquiring polls until *timeout* seconds have
+    passed and then raises ``TimeoutError``. ``waited`` tells whether another
+    holder had to be waited for, i.e. whether the protected file may have
+    just been updated by someone else.
+    """
+
+    def __init__(self, path: Path, timeout: float, *, poll: float = 0.05) -> None:
+        self._path = path
+        self._timeout = timeout
+        self._poll = poll
+        self._fd: int | None = None
+        self.waited = False
+
+    def acquire(self) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self._timeout
+        self.waited = False
+        while not _try_lock(fd):
+            self.waited = True
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                raise TimeoutError(f"Timed out waiting for lock on {self._path}")
+            time.sleep(self._poll)
+        self._fd = fd
+
+    def release(self) -> None:
+        if self._fd is not None:
+            _unlock(self._fd)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> FileLock:
+        self.acquire()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.release()
+
+
+def lock_path(path: Path) -> Path:
+    """Return the lock file that guards *path*."""
+    return path.with_name(path.name + ".lock")
+
+
+def temp_path(path: Path) -> Path:
+    """Return a new, unique temp file next to *path* for an atomic replace."""
+    fd, name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    os.close(fd)
+    return Path(name)
+
+
+def remove_temp_files(path: Path) -> None:
+    """Delete the :func:`temp_path` files left next to *path*.
+
+    A killed process leaves its temp file behind. Call this while holding
+    the lock on *path*, when no other writer can be using one.
+    """
+    for tmp in path.parent.glob(f".{glob.escape(path.name)}.*.tmp"):
+        tmp.unlink(missing_ok=True)
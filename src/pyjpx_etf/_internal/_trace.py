@@ -0,0 +1,141 @@
+"""Timing spans reported to ``config.on_event``.
+
+With no hook set, :func:`span` hands out a shared do-nothing span and
+:func:`traced` calls straight through, so the cost is one attribute check.
+An exception raised by the hook is warned about once per hook and otherwise
+ignored, so instrumentation never changes what the traced code does.
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+import warnings
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from ..config import config
+from ..events import Event
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+# The last hook warned about, so that a failing hook warns only once.
+_warned_hook: Any = None
+
+
+def _emit(hook: Callable[[Event], None], event: Event) -> None:
+    global _warned_hook  # noqa: PLW0603
+    try:
+        hook(event)
+    except Exception as e:
+        if hook is not _warned_hook:
+            _warned_hook = hook
+            warnings.warn(
+                f"config.on_event raised {type(e).__name__}: {e} on "
+                f"{event.operation!r}; its errors are ignored",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+
+
+class _Span:
+    """Times a ``with`` block; fields set on it go into the :class:`Event`."""
+
+    __slots__ = (
+        "operation",
+        "code",
+        "provider",
+        "bytes",
+        "rows",
+        "cache",
+        "_start",
+        "_t0",
+    )
+
+    def __init__(self, operation: str, code: str | None) -> None:
+        self.operation = operation
+        self.code = code
+        self.provider: str | None = None
+        self.bytes: int | None = None
+        self.rows: int | None = None
+        self.cache: str | None = None
+        self._start = time.time()
+        self._t0 = time.perf_counter()
+
+    def __enter__(self) -> _Span:
+        return self
+
+    def __exit__(self, exc_type: Any, exc: BaseException | None, tb: Any) -> None:
+        duration = time.perf_counter() - self._t0
+        hook = config.on_event
+        if hook is None:
+            return
+        _emit(
+            hook,
+            Event(
+                self.operation,
+                self._start,
+                duration,
+                code=self.code,
+                provider=self.provider,
+                bytes=self.bytes,
+                rows=self.rows,
+                cache=self.cache,
+                error=None if exc is None else f"{type(exc).__name__}: {exc}",
+            ),
+        )
+
+
+class _NoSpan(_Span):
+    __slots__ = ()
+
+    def __init__(self) -> None:
+        pass
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+    def __exit__(self, exc_type: Any, exc: BaseException | None, tb: Any) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(operation: str, code: str | None = None) -> _Span:
+    """Return a span for ``with``, or a no-op one if no hook is set."""
+    if config.on_event is None:
+        return _NO_SPAN
+    return _Span(operation, code)
+
+
+def count(result: Any) -> int:
+    """Rows in a read result: its length, 0 for None, else 1."""
+    if result is None:
+        return 0
+    try:
+        return len(result)
+    except TypeError:
+        return 1
+
+
+def traced(operation: str, *, code: bool = True) -> Callable[[_F], _F]:
+    """Report each call of the decorated read function as an event.
+
+    The first positional argument is the event's code unless *code* is
+    False; the result's :func:`count` is its rows.
+    """
+
+    def decorate(fn: _F) -> _F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if config.on_event is None:
+                return fn(*args, **kwargs)
+            with _Span(operation, args[0] if code and args else None) as s:
+                result = fn(*args, **kwargs)
+                s.rows = count(result)
+                return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
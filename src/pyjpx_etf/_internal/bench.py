@@ -0,0 +1,291 @@
+"""Benchmark suite on a synthetic pcf.db (``etf bench``).
+
+Each case times one operation the library performs on real-sized data:
+parsing a PCF, the DB reads behind ``ETF``, ``search``, ``history`` and
+``ranking``, applying a daily sync patch and the pipeline's daily insert.
+Results are plain JSON, so that a run can be saved and compared with a run
+of another version (:func:`compare`).
+"""
+
+from __future__ import annotations
+
+import datetime
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from ..config import config
+from ..models import Holding
+from . import synth
+
+CASES = (
+    "parse_pcf",
+    "read_holdings",
+    "search_by_holding",
+    "read_history",
+    "read_history_changes",
+    "ranking",
+    "etf_to_dataframe",
+    "sync_apply",
+    "pipeline_insert",
+)
+
+# Cases that write a whole day of data run this many times fewer.
+_HEAVY = 10
+
+
+def _echo(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+def _time(
+    fn: Callable[[int], object],
+    repeat: int,
+    before: Callable[[int], object] | None = None,
+) -> dict[str, float]:
+    """Time ``fn(i)`` for i in range(repeat), each after an untimed
+    ``before(i)``; summarise the timings in ms."""
+    timings = []
+    for i in range(repeat):
+        if before is not None:
+            before(i)
+        t0 = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - t0) * 1000)
+    return {
+        "repeat": repeat,
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "max_ms": round(max(timings), 3),
+    }
+
+
+@contextmanager
+def _use_db(path: Path) -> Iterator[None]:
+    """Point the library at *path*, in Japanese and without syncing.
+
+    Japanese, the default, so the reads resolve names as users see them;
+    they come from the database, not the JPX master list online.
+    """
+    from .. import etf
+
+    saved = config.db_path, config.lang, etf._db_checked
+    config.db_path, config.lang = path, "ja"
+    etf._db_checked = True  # a reused --db may be older than a day
+    try:
+        yield
+    finally:
+        config.db_path, config.lang, etf._db_checked = saved
+
+
+def _latest_day(path: Path) -> str:
+    from .db_core import _from_day
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        (day,) = conn.execute("SELECT MAX(date) FROM pcf_info").fetchone()
+    finally:
+        conn.close()
+    return _from_day(day).isoformat()
+
+
+def _patch_base(src: Path, base: Path) -> None:
+    """Copy *src* to *base* without its latest day: the client before a sync."""
+    shutil.copyfile(src, base)
+    conn = sqlite3.connect(base)
+    try:
+        (day,) = conn.execute("SELECT MAX(date) FROM pcf_info").fetchone()
+        for table in ("pcf_info", "pcf_holdings", "etf_metrics"):
+            conn.execute(f"DELETE FROM {table} WHERE date = ?", (day,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# A case: (timed fn(i), untimed setup before(i) or None, repeat divisor).
+_Case = tuple[Callable[[int], object], Callable[[int], object] | None, int]
+
+
+def _cases(
+    path: Path, work: Path, etfs: list[str], stocks: list[str], holdings: int
+) -> dict[str, _Case]:
+    """Return the cases by name, in :data:`CASES` order.
+
+    Setup that copies the DB runs on first use, untimed.
+    """
+    from ..etf import ETF
+    from ..ranking import ranking
+    from . import db
+    from .db_patch import apply_patches, build_patch
+    from .parser import parse_pcf
+
+    latest = _latest_day(path)
+    csv_text = synth.pcf_csv(etfs[0], holdings)
+
+    def etf(i: int) -> str:
+        return etfs[i % len(etfs)]
+
+    def stock(i: int) -> str:
+        return stocks[i % len(stocks)]
+
+    @cache
+    def patch_ready() -> None:
+        _patch_base(path, work / "base.db")
+        build_patch(path, work / "base.db", work / "patch.db")
+
+    @cache
+    def snapshot() -> list[tuple[str, list[Holding]]]:
+        shutil.copyfile(path, work / "pipeline.db")
+        return [(code, db.read_holdings(code) or []) for code in etfs]
+
+    def fresh_client(i: int) -> None:
+        patch_ready()
+        shutil.copyfile(work / "base.db", work / "client.db")
+
+    def sync_apply(i: int) -> None:
+        conn = sqlite3.connect(work / "client.db")
+        try:
+            apply_patches(conn, [work / "patch.db"])
+        finally:
+            conn.close()
+
+    def pipeline_insert(i: int) -> None:
+        # One new day of every ETF, stored as run_pipeline does.
+        day = datetime.date.fromisoformat(latest) + datetime.timedelta(days=i + 1)
+        conn = sqlite3.connect(work / "pipeline.db")
+        try:
+            for code, hs in snapshot():
+                db.insert_pcf_info(conn, code, day.isoformat(), name=f"ETF {code}")
+                db.insert_holdings(conn, code, day.isoformat(), hs)
+                db.upsert_etf(conn, code, name_en=f"ETF {code}")
+            conn.commit()
+        finally:
+            conn.close()
+
+    return {
+        "parse_pcf": (lambda i: parse_pcf(csv_text), None, 1),
+        "read_holdings": (lambda i: db.read_holdings(etf(i)), None, 1),
+        "search_by_holding": (lambda i: db.search_by_holding(stock(i)), None, 1),
+        "read_history": (lambda i: db.read_history(etf(i), stock(i)), None, 1),
+        "read_history_changes": (lambda i: db.read_history(etf(i)), None, 1),
+        "ranking": (lambda i: ranking("1m", 10, date=latest), None, 1),
+        "etf_to_dataframe": (lambda i: ETF(etf(i)).to_dataframe(), None, 1),
+        "sync_apply": (sync_apply, fresh_client, _HEAVY),
+        "pipeline_insert": (pipeline_insert, lambda i: snapshot(), _HEAVY),
+    }
+
+
+def _shape(path: Path) -> tuple[list[str], list[str], int, int]:
+    """ETF codes, the 100 most widely held stocks, days and holding rows."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        etfs = [r[0] for r in conn.execute("SELECT code FROM etfs ORDER BY code")]
+        stocks = [
+            r[0]
+            for r in conn.execute(
+                "SELECT s.code FROM pcf_holdings h "
+                "JOIN securities s ON s.id = h.security_id "
+                "WHERE h.date = (SELECT MAX(date) FROM pcf_info) "
+                "GROUP BY h.security_id ORDER BY COUNT(*) DESC, s.code LIMIT 100"
+            )
+        ]
+        (days,) = conn.execute("SELECT COUNT(DISTINCT date) FROM pcf_info").fetchone()
+        (rows,) = conn.execute("SELECT COUNT(*) FROM pcf_holdings").fetchone()
+    finally:
+        conn.close()
+    return etfs, stocks, days, rows
+
+
+def run(
+    *,
+    etfs: int = 100,
+    holdings: int = 500,
+    days: int = 20,
+    repeat: int = 20,
+    db_path: Path | None = None,
+    only: Sequence[str] | None = None,
+) -> dict[str, Any]:
+    """Build (or reuse) a synthetic DB and time every case on it.
+
+    With *db_path*, an existing DB there is reused as-is and a missing one
+    is built there and kept; otherwise the DB lives in a temporary
+    directory. The DB itself is never modified. *only* limits the run to
+    the named cases.
+    """
+    from .. import __version__
+
+    unknown = set(only or ()) - set(CASES)
+    if unknown:
+        raise ValueError(
+            f"unknown benchmark(s): {', '.join(sorted(unknown))}; "
+            f"choose from {', '.join(CASES)}"
+        )
+    with tempfile.TemporaryDirectory(prefix="pyjpx-etf-bench-") as tmp:
+        work = Path(tmp)
+        path = db_path or work / "pcf.db"
+        build_s = None
+        if not path.is_file():
+            _echo(f"Building synthetic DB: {etfs} ETFs x {holdings} x {days} days")
+            t0 = time.perf_counter()
+            synth.build_db(path, etfs=etfs, holdings=holdings, days=days)
+            build_s = round(time.perf_counter() - t0, 2)
+        etf_list, stocks, n_days, n_rows = _shape(path)
+        # Describe the DB actually measured, which --db may have reused.
+        params = {
+            "etfs": len(etf_list),
+            "holdings": round(n_rows / max(len(etf_list) * n_days, 1)),
+            "days": n_days,
+        }
+        with _use_db(path):
+            cases = _cases(path, work, etf_list, stocks, params["holdings"])
+            results = {}
+            for name, (fn, before, divisor) in cases.items():
+                if only and name not in only:
+                    continue
+                _echo(f"  {name}")
+                n = max(1, repeat // divisor)
+                # Warm-up (imports, OS page cache) with an index no timed run
+                # uses, so that pipeline_insert writes a day of its own.
+                if before is not None:
+                    before(n)
+                fn(n)
+                results[name] = _time(fn, n, before)
+        size_mb = path.stat().st_size / 1e6
+
+    return {
+        "pyjpx_etf": __version__,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(
+            timespec="seconds"
+        ),
+        "params": params,
+        "db": {"rows": n_rows, "size_mb": round(size_mb, 1), "build_s": build_s},
+        "results": results,
+    }
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any]
+) -> list[tuple[str, float | None, float, float | None]]:
+    """Return ``(case, baseline_ms, current_ms, current / baseline)`` per case.
+
+    Medians are compared; a case missing from *baseline* has ``None``.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        old = baseline.get("results", {}).get(name, {}).get("median_ms")
+        new = result["median_ms"]
+        rows.append((name, old, new, new / old if old else None))
+    return rows
@@ -0,0 +1,148 @@
+"""SQLite cache store: reference datasets as indexed rows in one sidecar file.
+
+Each dataset (fees, names, Rakuten) is a set of ``(dataset, code, value)``
+rows in ``~/.cache/pyjpx-etf/cache.db``, so a single code can be looked up
+without loading the rest. A refresh replaces a dataset in one transaction;
+in WAL mode readers keep seeing the previous rows until it commits.
+
+The store lives beside pcf.db rather than inside it because ``sync``
+replaces pcf.db wholesale.
+"""
+
+from __future__ import annotations
+
+import marshal
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS datasets (
+    name       TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    stamp      TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS entries (
+    dataset TEXT NOT NULL,
+    code    TEXT NOT NULL,
+    value,
+    PRIMARY KEY (dataset, code)
+) WITHOUT ROWID;
+"""
+
+# Dict values (Rakuten rows) are stored as marshal blobs, whose format may
+# change between Python versions; rows written by another version are a miss.
+_STAMP = f"{marshal.version}:{sys.version_info[0]}.{sys.version_info[1]}"
+
+# Stored as-is; anything else is marshalled into a BLOB.
+_SCALARS = (str, int, float, type(None))
+
+
+def _encode(value: Any) -> Any:
+    return value if isinstance(value, _SCALARS) else marshal.dumps(value)
+
+
+def _decode(value: Any) -> Any:
+    return marshal.loads(value) if isinstance(value, bytes) else value
+
+
+class SQLiteStore:
+    """Disk tier for a :class:`TieredCache` holding a ``{code: value}`` dict.
+
+    Methods take the database path on each call so that the cache's
+    ``_disk_path`` stays the single place that decides where data lives.
+    *legacy* names the JSON file (next to the database) that older versions
+    kept the dataset in; it is migrated on first read.
+    """
+
+    def __init__(self, dataset: str, *, legacy: str | None = None) -> None:
+        self.dataset = dataset
+        self.legacy = legacy
+
+    def _connect(self, path: Path, *, readonly: bool = True) -> sqlite3.Connection:
+        if readonly:
+            return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA_SQL)
+        return conn
+
+    def read(self, path: Path) -> tuple[float, dict[str, Any]] | None:
+        """Return ``(fetched_at, data)`` regardless of age."""
+        try:
+            conn = self._connect(path)
+        except sqlite3.Error:
+            return None
+        try:
+            # One read transaction, so the rows match the timestamp.
+            conn.execute("BEGIN")
+            row = conn.execute(
+                "SELECT fetched_at, stamp FROM datasets WHERE name = ?",
+                (self.dataset,),
+            ).fetchone()
+            if row is None or row[1] != _STAMP:
+                return None
+            rows = conn.execute(
+                "SELECT code, value FROM entries WHERE dataset = ?",
+                (self.dataset,),
+            ).fetchall()
+        except sqlite3.Error:
+            return None
+        finally:
+            conn.close()
+        data = dict(rows)
+        for code, value in rows:
+            if isinstance(value, bytes):
+                data[code] = marshal.loads(value)
+        return row[0], data
+
+    def lookup(self, path: Path, code: str) -> tuple[float, Any | None] | None:
+        """Return ``(fetched_at, value)`` for one *code* (value None if absent).
+
+        Returns None if the dataset itself is absent. Both come from the
+        same read, on the primary key index.
+        """
+        try:
+            conn = self._connect(path)
+        except sqlite3.Error:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT d.fetched_at, d.stamp, e.value FROM datasets AS d "
+                "LEFT JOIN entries AS e ON e.dataset = d.name AND e.code = ? "
+                "WHERE d.name = ?",
+                (code, self.dataset),
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        finally:
+            conn.close()
+        if row is None or row[1] != _STAMP:
+            return None
+        return row[0], _decode(row[2])
+
+    def write(self, path: Path, data: dict[str, Any], timestamp: float) -> None:
+        """Replace the dataset with *data* in a single transaction."""
+        conn = self._connect(path, readonly=False)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM entries WHERE dataset = ?", (self.dataset,))
+                conn.executemany(
+                    "INSERT INTO entries (dataset, code, value) VALUES (?, ?, ?)",
+                    ((self.dataset, code, _encode(v)) for code, v in data.items()),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO datasets (name, fetched_at, stamp) "
+                    "VALUES (?, ?, ?)",
+                    (self.dataset, timestamp, _STAMP),
+                )
+            except Exception:
+                conn.rollback()
+                raise
+            conn.commit()
+        finally:
+            conn.close()
@@ -0,0 +1,95 @@
+"""CLI handler: etf bench [--etfs N] [--holdings N] [--days N] [-o FILE] ..."""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+from .cli_fmt import format_table
+
+_INT_OPTIONS = {"--etfs": "etfs", "--holdings": "holdings", "--days": "days"}
+
+
+def _print_results(result: dict[str, Any], baseline: dict[str, Any] | None) -> None:
+    from .bench import compare
+
+    p, d = result["params"], result["db"]
+    print(
+        f"\n {p['etfs']} ETFs x {p['holdings']} holdings x {p['days']} days: "
+        f"{d['rows']:,} rows, {d['size_mb']} MB"
+        + (f", built in {d['build_s']:.1f}s" if d["build_s"] is not None else "")
+    )
+    rows = compare(result, baseline or {})
+    header = ["Benchmark", "Runs", "Median ms", "Min ms"]
+    columns = [
+        [name for name, *_ in rows],
+        [str(result["results"][name]["repeat"]) for name, *_ in rows],
+        [f"{new:,.2f}" for _, _, new, _ in rows],
+        [f"{result['results'][name]['min_ms']:,.2f}" for name, *_ in rows],
+    ]
+    align = "<>>>"
+    if baseline is not None:
+        print(f" baseline: pyjpx-etf {baseline.get('pyjpx_etf', '?')}")
+        if baseline.get("params") != p:
+            print(f" warning: baseline ran on {baseline.get('params')}")
+        header += ["Baseline", "Change"]
+        columns += [
+            ["-" if old is None else f"{old:,.2f}" for _, old, _, _ in rows],
+            ["-" if r is None else f"{r:.2f}x" for *_, r in rows],
+        ]
+        align += ">>"
+    print(f"\n{format_table(header, columns, align=align)}\n")
+
+
+def main_bench(argv: list[str]) -> None:
+    """Handle ``etf bench [--etfs N] [--holdings N] [--days N] [--repeat N]
+    [--db PATH] [--only a,b] [-o FILE] [--compare FILE]``."""
+    kwargs: dict[str, Any] = {}
+    output = baseline_path = None
+
+    args = iter(argv)
+    for arg in args:
+        value = next(args, None)
+        if value is None:
+            print(f"Error: {arg} needs a value", file=sys.stderr)
+            sys.exit(1)
+        if arg in _INT_OPTIONS or arg == "--repeat":
+            try:
+                kwargs[_INT_OPTIONS.get(arg, "repeat")] = int(value)
+            except ValueError:
+                print(f"Error: {arg} must be an integer", file=sys.stderr)
+                sys.exit(1)
+        elif arg == "--db":
+            kwargs["db_path"] = Path(value)
+        elif arg == "--only":
+            kwargs["only"] = value.split(",")
+        elif arg in ("-o", "--output"):
+            output = Path(value)
+        elif arg == "--compare":
+            baseline_path = Path(value)
+        else:
+            print(f"Error: invalid argument {arg!r}", file=sys.stderr)
+            sys.exit(1)
+
+    baseline = None
+    if baseline_path is not None:
+        try:
+            baseline = json.loads(baseline_path.read_text())
+        except (OSError, ValueError) as exc:
+            print(f"Error: cannot read {baseline_path}: {exc}", file=sys.stderr)
+            sys.exit(1)
+
+    from .bench import run
+
+    try:
+        result = run(**kwargs)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        sys.exit(1)
+
+    _print_results(result, baseline)
+    if output is not None:
+        output.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"Results written to {output}")
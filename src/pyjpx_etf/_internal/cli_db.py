@@ -6,7 +6,7 @@ import sys
 
 from ..config import config
 from ..exceptions import PyJPXETFError
-from .cli_fmt import display_width, pad
+from .cli_fmt import RowWriter, format_table, pop_format
 
 
 def main_sync(argv: list[str]) -> None:
@@ -24,7 +24,8 @@ def main_sync(argv: list[str]) -> None:
 
 
 def main_search(argv: list[str]) -> None:
-    """Handle ``etf search <stock_code> [n] [--en]``."""
+    """Handle ``etf search <stock_code> [n] [--en] [--format F]``."""
+    fmt, argv = pop_format(argv)
     stock_code = None
     n = 10
     en = False
@@ -48,34 +49,42 @@ def main_search(argv: list[str]) -> None:
     if en:
         config.lang = "en"
 
-    from ..search import search
+    from ..etf import _require_db
+    from .db import search_rows
+    from .db_read import SEARCH_COLUMNS
 
     try:
-        df = search(stock_code, n=n)
+        _require_db()
     except PyJPXETFError as exc:
         print(f"Error: {exc}", file=sys.stderr)
         sys.exit(1)
 
-    if df.empty:
+    rows = search_rows(stock_code, n=n)
+    if fmt != "table":
+        RowWriter(fmt, SEARCH_COLUMNS).write_all(rows)
+        return
+    if not rows:
         print(f"No ETFs found holding stock {stock_code}.")
         return
 
-    name_width = max(display_width(str(n)) for n in df["name"])
-    name_width = max(name_width, 4)
-
-    print()
-    print(f" {'Code':<5}  {pad('Name', name_width)}  {'Weight':>8}  {'Shares':>12}")
-    print(f"{'─' * 5}  {'─' * name_width}  {'─' * 8}  {'─' * 12}")
-    for _, row in df.iterrows():
-        print(
-            f" {row['code']:<5}  {pad(str(row['name']), name_width)}"
-            f"  {row['weight'] * 100:>7.2f}%  {row['shares']:>12,.0f}"
-        )
-    print()
+    codes, names, weights, shares = zip(*rows)
+    table = format_table(
+        ("Code", "Name", "Weight", "Shares"),
+        (
+            codes,
+            [str(n) for n in names],
+            [f"{w * 100:.2f}%" for w in weights],
+            [f"{s:,.0f}" for s in shares],
+        ),
+        align="<<>>",
+        min_widths=(5, 4, 8, 12),
+    )
+    print(f"\n{table}\n")
 
 
 def main_history(argv: list[str]) -> None:
-    """Handle ``etf history <etf_code> [stock_code] [--en]``."""
+    """Handle ``etf history <etf_code> [stock_code] [--en] [--format F]``."""
+    fmt, argv = pop_format(argv)
     etf_code = None
     stock_code = None
     en = False
@@ -95,42 +104,51 @@ def main_history(argv: list[str]) -> None:
     if en:
         config.lang = "en"
 
-    from ..history import history
+    from ..etf import _require_db
+    from .db import history_rows
+    from .db_read import CHANGE_COLUMNS, SERIES_COLUMNS
 
     try:
-        df = history(etf_code, stock_code)
+        _require_db()
     except PyJPXETFError as exc:
         print(f"Error: {exc}", file=sys.stderr)
         sys.exit(1)
 
-    if df.empty:
+    rows = history_rows(etf_code, stock_code)
+    if fmt != "table":
+        columns = SERIES_COLUMNS if stock_code is not None else CHANGE_COLUMNS
+        RowWriter(fmt, columns).write_all(rows or [])
+        return
+    if not rows:
         print("No history data available.")
         return
 
     if stock_code is not None:
         # Time series view
-        print()
-        print(f" {'Date':<12}  {'Weight':>8}  {'Shares':>12}  {'Price':>10}")
-        print(f"{'─' * 12}  {'─' * 8}  {'─' * 12}  {'─' * 10}")
-        for _, row in df.iterrows():
-            print(
-                f" {row['date']:<12}  {row['weight'] * 100:>7.2f}%"
-                f"  {row['shares']:>12,.0f}  {row['price']:>10,.1f}"
-            )
-        print()
+        dates, weights, shares, prices = zip(*rows)
+        table = format_table(
+            ("Date", "Weight", "Shares", "Price"),
+            (
+                dates,
+                [f"{w * 100:.2f}%" for w in weights],
+                [f"{s:,.0f}" for s in shares],
+                [f"{p:,.1f}" for p in prices],
+            ),
+            align="<>>>",
+            min_widths=(12, 8, 12, 10),
+        )
     else:
         # Top holdings with weight change
-        name_width = max(display_width(str(n)) for n in df["name"])
-        name_width = max(name_width, 4)
-
-        print()
-        print(f" {'Code':<5}  {pad('Name', name_width)}  {'Weight':>8}  {'Change':>8}")
-        print(f"{'─' * 5}  {'─' * name_width}  {'─' * 8}  {'─' * 8}")
-        for _, row in df.iterrows():
-            change = row["weight_change"] * 100
-            sign = "+" if change >= 0 else ""
-            print(
-                f" {row['code']:<5}  {pad(str(row['name']), name_width)}"
-                f"  {row['weight'] * 100:>7.2f}%  {sign}{change:>6.2f}%"
-            )
-        print()
+        codes, names, weights, changes = zip(*rows)
+        table = format_table(
+            ("Code", "Name", "Weight", "Change"),
+            (
+                codes,
+                [str(n) for n in names],
+                [f"{w * 100:.2f}%" for w in weights],
+                [f"{'+' if c >= 0 else ''}{c * 100:>6.2f}%" for c in changes],
+            ),
+            align="<<>>",
+            min_widths=(5, 4, 8, 8),
+        )
+    print(f"\n{table}\n")
@@ -2,17 +2,118 @@
 
 from __future__ import annotations
 
+import csv
+import json
+import sys
 import unicodedata
+from collections.abc import Iterable, Sequence
+from functools import lru_cache
+from typing import Any, TextIO
 
+FORMATS = ("table", "json", "csv")
 
+
+@lru_cache(maxsize=8192)
 def display_width(s: str) -> int:
     """Return the number of terminal columns a string occupies."""
+    if s.isascii():
+        return len(s)
     return sum(2 if unicodedata.east_asian_width(c) in ("F", "W") else 1 for c in s)
 
 
-def pad(s: str, width: int) -> str:
-    """Left-align *s* padded to *width* terminal columns."""
-    return s + " " * (width - display_width(s))
+def format_table(
+    header: Sequence[str],
+    columns: Sequence[Sequence[str]],
+    *,
+    align: str,
+    min_widths: Sequence[int] = (),
+) -> str:
+    """Lay out pre-formatted *columns* (one sequence of cells each) as a table.
+
+    *align* has one ``<`` or ``>`` per column. Each column is as wide as its
+    widest cell or header, and at least its entry in *min_widths*. Returns
+    the header, a rule and the rows as one string, so that the table is
+    written in a single call.
+    """
+    widths = [
+        max(
+            min_widths[i] if i < len(min_widths) else 0,
+            display_width(title),
+            max(map(display_width, cells), default=0),
+        )
+        for i, (title, cells) in enumerate(zip(header, columns))
+    ]
+
+    def fit(s: str, width: int, right: bool) -> str:
+        fill = " " * (width - display_width(s))
+        return fill + s if right else s + fill
+
+    rights = [a == ">" for a in align]
+    lines = [
+        " " + "  ".join(fit(t, w, r) for t, w, r in zip(header, widths, rights)),
+        "  ".join("─" * w for w in widths),
+    ]
+    lines.extend(
+        " " + "  ".join(fit(c, w, r) for c, w, r in zip(row, widths, rights))
+        for row in zip(*columns)
+    )
+    return "\n".join(lines)
+
+
+def pop_format(argv: list[str]) -> tuple[str, list[str]]:
+    """Split ``--format X`` / ``--format=X`` off *argv*.
+
+    Returns the format (``table`` if absent) and the remaining arguments.
+    Exits with an error for an unknown or missing format.
+    """
+    fmt = "table"
+    rest: list[str] = []
+    args = iter(argv)
+    for arg in args:
+        if arg == "--format":
+            fmt = next(args, "")
+        elif arg.startswith("--format="):
+            fmt = arg.partition("=")[2]
+        else:
+            rest.append(arg)
+    if fmt not in FORMATS:
+        print(
+            f"Error: --format must be one of {', '.join(FORMATS)}, got {fmt!r}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    return fmt, rest
+
+
+class RowWriter:
+    """Stream records as NDJSON (one object per line) or CSV (one header).
+
+    Each :meth:`write` goes straight to *out*, so output starts before the
+    last row is known. NaN becomes ``null`` / an empty field.
+    """
+
+    def __init__(
+        self, fmt: str, columns: Sequence[str], out: TextIO | None = None
+    ) -> None:
+        self._fmt = fmt
+        self._columns = tuple(columns)
+        self._out = out if out is not None else sys.stdout
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.writer(self._out, lineterminator="\n")
+            self._csv.writerow(self._columns)
+
+    def write(self, row: Sequence[Any]) -> None:
+        values = [None if v != v else v for v in row]  # NaN != NaN
+        if self._csv is not None:
+            self._csv.writerow(values)
+        else:
+            record = dict(zip(self._columns, values))
+            self._out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def write_all(self, rows: Iterable[Sequence[Any]]) -> None:
+        for row in rows:
+            self.write(row)
 
 
 def format_yen(value: int) -> str:
@@ -1,52 +1,78 @@
-"""CLI handler: etf rank [n] [period] [--en]"""
+"""CLI handler: etf rank [n] [period] [--en] [--format F]"""
 
 from __future__ import annotations
 
 import sys
 
-import pandas as pd
-
 from ..config import config
-from ..ranking import ranking
-from .cli_fmt import display_width, pad
-from .rakuten import PERIOD_COLUMNS
+from .cli_fmt import RowWriter, format_table, pop_format
+from .db_read import RANKING_COLUMNS
+from .fees import get_fees
+from .rakuten import PERIOD_COLUMNS, get_rakuten_data
+
+
+def _pct(value: float | None) -> str:
+    """Format a percentage, or a dash if missing (None or NaN)."""
+    if value is None or value != value:
+        return "   -"
+    return f"{value:.2f}%"
+
+
+def _missing(value: float | None) -> bool:
+    return value is None or value != value
+
+
+def _ranking_rows(period: str, n: int) -> list[tuple]:
+    """Return ``(code, name, return, fee, dividend_yield)`` rows.
+
+    The same source and selection as :func:`~pyjpx_etf.ranking` without a
+    date (the cached Rakuten data, JPX fees filling gaps), computed from the
+    dicts so that pandas is not imported.
+    """
+    data = get_rakuten_data()
+    jpx_fees = get_fees()
+    name_key = "name_ja" if config.lang == "ja" else "name_en"
+    ranked = [(code, e) for code, e in data.items() if not _missing(e.get(period))]
+    # A stable sort, like ranking(): ties keep the data's order.
+    ranked.sort(key=lambda item: item[1][period], reverse=n >= 0)
+    if n:
+        ranked = ranked[: abs(n)]
+    rows = []
+    for code, e in ranked:
+        fee = e.get("fee")
+        if _missing(fee):
+            fee = jpx_fees.get(code)
+        rows.append(
+            (code, e.get(name_key, ""), e[period], fee, e.get("dividend_yield"))
+        )
+    return rows
 
 
-def _print_ranking(df: pd.DataFrame, period: str) -> None:
+def _print_ranking(rows: list[tuple], period: str) -> None:
     """Format and print the ranking table."""
-    if df.empty:
+    if not rows:
         print("No data available.")
         return
 
-    period_label = f"Return ({period})"
-    name_width = max(display_width(str(n)) for n in df["name"])
-    name_width = max(name_width, 4)  # at least "Name"
-
-    header = (
-        f" {'Code':<5}  {pad('Name', name_width)}"
-        f"  {period_label:>12}  {'Fee':>6}  {'Yield':>6}"
+    codes, names, returns, fees, yields = zip(*rows)
+    table = format_table(
+        ("Code", "Name", f"Return ({period})", "Fee", "Yield"),
+        (
+            codes,
+            [str(n) for n in names],
+            [f"{r:.2f}%" for r in returns],
+            [_pct(f) for f in fees],
+            [_pct(y) for y in yields],
+        ),
+        align="<<>>>",
+        min_widths=(5, 4, 12, 6, 6),
     )
-    sep = f"{'─' * 5}  {'─' * name_width}  {'─' * 12}  {'─' * 6}  {'─' * 6}"
-
-    print()
-    print(header)
-    print(sep)
-    for _, row in df.iterrows():
-        fee_str = f"{row['fee']:.2f}%" if pd.notna(row["fee"]) else "   -"
-        yld_str = (
-            f"{row['dividend_yield']:.2f}%"
-            if pd.notna(row["dividend_yield"])
-            else "   -"
-        )
-        print(
-            f" {row['code']:<5}  {pad(str(row['name']), name_width)}"
-            f"  {row['return']:>11.2f}%  {fee_str:>6}  {yld_str:>6}"
-        )
-    print()
+    print(f"\n{table}\n")
 
 
 def main_rank(argv: list[str]) -> None:
-    """Handle ``etf rank [n] [period] [--en]``."""
+    """Handle ``etf rank [n] [period] [--en] [--format F]``."""
+    fmt, argv = pop_format(argv)
     n = 10
     period = "1m"
     en = False
@@ -74,9 +100,12 @@ def main_rank(argv: list[str]) -> None:
         config.lang = "en"
 
     try:
-        df = ranking(period=period, n=n)
+        rows = _ranking_rows(period, n)
     except Exception as exc:
         print(f"Error: {exc}", file=sys.stderr)
         sys.exit(1)
 
-    _print_ranking(df, period)
+    if fmt == "table":
+        _print_ranking(rows, period)
+    else:
+        RowWriter(fmt, RANKING_COLUMNS).write_all(rows)
@@ -0,0 +1,99 @@
+"""CLI handler: etf serve [--host H] [--port P] [--en] [--bench [N] [-c C]]"""
+
+from __future__ import annotations
+
+import sys
+
+from ..config import config
+from ..exceptions import PyJPXETFError
+from .cli_fmt import format_table
+
+
+def _option(argv: list[str], i: int) -> str:
+    if i + 1 >= len(argv):
+        print(f"Error: {argv[i]} needs a value", file=sys.stderr)
+        sys.exit(1)
+    return argv[i + 1]
+
+
+def _print_bench(result: dict) -> None:
+    rows = [*result["endpoints"].items(), ("total", result["total"])]
+    table = format_table(
+        ("Endpoint", "Requests", "p50 ms", "p95 ms", "p99 ms"),
+        (
+            [name for name, _ in rows],
+            [f"{s['requests']:,}" for _, s in rows],
+            [f"{s['p50']:.2f}" for _, s in rows],
+            [f"{s['p95']:.2f}" for _, s in rows],
+            [f"{s['p99']:.2f}" for _, s in rows],
+        ),
+        align="<>>>>",
+    )
+    print(
+        f"\n {result['rps']:,.0f} req/s at concurrency {result['concurrency']} "
+        f"(first pass, cold caches: {result['cold_rps']:,.0f} req/s)\n\n{table}\n"
+    )
+
+
+def main_serve(argv: list[str]) -> None:
+    """Handle ``etf serve [--host H] [--port P] [--en] [-v] [--bench ...]``."""
+    host, port = "127.0.0.1", 8000
+    en = verbose = run_bench = False
+    requests, concurrency = 5000, 8
+
+    i = 0
+    try:
+        while i < len(argv):
+            arg = argv[i]
+            if arg == "--host":
+                host = _option(argv, i)
+                i += 1
+            elif arg == "--port":
+                port = int(_option(argv, i))
+                i += 1
+            elif arg in ("-n", "--requests"):
+                requests = int(_option(argv, i))
+                i += 1
+            elif arg in ("-c", "--concurrency"):
+                concurrency = int(_option(argv, i))
+                i += 1
+            elif arg == "--en":
+                en = True
+            elif arg in ("-v", "--verbose"):
+                verbose = True
+            elif arg == "--bench":
+                run_bench = True
+            else:
+                print(f"Error: invalid argument {arg!r}", file=sys.stderr)
+                sys.exit(1)
+            i += 1
+    except ValueError:
+        print(f"Error: {argv[i]} must be an integer", file=sys.stderr)
+        sys.exit(1)
+
+    if en:
+        config.lang = "en"
+
+    from ..etf import _require_db
+    from . import db
+    from .server import QueryServer, bench
+
+    try:
+        _require_db()
+    except PyJPXETFError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        sys.exit(1)
+
+    if run_bench:
+        _print_bench(bench(db.db_path(), requests=requests, concurrency=concurrency))
+        return
+
+    server = QueryServer((host, port), db.db_path())
+    server.verbose = verbose
+    print(f"Serving {db.db_path()} on http://{host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,13 +1,17 @@
-"""CLI handler: etf <code> [--en] [-a] [--live]"""
+"""CLI handler: etf <code ...|-> [--en] [-a] [--live] [--format F]"""
 
 from __future__ import annotations
 
 import sys
 
 from ..config import _ALIASES, config
-from ..etf import ETF
+from ..etf import ETF, _load_many
 from ..exceptions import PyJPXETFError
-from .cli_fmt import display_width, format_yen, pad
+from ..models import Holding
+from .cli_fmt import RowWriter, format_table, format_yen, pop_format
+
+# Fields of each --format json/csv record.
+HOLDING_COLUMNS = ("etf", "date", "code", "name", "weight", "shares", "price")
 
 
 def _resolve_code(code: str) -> str:
@@ -15,75 +19,109 @@ def _resolve_code(code: str) -> str:
     return _ALIASES.get(code.lower(), code)
 
 
-def _print_holdings(e: ETF, *, show_all: bool) -> None:
-    """Print the holdings table (top 10 or all)."""
+def _shown_holdings(e: ETF, *, show_all: bool) -> list[Holding]:
+    """All holdings, or the top 10 by weight (as ETF.top(), without pandas)."""
     if show_all:
-        df = e.to_dataframe()
-        df = (
-            df[["code", "name", "weight"]]
-            .assign(weight=lambda d: d["weight"] * 100)
-            .reset_index(drop=True)
-        )
-    else:
-        df = e.top()
+        return e.holdings
+    return sorted(e.holdings, key=lambda h: h.weight, reverse=True)[:10]
 
-    name_width = max(display_width(n) for n in df["name"])
-    header = f" {'Code':<5}  {pad('Name', name_width)}  {'Weight':>6}"
-    sep = f"{'─' * 5}  {'─' * name_width}  {'─' * 6}"
 
-    print(header)
-    print(sep)
-    for _, row in df.iterrows():
-        print(
-            f" {row['code']:<5}  {pad(row['name'], name_width)}  {row['weight']:>5.1f}%"
-        )
+def _print_holdings(e: ETF, *, show_all: bool) -> None:
+    """Print the holdings table (top 10 or all)."""
+    holdings = _shown_holdings(e, show_all=show_all)
+
+    table = format_table(
+        ("Code", "Name", "Weight"),
+        (
+            [h.code for h in holdings],
+            [h.name for h in holdings],
+            [f"{h.weight * 100:.1f}%" for h in holdings],
+        ),
+        align="<<>",
+        min_widths=(5, 4, 6),
+    )
+    print(table, end="\n\n")
+
+
+def _read_codes(argv: list[str]) -> list[str]:
+    """Return the codes in *argv*; ``-`` reads more from stdin."""
+    codes: list[str] = []
+    for arg in argv:
+        if arg == "-":
+            codes.extend(sys.stdin.read().split())
+        else:
+            codes.append(arg)
+    return codes
+
+
+def _print_etf(e: ETF, *, show_all: bool) -> None:
+    """Print one ETF's title, NAV/fee line and holdings table."""
+    info = e.info
+    print(f"\n{info.code} — {info.name} ({info.date})")
+
+    meta_parts: list[str] = []
+    meta_parts.append(f"Nav: {format_yen(e.nav)}")
+    fee = e.fee
+    if fee is not None:
+        fee_label = "信託報酬" if config.lang == "ja" else "Fee"
+        meta_parts.append(f"{fee_label}: {fee}%")
+    print("  ".join(meta_parts))
     print()
 
+    _print_holdings(e, show_all=show_all)
+
+
+def _holding_rows(e: ETF, *, show_all: bool) -> list[tuple]:
+    """Return one row per holding (``HOLDING_COLUMNS``), top 10 unless all."""
+    info = e.info
+    holdings = _shown_holdings(e, show_all=show_all)
+    date = info.date.isoformat()
+    return [
+        (info.code, date, h.code, h.name, h.weight, h.shares, h.price) for h in holdings
+    ]
+
 
 def main_etf(argv: list[str]) -> None:
-    """Handle ``etf <code> [--en] [-a] [--live]``."""
-    code = None
+    """Handle ``etf <code|-> [code ...] [--en] [-a] [--live] [--format F]``."""
+    fmt, argv = pop_format(argv)
     en = False
     show_all = False
     live = False
+    positional: list[str] = []
 
-    i = 0
-    while i < len(argv):
-        if argv[i] == "--en":
+    for arg in argv:
+        if arg == "--en":
             en = True
-        elif argv[i] in ("-a", "--all"):
+        elif arg in ("-a", "--all"):
             show_all = True
-        elif argv[i] == "--live":
+        elif arg == "--live":
             live = True
-        elif code is None:
-            code = argv[i]
-        i += 1
+        else:
+            positional.append(arg)
 
-    if code is None:
-        print("Usage: etf <code|alias> [--en] [-a] [--live]", file=sys.stderr)
+    codes = _read_codes(positional)
+    if not codes:
+        print(
+            "Usage: etf <code|alias|-> [code ...] [--en] [-a] [--live] "
+            "[--format table|json|csv]",
+            file=sys.stderr,
+        )
         sys.exit(1)
 
     if en:
         config.lang = "en"
 
-    code = _resolve_code(code)
-
-    try:
-        e = ETF(code, live=live)
-        info = e.info
-    except PyJPXETFError as exc:
-        print(f"Error: {exc}", file=sys.stderr)
+    writer = None if fmt == "table" else RowWriter(fmt, HOLDING_COLUMNS)
+    failed = False
+    for e in _load_many([_resolve_code(c) for c in codes], live=live):
+        try:
+            if writer is None:
+                _print_etf(e, show_all=show_all)
+            else:
+                writer.write_all(_holding_rows(e, show_all=show_all))
+        except PyJPXETFError as exc:
+            # One bad code does not stop the batch; the exit status tells.
+            print(f"Error: {exc}", file=sys.stderr)
+            failed = True
+    if failed:
         sys.exit(1)
-
-    print(f"\n{info.code} — {info.name} ({info.date})")
-
-    meta_parts: list[str] = []
-    meta_parts.append(f"Nav: {format_yen(e.nav)}")
-    fee = e.fee
-    if fee is not None:
-        fee_label = "信託報酬" if config.lang == "ja" else "Fee"
-        meta_parts.append(f"{fee_label}: {fee}%")
-    print("  ".join(meta_parts))
-    print()
-
-    _print_holdings(e, show_all=show_all)
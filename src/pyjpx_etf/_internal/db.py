@@ -1,18 +1,35 @@
-"""SQLite layer — re-exports from db_core, db_read, db_write."""
+"""SQLite layer — re-exports from db_core, db_migrate, db_read, db_write."""
 
-from .db_core import db_exists, db_path, get_connection
+from .db_core import (
+    SCHEMA_VERSION,
+    db_exists,
+    db_path,
+    get_connection,
+    is_current_schema,
+    is_fresh,
+    schema_version,
+)
+from .db_migrate import migrate
 from .db_read import (
+    as_of_rows,
+    history_rows,
+    ranking_rows,
+    read_as_of,
     read_etf_dates,
     read_etf_fee,
     read_etf_info,
     read_etf_list,
+    read_etfs,
     read_history,
     read_holdings,
+    read_ranking,
     search_by_holding,
+    search_rows,
 )
 from .db_write import (
     init_schema,
     insert_holdings,
+    insert_metrics,
     insert_pcf_info,
     update_meta,
     upsert_etf,
@@ -20,19 +37,32 @@ from .db_write import (
 )
 
 __all__ = [
+    "SCHEMA_VERSION",
+    "as_of_rows",
     "db_exists",
     "db_path",
     "get_connection",
+    "history_rows",
     "init_schema",
     "insert_holdings",
+    "insert_metrics",
     "insert_pcf_info",
+    "is_current_schema",
+    "is_fresh",
+    "migrate",
+    "ranking_rows",
+    "read_as_of",
     "read_etf_dates",
     "read_etf_fee",
     "read_etf_info",
     "read_etf_list",
+    "read_etfs",
     "read_history",
     "read_holdings",
+    "read_ranking",
+    "schema_version",
     "search_by_holding",
+    "search_rows",
     "update_meta",
     "upsert_etf",
     "upsert_security",
@@ -2,11 +2,24 @@
 
 from __future__ import annotations
 
+import datetime
 import sqlite3
+import time
 from pathlib import Path
 
 _DEFAULT_DB_PATH = Path.home() / ".cache" / "pyjpx-etf" / "pcf.db"
 
+SCHEMA_VERSION = 2
+
+# A synced DB younger than this is used without checking for a newer release.
+_FRESH_FOR = 24 * 3600
+
+# Schema v2 stores every code (ETFs and constituents) once in ``securities``
+# and refers to it by integer id. The descriptive PCF columns (name, ISIN,
+# exchange, currency) are dictionary-encoded in ``instruments``, and dates are
+# stored as days since 1970-01-01. See db_migrate for the v1 layout.
+# ``etf_metrics`` keeps each day's Rakuten fee, yield and period returns;
+# keyed date-first so that one day's ranking is a single range scan.
 _SCHEMA_SQL = """\
 CREATE TABLE IF NOT EXISTS meta (
     key   TEXT PRIMARY KEY,
@@ -20,37 +33,114 @@ CREATE TABLE IF NOT EXISTS etfs (
     fee     REAL
 );
 
+CREATE TABLE IF NOT EXISTS securities (
+    id      INTEGER PRIMARY KEY,
+    code    TEXT NOT NULL UNIQUE,
+    name_ja TEXT,
+    name_en TEXT
+);
+
+CREATE TABLE IF NOT EXISTS instruments (
+    id          INTEGER PRIMARY KEY,
+    security_id INTEGER NOT NULL,
+    name        TEXT NOT NULL DEFAULT '',
+    isin        TEXT NOT NULL DEFAULT '',
+    exchange    TEXT NOT NULL DEFAULT '',
+    currency    TEXT NOT NULL DEFAULT '',
+    UNIQUE (security_id, name, isin, exchange, currency)
+);
+
 CREATE TABLE IF NOT EXISTS pcf_info (
-    code               TEXT NOT NULL,
-    date               TEXT NOT NULL,
+    etf_id             INTEGER NOT NULL,
+    date               INTEGER NOT NULL,
     name               TEXT,
     cash_component     REAL,
     shares_outstanding INTEGER,
-    PRIMARY KEY (code, date)
-);
+    PRIMARY KEY (etf_id, date)
+) WITHOUT ROWID;
 
 CREATE TABLE IF NOT EXISTS pcf_holdings (
-    code         TEXT NOT NULL,
-    date         TEXT NOT NULL,
-    holding_code TEXT NOT NULL,
-    name         TEXT,
-    isin         TEXT,
-    exchange     TEXT,
-    currency     TEXT,
-    shares       REAL,
-    price        REAL,
-    weight       REAL,
-    PRIMARY KEY (code, date, holding_code)
-);
+    etf_id        INTEGER NOT NULL,
+    date          INTEGER NOT NULL,
+    security_id   INTEGER NOT NULL,
+    instrument_id INTEGER NOT NULL,
+    shares        REAL,
+    price         REAL,
+    weight        REAL,
+    PRIMARY KEY (etf_id, date, security_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_holdings_security ON pcf_holdings(security_id);
+
+CREATE TABLE IF NOT EXISTS etf_metrics (
+    date           INTEGER NOT NULL,
+    etf_id         INTEGER NOT NULL,
+    fee            REAL,
+    dividend_yield REAL,
+    return_1m      REAL,
+    return_3m      REAL,
+    return_6m      REAL,
+    return_1y      REAL,
+    return_3y      REAL,
+    return_5y      REAL,
+    return_10y     REAL,
+    return_ytd     REAL,
+    PRIMARY KEY (date, etf_id)
+) WITHOUT ROWID;
+"""
 
-CREATE INDEX IF NOT EXISTS idx_holdings_stock ON pcf_holdings(holding_code);
+_EPOCH = datetime.date(1970, 1, 1).toordinal()
 
-CREATE TABLE IF NOT EXISTS securities (
-    code    TEXT PRIMARY KEY,
-    name_ja TEXT,
-    name_en TEXT
-);
-"""
+
+def _to_day(date: str) -> int | None:
+    """Encode an ISO date string as days since 1970-01-01.
+
+    Returns None for malformed input, which matches no rows in SQL.
+    """
+    try:
+        parsed = datetime.date.fromisoformat(date)
+    except (TypeError, ValueError):
+        return None
+    if parsed.isoformat() != date:
+        return None
+    return parsed.toordinal() - _EPOCH
+
+
+def _from_day(day: int) -> datetime.date:
+    """Decode days since 1970-01-01 back into a date."""
+    return datetime.date.fromordinal(day + _EPOCH)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """Return the schema version of an open DB, or 0 if it has no tables yet.
+
+    Detected from the table layout rather than ``meta`` so that databases
+    built without ``update_meta`` are recognised too.
+    """
+    columns = {r[1] for r in conn.execute("PRAGMA table_info(pcf_holdings)")}
+    if not columns:
+        return 0
+    return 1 if "holding_code" in columns else SCHEMA_VERSION
+
+
+def is_current_schema(path: Path) -> bool:
+    """Return True if the DB at *path* uses the schema this version reads."""
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return schema_version(conn) == SCHEMA_VERSION
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+
+
+def is_fresh(path: Path) -> bool:
+    """True if *path* exists, is < 1 day old and on the current schema."""
+    if not path.is_file():
+        return False
+    age = time.time() - path.stat().st_mtime
+    return age < _FRESH_FOR and is_current_schema(path)
 
 
 def db_path() -> Path:
@@ -0,0 +1,84 @@
+"""Schema migrations: upgrade older pcf.db files in place."""
+
+from __future__ import annotations
+
+import sqlite3
+
+from .db_core import _SCHEMA_SQL, SCHEMA_VERSION, schema_version
+
+# v1 repeated name/isin/exchange/currency and an ISO date string on every
+# pcf_holdings row. The old tables are renamed, the v2 schema is created next
+# to them, and the rows are copied across with codes and descriptive columns
+# interned and dates converted to day numbers (julianday of 1970-01-01 is
+# 2440587.5).
+_V1_TO_V2_SQL = f"""\
+BEGIN;
+ALTER TABLE pcf_info RENAME TO pcf_info_v1;
+ALTER TABLE pcf_holdings RENAME TO pcf_holdings_v1;
+ALTER TABLE securities RENAME TO securities_v1;
+DROP INDEX IF EXISTS idx_holdings_stock;
+
+{_SCHEMA_SQL}
+
+INSERT INTO securities (code, name_ja, name_en)
+SELECT code, name_ja, name_en FROM securities_v1;
+
+INSERT OR IGNORE INTO securities (code)
+SELECT code FROM pcf_info_v1
+UNION SELECT code FROM pcf_holdings_v1
+UNION SELECT holding_code FROM pcf_holdings_v1;
+
+INSERT OR IGNORE INTO instruments (security_id, name, isin, exchange, currency)
+SELECT DISTINCT s.id, COALESCE(h.name, ''), COALESCE(h.isin, ''),
+    COALESCE(h.exchange, ''), COALESCE(h.currency, '')
+FROM pcf_holdings_v1 h
+JOIN securities s ON s.code = h.holding_code;
+
+INSERT INTO pcf_info (etf_id, date, name, cash_component, shares_outstanding)
+SELECT s.id, CAST(julianday(p.date) - 2440587.5 AS INTEGER),
+    p.name, p.cash_component, p.shares_outstanding
+FROM pcf_info_v1 p
+JOIN securities s ON s.code = p.code;
+
+INSERT INTO pcf_holdings
+    (etf_id, date, security_id, instrument_id, shares, price, weight)
+SELECT e.id, CAST(julianday(h.date) - 2440587.5 AS INTEGER),
+    s.id, i.id, h.shares, h.price, h.weight
+FROM pcf_holdings_v1 h
+JOIN securities e ON e.code = h.code
+JOIN securities s ON s.code = h.holding_code
+JOIN instruments i
+    ON i.security_id = s.id
+    AND i.name = COALESCE(h.name, '')
+    AND i.isin = COALESCE(h.isin, '')
+    AND i.exchange = COALESCE(h.exchange, '')
+    AND i.currency = COALESCE(h.currency, '');
+
+DROP TABLE pcf_holdings_v1;
+DROP TABLE pcf_info_v1;
+DROP TABLE securities_v1;
+
+INSERT OR REPLACE INTO meta (key, value) VALUES ('version', '2');
+COMMIT;
+"""
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Upgrade an existing DB to the current schema version.
+
+    No-op for empty or up-to-date databases. Each step runs in a single
+    transaction, so a failed migration leaves the DB untouched.
+    Returns the version the DB was at before migrating.
+    """
+    version = schema_version(conn)
+    if version in (0, SCHEMA_VERSION):
+        return version
+
+    if version == 1:
+        try:
+            conn.executescript(_V1_TO_V2_SQL)
+        except Exception:
+            conn.rollback()
+            raise
+        conn.execute("VACUUM")  # reclaim the pages freed by the v1 tables
+    return version
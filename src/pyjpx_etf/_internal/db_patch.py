@@ -0,0 +1,132 @@
+"""Daily patch files: the rows one pipeline run added to pcf.db.
+
+A patch is a small SQLite file with the regular schema that holds only the
+rows that are new or changed relative to the previous day's database. Ids in
+``securities`` and ``instruments`` are only ever appended, so a client whose
+DB matches the patch's base can apply it with ``INSERT OR REPLACE``.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Sequence
+from pathlib import Path
+
+from .db_core import _SCHEMA_SQL, SCHEMA_VERSION, schema_version
+
+# SQLite attaches at most 10 databases per connection by default.
+MAX_PATCHES = 7
+
+# Apply order is irrelevant (no foreign keys), but keep it readable.
+_TABLES = (
+    "meta",
+    "etfs",
+    "securities",
+    "instruments",
+    "pcf_info",
+    "pcf_holdings",
+    "etf_metrics",
+)
+
+# Snapshot tables only grow by date, so for each ETF the diff only has to
+# look at dates from that ETF's latest snapshot in the base onwards (a re-run
+# can rewrite that day). The bound is per ETF, not global: an ETF whose PCF
+# lags can gain a snapshot older than the base's newest date.
+_SNAPSHOT_TABLES = ("pcf_info", "pcf_holdings", "etf_metrics")
+
+
+def build_patch(db_path: Path, base_path: Path, out_path: Path) -> bool:
+    """Write the rows of *db_path* that are not in *base_path* to *out_path*.
+
+    Returns False (and writes nothing) when no patch can be built: the base
+    is missing, empty or on another schema version.
+    """
+    if not base_path.is_file():
+        return False
+    base = sqlite3.connect(f"file:{base_path}?mode=ro", uri=True)
+    try:
+        if schema_version(base) != SCHEMA_VERSION:
+            return False
+        since = base.execute("SELECT MAX(date) FROM pcf_info").fetchone()[0]
+    finally:
+        base.close()
+    if since is None:
+        return False
+
+    out_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(out_path)
+    try:
+        conn.executescript(_SCHEMA_SQL)
+        conn.execute("ATTACH DATABASE ? AS src", (str(db_path),))
+        conn.execute("ATTACH DATABASE ? AS base", (str(base_path),))
+        in_base = {
+            r[0]
+            for r in conn.execute(
+                "SELECT name FROM base.sqlite_master WHERE type = 'table'"
+            )
+        }
+        for table in _TABLES:
+            if table not in in_base:  # added to the schema since the base
+                conn.execute(f"INSERT INTO {table} SELECT * FROM src.{table}")
+            elif table in _SNAPSHOT_TABLES:
+                conn.execute("DROP TABLE IF EXISTS temp.since")
+                conn.execute(
+                    "CREATE TEMP TABLE since (etf_id INTEGER PRIMARY KEY, date INTEGER)"
+                )
+                conn.execute(
+                    "INSERT INTO temp.since "
+                    f"SELECT etf_id, MAX(date) FROM base.{table} GROUP BY etf_id"
+                )
+                conn.execute(
+                    f"INSERT INTO {table} "
+                    f"SELECT t.* FROM src.{table} t "
+                    "LEFT JOIN temp.since s ON s.etf_id = t.etf_id "
+                    "WHERE s.date IS NULL OR t.date >= s.date "
+                    f"EXCEPT SELECT b.* FROM base.{table} b "
+                    "JOIN temp.since s ON s.etf_id = b.etf_id WHERE b.date >= s.date"
+                )
+            else:
+                conn.execute(
+                    f"INSERT INTO {table} "
+                    f"SELECT * FROM src.{table} EXCEPT SELECT * FROM base.{table}"
+                )
+        conn.execute("DROP TABLE IF EXISTS temp.since")
+        conn.commit()
+        conn.execute("DETACH DATABASE src")
+        conn.execute("DETACH DATABASE base")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return True
+
+
+def apply_patches(conn: sqlite3.Connection, paths: Sequence[Path]) -> None:
+    """Apply patch files to *conn* in order, all in a single transaction.
+
+    Either every patch is applied or, on any error, none is. Tables added
+    to the schema since *conn* was built are created first.
+    """
+    if len(paths) > MAX_PATCHES:
+        raise ValueError(f"Cannot apply more than {MAX_PATCHES} patches at once")
+
+    conn.executescript(_SCHEMA_SQL)
+
+    aliases = [f"patch{i}" for i in range(len(paths))]
+    for alias, path in zip(aliases, paths):
+        conn.execute(f"ATTACH DATABASE ? AS {alias}", (str(path),))
+    try:
+        conn.execute("BEGIN")
+        try:
+            for alias in aliases:
+                for table in _TABLES:
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO main.{table} "
+                        f"SELECT * FROM {alias}.{table}"
+                    )
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+    finally:
+        for alias in aliases:
+            conn.execute(f"DETACH DATABASE {alias}")
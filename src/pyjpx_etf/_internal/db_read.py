@@ -3,15 +3,124 @@
 from __future__ import annotations
 
 import datetime
-
-import pandas as pd
+import sqlite3
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
 
 from ..models import ETFInfo, Holding
-from .db_core import db_exists, get_connection
+from ._trace import span, traced
+from .db_core import _from_day, _to_day, db_exists, get_connection
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Scalar subquery resolving an ETF or stock code to its securities.id.
+_ID = "(SELECT id FROM securities WHERE code = ?)"
+
+
+def _ja() -> bool:
+    """Whether names come from ``securities.name_ja`` (``config.lang``).
+
+    The pipeline stores the JPX master list's Japanese names there, so DB
+    reads never need the master list itself. Codes missing from it (foreign
+    stocks, cash lines) keep the name from their PCF.
+    """
+    from ..config import config
+
+    return config.lang == "ja"
 
 
-def read_etf_info(code: str, date: str | None = None) -> ETFInfo | None:
-    """Read ETF info from the database. Uses latest date if date is None."""
+def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone()
+        is not None
+    )
+
+
+def _read_info(
+    conn: sqlite3.Connection, code: str, date: str | None, as_of: bool = False
+) -> ETFInfo | None:
+    select = (
+        "SELECT p.*, s.name_ja FROM pcf_info p "
+        "JOIN securities s ON s.id = p.etf_id WHERE s.code = ?"
+    )
+    if date is None:
+        row = conn.execute(f"{select} ORDER BY p.date DESC LIMIT 1", (code,)).fetchone()
+    elif as_of:
+        row = conn.execute(
+            f"{select} AND p.date <= ? ORDER BY p.date DESC LIMIT 1",
+            (code, _to_day(date)),
+        ).fetchone()
+    else:
+        row = conn.execute(f"{select} AND p.date = ?", (code, _to_day(date))).fetchone()
+    if row is None:
+        return None
+    name = row["name_ja"] if _ja() else None
+    return ETFInfo(
+        code=code,
+        name=name or row["name"] or "",
+        cash_component=row["cash_component"] or 0.0,
+        shares_outstanding=row["shares_outstanding"] or 0,
+        date=_from_day(row["date"]),
+    )
+
+
+def _read_holdings(
+    conn: sqlite3.Connection, code: str, date: str | None, as_of: bool = False
+) -> list[Holding] | None:
+    if date is None:
+        latest = conn.execute(
+            f"SELECT MAX(date) FROM pcf_holdings WHERE etf_id = {_ID}", (code,)
+        ).fetchone()
+    elif as_of:
+        latest = conn.execute(
+            f"SELECT MAX(date) FROM pcf_holdings WHERE etf_id = {_ID} AND date <= ?",
+            (code, _to_day(date)),
+        ).fetchone()
+    else:
+        latest = (_to_day(date),)
+    if latest is None or latest[0] is None:
+        return None
+    day = latest[0]
+    rows = conn.execute(
+        "SELECT s.code, s.name_ja, i.name, i.isin, i.exchange, i.currency, "
+        "h.shares, h.price, h.weight "
+        "FROM pcf_holdings h "
+        "JOIN securities s ON s.id = h.security_id "
+        "JOIN instruments i ON i.id = h.instrument_id "
+        f"WHERE h.etf_id = {_ID} AND h.date = ? "
+        "ORDER BY h.weight DESC, s.code",
+        (code, day),
+    ).fetchall()
+    if not rows:
+        return None
+    ja = _ja()
+    return [
+        Holding(
+            code=r["code"],
+            name=(ja and r["name_ja"]) or r["name"],
+            isin=r["isin"],
+            exchange=r["exchange"],
+            currency=r["currency"],
+            shares=r["shares"] or 0.0,
+            price=r["price"] or 0.0,
+            weight=r["weight"] or 0.0,
+        )
+        for r in rows
+    ]
+
+
+@traced("read_etf_info")
+def read_etf_info(
+    code: str, date: str | None = None, *, as_of: bool = False
+) -> ETFInfo | None:
+    """Read ETF info from the database. Uses latest date if date is None.
+
+    With *as_of*, *date* is an upper bound: the latest snapshot on or
+    before it is read.
+    """
     if not db_exists():
         return None
     try:
@@ -19,31 +128,19 @@ def read_etf_info(code: str, date: str | None = None) -> ETFInfo | None:
     except Exception:
         return None
     try:
-        if date is None:
-            row = conn.execute(
-                "SELECT * FROM pcf_info WHERE code = ? ORDER BY date DESC LIMIT 1",
-                (code,),
-            ).fetchone()
-        else:
-            row = conn.execute(
-                "SELECT * FROM pcf_info WHERE code = ? AND date = ?",
-                (code, date),
-            ).fetchone()
-        if row is None:
-            return None
-        return ETFInfo(
-            code=row["code"],
-            name=row["name"] or "",
-            cash_component=row["cash_component"] or 0.0,
-            shares_outstanding=row["shares_outstanding"] or 0,
-            date=datetime.date.fromisoformat(row["date"]),
-        )
+        return _read_info(conn, code, date, as_of)
     finally:
         conn.close()
 
 
-def read_holdings(code: str, date: str | None = None) -> list[Holding] | None:
-    """Read holdings from the database. Uses latest date if date is None."""
+@traced("read_holdings")
+def read_holdings(
+    code: str, date: str | None = None, *, as_of: bool = False
+) -> list[Holding] | None:
+    """Read holdings from the database. Uses latest date if date is None.
+
+    With *as_of*, *date* is an upper bound, as in :func:`read_etf_info`.
+    """
     if not db_exists():
         return None
     try:
@@ -51,37 +148,40 @@ def read_holdings(code: str, date: str | None = None) -> list[Holding] | None:
     except Exception:
         return None
     try:
-        if date is None:
-            latest = conn.execute(
-                "SELECT MAX(date) FROM pcf_holdings WHERE code = ?", (code,)
-            ).fetchone()
-            if latest is None or latest[0] is None:
-                return None
-            date = latest[0]
-        rows = conn.execute(
-            "SELECT * FROM pcf_holdings WHERE code = ? AND date = ? "
-            "ORDER BY weight DESC",
-            (code, date),
-        ).fetchall()
-        if not rows:
-            return None
-        return [
-            Holding(
-                code=r["holding_code"],
-                name=r["name"] or "",
-                isin=r["isin"] or "",
-                exchange=r["exchange"] or "",
-                currency=r["currency"] or "",
-                shares=r["shares"] or 0.0,
-                price=r["price"] or 0.0,
-                weight=r["weight"] or 0.0,
-            )
-            for r in rows
-        ]
+        return _read_holdings(conn, code, date, as_of)
     finally:
         conn.close()
 
 
+@traced("read_etfs", code=False)
+def read_etfs(
+    codes: Iterable[str], date: str | None = None
+) -> dict[str, tuple[ETFInfo, list[Holding]]]:
+    """Read info and holdings for many ETFs over a single connection.
+
+    Codes with no info or no holdings on *date* are left out.
+    """
+    if not db_exists():
+        return {}
+    try:
+        conn = get_connection()
+    except Exception:
+        return {}
+    found: dict[str, tuple[ETFInfo, list[Holding]]] = {}
+    try:
+        for code in codes:
+            if code in found:
+                continue
+            info = _read_info(conn, code, date)
+            holdings = _read_holdings(conn, code, date) if info else None
+            if info is not None and holdings is not None:
+                found[code] = (info, holdings)
+    finally:
+        conn.close()
+    return found
+
+
+@traced("read_etf_fee")
 def read_etf_fee(code: str) -> float | None:
     """Read fee for a single ETF from the etfs table."""
     if not db_exists():
@@ -99,6 +199,7 @@ def read_etf_fee(code: str) -> float | None:
         conn.close()
 
 
+@traced("read_etf_dates")
 def read_etf_dates(code: str) -> list[datetime.date]:
     """Return all available dates for an ETF, newest first."""
     if not db_exists():
@@ -109,14 +210,27 @@ def read_etf_dates(code: str) -> list[datetime.date]:
         return []
     try:
         rows = conn.execute(
-            "SELECT DISTINCT date FROM pcf_info WHERE code = ? ORDER BY date DESC",
+            f"SELECT date FROM pcf_info WHERE etf_id = {_ID} ORDER BY date DESC",
             (code,),
         ).fetchall()
-        return [datetime.date.fromisoformat(r["date"]) for r in rows]
+        return [_from_day(r["date"]) for r in rows]
     finally:
         conn.close()
 
 
+def _etf_list(conn: sqlite3.Connection) -> dict[str, dict]:
+    rows = conn.execute("SELECT * FROM etfs").fetchall()
+    return {
+        r["code"]: {
+            "name_ja": r["name_ja"],
+            "name_en": r["name_en"],
+            "fee": r["fee"],
+        }
+        for r in rows
+    }
+
+
+@traced("read_etf_list", code=False)
 def read_etf_list() -> dict[str, dict]:
     """Return all ETFs with name and fee. ``{code: {name_ja, name_en, fee}}``."""
     if not db_exists():
@@ -126,15 +240,75 @@ def read_etf_list() -> dict[str, dict]:
     except Exception:
         return {}
     try:
-        rows = conn.execute("SELECT * FROM etfs").fetchall()
-        return {
-            r["code"]: {
-                "name_ja": r["name_ja"],
-                "name_en": r["name_en"],
-                "fee": r["fee"],
-            }
-            for r in rows
-        }
+        return _etf_list(conn)
+    finally:
+        conn.close()
+
+
+SEARCH_COLUMNS = ("code", "name", "weight", "shares")
+SERIES_COLUMNS = ("date", "weight", "shares", "price")
+CHANGE_COLUMNS = ("code", "name", "weight", "weight_change")
+RANKING_COLUMNS = ("code", "name", "return", "fee", "dividend_yield")
+AS_OF_COLUMNS = ("etf", "date", "code", "name", "weight", "shares", "price")
+
+
+def _search_rows(
+    conn: sqlite3.Connection, holding_code: str, n: int, date: str | None
+) -> list[tuple]:
+    if date is None:
+        sql = f"""
+            SELECT e.code, t.name_ja, t.name_en,
+                h.weight, h.shares, i.name AS holding_name
+            FROM pcf_holdings h
+            JOIN securities e ON e.id = h.etf_id
+            JOIN instruments i ON i.id = h.instrument_id
+            LEFT JOIN etfs t ON t.code = e.code
+            WHERE h.security_id = {_ID}
+              AND h.date = (
+                  SELECT MAX(h2.date) FROM pcf_holdings h2
+                  WHERE h2.etf_id = h.etf_id AND h2.security_id = h.security_id
+              )
+            ORDER BY h.weight DESC, e.code
+            LIMIT ?
+        """
+        rows = conn.execute(sql, (holding_code, n)).fetchall()
+    else:
+        sql = f"""
+            SELECT e.code, t.name_ja, t.name_en,
+                h.weight, h.shares, i.name AS holding_name
+            FROM pcf_holdings h
+            JOIN securities e ON e.id = h.etf_id
+            JOIN instruments i ON i.id = h.instrument_id
+            LEFT JOIN etfs t ON t.code = e.code
+            WHERE h.security_id = {_ID} AND h.date = ?
+            ORDER BY h.weight DESC, e.code
+            LIMIT ?
+        """
+        rows = conn.execute(sql, (holding_code, _to_day(date), n)).fetchall()
+
+    name_key = "name_ja" if _ja() else "name_en"
+    return [
+        (r["code"], r[name_key] or r["holding_name"] or "", r["weight"], r["shares"])
+        for r in rows
+    ]
+
+
+@traced("search_rows")
+def search_rows(
+    holding_code: str, *, n: int = 10, date: str | None = None
+) -> list[tuple]:
+    """Find ETFs holding a given stock, ranked by weight descending.
+
+    Rows follow ``SEARCH_COLUMNS``.
+    """
+    if not db_exists():
+        return []
+    try:
+        conn = get_connection()
+    except Exception:
+        return []
+    try:
+        return _search_rows(conn, holding_code, n, date)
     finally:
         conn.close()
 
@@ -142,134 +316,221 @@ def read_etf_list() -> dict[str, dict]:
 def search_by_holding(
     holding_code: str, *, n: int = 10, date: str | None = None
 ) -> pd.DataFrame:
-    """Find ETFs holding a given stock, ranked by weight descending."""
+    """:func:`search_rows` as a DataFrame."""
+    import pandas as pd
+
+    rows = search_rows(holding_code, n=n, date=date)
+    with span("dataframe", holding_code) as s:
+        s.rows = len(rows)
+        return pd.DataFrame(rows, columns=list(SEARCH_COLUMNS))
+
+
+def _history_rows(
+    conn: sqlite3.Connection, etf_code: str, holding_code: str | None
+) -> list[tuple]:
+    if holding_code is not None:
+        rows = conn.execute(
+            "SELECT date, weight, shares, price FROM pcf_holdings "
+            f"WHERE etf_id = {_ID} AND security_id = {_ID} ORDER BY date",
+            (etf_code, holding_code),
+        ).fetchall()
+        return [
+            (_from_day(r["date"]).isoformat(), r["weight"], r["shares"], r["price"])
+            for r in rows
+        ]
+
+    earliest, latest = conn.execute(
+        f"SELECT MIN(date), MAX(date) FROM pcf_holdings WHERE etf_id = {_ID}",
+        (etf_code,),
+    ).fetchone()
+    if latest is None:
+        return []
+
+    latest_rows = conn.execute(
+        "SELECT h.security_id, s.code, s.name_ja, i.name, h.weight "
+        "FROM pcf_holdings h "
+        "JOIN securities s ON s.id = h.security_id "
+        "JOIN instruments i ON i.id = h.instrument_id "
+        f"WHERE h.etf_id = {_ID} AND h.date = ? "
+        "ORDER BY h.weight DESC, s.code LIMIT 20",
+        (etf_code, latest),
+    ).fetchall()
+
+    earliest_weights: dict[int, float] = {}
+    if latest_rows and earliest != latest:
+        for r in conn.execute(
+            "SELECT security_id, weight FROM pcf_holdings "
+            f"WHERE etf_id = {_ID} AND date = ?",
+            (etf_code, earliest),
+        ).fetchall():
+            earliest_weights[r["security_id"]] = r["weight"]
+
+    ja = _ja()
+    return [
+        (
+            r["code"],
+            (ja and r["name_ja"]) or r["name"],
+            r["weight"],
+            (
+                r["weight"] - earliest_weights.get(r["security_id"], 0.0)
+                if earliest_weights
+                else 0.0
+            ),
+        )
+        for r in latest_rows
+    ]
+
+
+@traced("history_rows")
+def history_rows(etf_code: str, holding_code: str | None = None) -> list[tuple] | None:
+    """Return weight history for an ETF. None if the DB cannot be read.
+
+    If holding_code given: time series of that stock's weight in the ETF,
+    rows following ``SERIES_COLUMNS``.
+    If None: latest top holdings with weight change from earliest date,
+    rows following ``CHANGE_COLUMNS``.
+    """
     if not db_exists():
-        return pd.DataFrame(columns=["code", "name", "weight", "shares"])
+        return None
     try:
         conn = get_connection()
     except Exception:
-        return pd.DataFrame(columns=["code", "name", "weight", "shares"])
+        return None
     try:
-        if date is None:
-            sql = """
-                SELECT h.code, e.name_ja, e.name_en,
-                    h.weight, h.shares, h.name AS holding_name
-                FROM pcf_holdings h
-                LEFT JOIN etfs e ON h.code = e.code
-                WHERE h.holding_code = ?
-                  AND h.date = (
-                      SELECT MAX(h2.date) FROM pcf_holdings h2
-                      WHERE h2.code = h.code AND h2.holding_code = h.holding_code
-                  )
-                ORDER BY h.weight DESC
-                LIMIT ?
-            """
-            rows = conn.execute(sql, (holding_code, n)).fetchall()
-        else:
-            sql = """
-                SELECT h.code, e.name_ja, e.name_en,
-                    h.weight, h.shares, h.name AS holding_name
-                FROM pcf_holdings h
-                LEFT JOIN etfs e ON h.code = e.code
-                WHERE h.holding_code = ? AND h.date = ?
-                ORDER BY h.weight DESC
-                LIMIT ?
-            """
-            rows = conn.execute(sql, (holding_code, date, n)).fetchall()
-        if not rows:
-            return pd.DataFrame(columns=["code", "name", "weight", "shares"])
-
-        from ..config import config
-
-        name_key = "name_ja" if config.lang == "ja" else "name_en"
-        return pd.DataFrame(
-            [
-                {
-                    "code": r["code"],
-                    "name": r[name_key] or r["holding_name"] or "",
-                    "weight": r["weight"],
-                    "shares": r["shares"],
-                }
-                for r in rows
-            ]
-        )
+        return _history_rows(conn, etf_code, holding_code)
     finally:
         conn.close()
 
 
 def read_history(etf_code: str, holding_code: str | None = None) -> pd.DataFrame:
-    """Return weight history for an ETF.
+    """:func:`history_rows` as a DataFrame (empty, without columns, if no DB)."""
+    import pandas as pd
+
+    rows = history_rows(etf_code, holding_code)
+    if rows is None:
+        return pd.DataFrame()
+    columns = SERIES_COLUMNS if holding_code is not None else CHANGE_COLUMNS
+    with span("dataframe", etf_code) as s:
+        s.rows = len(rows)
+        return pd.DataFrame(rows, columns=list(columns))
+
 
-    If holding_code given: time series of that stock's weight in the ETF.
-    If None: latest top holdings with weight change from earliest date.
+def _ranking_rows(
+    conn: sqlite3.Connection, period: str, n: int, date: str
+) -> list[tuple]:
+    if not _has_table(conn, "etf_metrics"):
+        return []  # a DB built before etf_metrics existed
+    name_key = "name_ja" if _ja() else "name_en"
+    column = f"m.return_{period}"
+    order = "ASC" if n < 0 else "DESC"
+    rows = conn.execute(
+        f"""
+        SELECT s.code, COALESCE(t.{name_key}, '') AS name,
+            {column} AS ret, m.fee, m.dividend_yield
+        FROM etf_metrics m
+        JOIN securities s ON s.id = m.etf_id
+        LEFT JOIN etfs t ON t.code = s.code
+        WHERE m.date = (SELECT MAX(date) FROM etf_metrics WHERE date <= ?)
+          AND {column} IS NOT NULL
+        ORDER BY {column} {order}, s.code
+        LIMIT ?
+        """,
+        (_to_day(date), abs(n) if n else -1),
+    ).fetchall()
+    return [tuple(r) for r in rows]
+
+
+@traced("ranking_rows", code=False)
+def ranking_rows(period: str, n: int, date: str) -> list[tuple]:
+    """Rank ETFs by a stored period return, from the snapshot on or before *date*.
+
+    *period* must be a validated period key (it names a column). Positive
+    *n* is the top N, negative the worst N, 0 all of them. Rows follow
+    ``RANKING_COLUMNS``.
     """
     if not db_exists():
-        return pd.DataFrame()
+        return []
     try:
         conn = get_connection()
     except Exception:
-        return pd.DataFrame()
+        return []
+    try:
+        return _ranking_rows(conn, period, n, date)
+    finally:
+        conn.close()
+
+
+def read_ranking(period: str, n: int, date: str) -> pd.DataFrame:
+    """:func:`ranking_rows` as a DataFrame."""
+    import pandas as pd
+
+    rows = ranking_rows(period, n, date)
+    with span("dataframe") as s:
+        s.rows = len(rows)
+        return pd.DataFrame(rows, columns=list(RANKING_COLUMNS))
+
+
+def _as_of_rows(conn: sqlite3.Connection, date: str) -> list[tuple]:
+    # Each ETF's latest pcf_info date <= *date* comes off the (etf_id, date)
+    # primary key; its holdings are then a range of the pcf_holdings key.
+    rows = conn.execute(
+        """
+        WITH snap AS (
+            SELECT etf_id, MAX(date) AS date FROM pcf_info
+            WHERE date <= ? GROUP BY etf_id
+        )
+        SELECT e.code AS etf, h.date, s.code, s.name_ja, i.name,
+            h.weight, h.shares, h.price
+        FROM snap
+        JOIN pcf_holdings h ON h.etf_id = snap.etf_id AND h.date = snap.date
+        JOIN securities e ON e.id = snap.etf_id
+        JOIN securities s ON s.id = h.security_id
+        JOIN instruments i ON i.id = h.instrument_id
+        ORDER BY e.code, h.weight DESC, s.code
+        """,
+        (_to_day(date),),
+    ).fetchall()
+    # Only a handful of distinct dates, shared by many rows.
+    iso = {day: _from_day(day).isoformat() for day in {r["date"] for r in rows}}
+    ja = _ja()
+    return [
+        (
+            r["etf"],
+            iso[r["date"]],
+            r["code"],
+            (ja and r["name_ja"]) or r["name"],
+            r["weight"],
+            r["shares"],
+            r["price"],
+        )
+        for r in rows
+    ]
+
+
+@traced("as_of_rows")
+def as_of_rows(date: str) -> list[tuple] | None:
+    """Holdings of every ETF from its latest snapshot on or before *date*.
+
+    Rows follow ``AS_OF_COLUMNS``, ordered by ETF then weight descending.
+    None if the DB cannot be read.
+    """
+    if not db_exists():
+        return None
     try:
-        if holding_code is not None:
-            rows = conn.execute(
-                "SELECT date, weight, shares, price FROM pcf_holdings "
-                "WHERE code = ? AND holding_code = ? ORDER BY date",
-                (etf_code, holding_code),
-            ).fetchall()
-            if not rows:
-                return pd.DataFrame(columns=["date", "weight", "shares", "price"])
-            return pd.DataFrame(
-                [
-                    {
-                        "date": r["date"],
-                        "weight": r["weight"],
-                        "shares": r["shares"],
-                        "price": r["price"],
-                    }
-                    for r in rows
-                ]
-            )
-        else:
-            dates = conn.execute(
-                "SELECT DISTINCT date FROM pcf_holdings WHERE code = ? ORDER BY date",
-                (etf_code,),
-            ).fetchall()
-            if not dates:
-                return pd.DataFrame(columns=["code", "name", "weight", "weight_change"])
-            earliest = dates[0]["date"]
-            latest = dates[-1]["date"]
-
-            latest_rows = conn.execute(
-                "SELECT holding_code, name, weight FROM pcf_holdings "
-                "WHERE code = ? AND date = ? ORDER BY weight DESC LIMIT 20",
-                (etf_code, latest),
-            ).fetchall()
-            if not latest_rows:
-                return pd.DataFrame(columns=["code", "name", "weight", "weight_change"])
-
-            earliest_weights: dict[str, float] = {}
-            if earliest != latest:
-                for r in conn.execute(
-                    "SELECT holding_code, weight FROM pcf_holdings "
-                    "WHERE code = ? AND date = ?",
-                    (etf_code, earliest),
-                ).fetchall():
-                    earliest_weights[r["holding_code"]] = r["weight"]
-
-            return pd.DataFrame(
-                [
-                    {
-                        "code": r["holding_code"],
-                        "name": r["name"] or "",
-                        "weight": r["weight"],
-                        "weight_change": (
-                            r["weight"] - earliest_weights.get(r["holding_code"], 0.0)
-                            if earliest_weights
-                            else 0.0
-                        ),
-                    }
-                    for r in latest_rows
-                ]
-            )
+        conn = get_connection()
+    except Exception:
+        return None
+    try:
+        return _as_of_rows(conn, date)
     finally:
         conn.close()
+
+
+def read_as_of(date: str) -> pd.DataFrame:
+    """:func:`as_of_rows` as a DataFrame."""
+    import pandas as pd
+
+    rows = as_of_rows(date) or []
+    with span("dataframe") as s:
+        s.rows = len(rows)
+        return pd.DataFrame(rows, columns=list(AS_OF_COLUMNS))
@@ -3,16 +3,64 @@
 from __future__ import annotations
 
 import sqlite3
+from collections.abc import Iterable, Mapping
+from typing import Any
 
 from ..models import Holding
-from .db_core import _SCHEMA_SQL
+from ._trace import span
+from .db_core import _SCHEMA_SQL, _to_day
+from .db_migrate import migrate
+
+_CHUNK = 500  # stays well below SQLite's host-parameter limit
 
 
 def init_schema(conn: sqlite3.Connection) -> None:
-    """Create tables if they don't exist."""
+    """Create tables if they don't exist, migrating older schemas first."""
+    migrate(conn)
     conn.executescript(_SCHEMA_SQL)
 
 
+def _security_ids(conn: sqlite3.Connection, codes: Iterable[str]) -> dict[str, int]:
+    """Return ``{code: id}``, registering codes not yet in ``securities``."""
+    unique = list(dict.fromkeys(codes))
+    conn.executemany(
+        "INSERT OR IGNORE INTO securities (code) VALUES (?)",
+        [(c,) for c in unique],
+    )
+    ids: dict[str, int] = {}
+    for i in range(0, len(unique), _CHUNK):
+        chunk = unique[i : i + _CHUNK]
+        marks = ",".join("?" * len(chunk))
+        for r in conn.execute(
+            f"SELECT code, id FROM securities WHERE code IN ({marks})", chunk
+        ):
+            ids[r[0]] = r[1]
+    return ids
+
+
+def _instrument_ids(
+    conn: sqlite3.Connection, keys: set[tuple[int, str, str, str, str]]
+) -> dict[tuple[int, str, str, str, str], int]:
+    """Return ``{(security_id, name, isin, exchange, currency): id}``."""
+    conn.executemany(
+        "INSERT OR IGNORE INTO instruments "
+        "(security_id, name, isin, exchange, currency) VALUES (?, ?, ?, ?, ?)",
+        keys,
+    )
+    security_ids = sorted({k[0] for k in keys})
+    ids: dict[tuple[int, str, str, str, str], int] = {}
+    for i in range(0, len(security_ids), _CHUNK):
+        chunk = security_ids[i : i + _CHUNK]
+        marks = ",".join("?" * len(chunk))
+        for r in conn.execute(
+            "SELECT id, security_id, name, isin, exchange, currency "
+            f"FROM instruments WHERE security_id IN ({marks})",
+            chunk,
+        ):
+            ids[(r[1], r[2], r[3], r[4], r[5])] = r[0]
+    return ids
+
+
 def upsert_etf(
     conn: sqlite3.Connection,
     code: str,
@@ -42,11 +90,12 @@ def insert_pcf_info(
     shares_outstanding: int | None = None,
 ) -> None:
     """Insert or replace PCF info for a given ETF and date."""
+    etf_id = _security_ids(conn, [code])[code]
     conn.execute(
         "INSERT OR REPLACE INTO pcf_info "
-        "(code, date, name, cash_component, shares_outstanding) "
+        "(etf_id, date, name, cash_component, shares_outstanding) "
         "VALUES (?, ?, ?, ?, ?)",
-        (code, date, name, cash_component, shares_outstanding),
+        (etf_id, _to_day(date), name, cash_component, shares_outstanding),
     )
 
 
@@ -57,25 +106,57 @@ def insert_holdings(
     holdings: list[Holding],
 ) -> None:
     """Insert holdings for a given ETF and date."""
+    with span("insert_holdings", code) as s:
+        ids = _security_ids(conn, [code, *(h.code for h in holdings)])
+        keys = [
+            (
+                ids[h.code],
+                h.name or "",
+                h.isin or "",
+                h.exchange or "",
+                h.currency or "",
+            )
+            for h in holdings
+        ]
+        instruments = _instrument_ids(conn, set(keys))
+        etf_id = ids[code]
+        day = _to_day(date)
+        conn.executemany(
+            "INSERT OR REPLACE INTO pcf_holdings "
+            "(etf_id, date, security_id, instrument_id, shares, price, weight) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (etf_id, day, key[0], instruments[key], h.shares, h.price, h.weight)
+                for h, key in zip(holdings, keys)
+            ],
+        )
+        s.rows = len(holdings)
+
+
+def insert_metrics(
+    conn: sqlite3.Connection,
+    date: str,
+    metrics: Mapping[str, Mapping[str, Any]],
+    periods: Iterable[str],
+) -> None:
+    """Insert or replace one day's ``{code: {fee, dividend_yield, <period>...}}``."""
+    periods = list(periods)
+    ids = _security_ids(conn, metrics)
+    day = _to_day(date)
+    columns = ", ".join(f"return_{p}" for p in periods)
+    marks = ", ".join("?" * (len(periods) + 4))
     conn.executemany(
-        "INSERT OR REPLACE INTO pcf_holdings "
-        "(code, date, holding_code, name, isin, exchange, currency, "
-        "shares, price, weight) "
-        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        f"INSERT OR REPLACE INTO etf_metrics "
+        f"(date, etf_id, fee, dividend_yield, {columns}) VALUES ({marks})",
         [
             (
-                code,
-                date,
-                h.code,
-                h.name,
-                h.isin,
-                h.exchange,
-                h.currency,
-                h.shares,
-                h.price,
-                h.weight,
+                day,
+                ids[code],
+                m.get("fee"),
+                m.get("dividend_yield"),
+                *(m.get(p) for p in periods),
             )
-            for h in holdings
+            for code, m in metrics.items()
         ],
     )
 
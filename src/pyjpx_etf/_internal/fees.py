@@ -2,71 +2,114 @@
 
 from __future__ import annotations
 
-import io
 import re
+from collections.abc import Iterator
+from itertools import islice
 from pathlib import Path
-
-import pandas as pd
-import requests
+from typing import TYPE_CHECKING
 
 from ..config import _JPX_FEE_URL, config
 from ._cache import TieredCache
+from .cache_store import SQLiteStore
+
+if TYPE_CHECKING:
+    import lxml.html
 
 
 def _fetch_fee_html() -> str:
     """Fetch the JPX ETF fee page and return raw HTML."""
+    import requests
+
     resp = requests.get(_JPX_FEE_URL, timeout=config.timeout)
     resp.raise_for_status()
     resp.encoding = resp.apparent_encoding
     return resp.text
 
 
-def _parse_fee_string(s: str) -> float | None:
-    """Extract the first decimal number from a fee string.
+# The first percentage in a fee cell: "0.048%", "0.06%（注10）", "0.06％".
+_FEE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*[%％]")
 
-    Handles: "0.048%", "0.06%（注10）", full-width ％, etc.
-    Returns the numeric value (e.g. 0.06) or None if unparseable.
-    """
-    if not isinstance(s, str):
+# Header cells are looked for in the first few rows of each table only.
+_HEADER_ROWS = 3
+
+
+def _span(cell: lxml.html.HtmlElement, attr: str) -> int:
+    try:
+        return max(int(cell.get(attr, 1)), 1)
+    except ValueError:
+        return 1
+
+
+def _table_rows(table: lxml.html.HtmlElement) -> Iterator[list[str]]:
+    """Yield each row's cell texts, with colspan/rowspan cells repeated."""
+    carried: dict[int, tuple[int, str]] = {}  # column -> (rows left, text)
+    for tr in table.xpath("./tr | ./thead/tr | ./tbody/tr | ./tfoot/tr"):
+        cells = iter(tr.xpath("./th | ./td"))
+        row: list[str] = []
+        while True:
+            col = len(row)
+            if col in carried:
+                left, text = carried.pop(col)
+                if left > 1:
+                    carried[col] = (left - 1, text)
+                row.append(text)
+                continue
+            cell = next(cells, None)
+            if cell is None:
+                break
+            text = cell.text_content()
+            rowspan = _span(cell, "rowspan")
+            for _ in range(_span(cell, "colspan")):
+                if rowspan > 1:
+                    carried[len(row)] = (rowspan - 1, text)
+                row.append(text)
+        yield row
+
+
+def _fee_columns(row: list[str]) -> tuple[int, int] | None:
+    """Return the (code, fee) column indices if *row* is a fee-table header."""
+    code_col = fee_col = None
+    for i, text in enumerate(row):
+        # Normalize whitespace to handle "信託 報酬" vs "信託報酬"
+        norm = "".join(text.split())
+        if code_col is None and norm == "コード":
+            code_col = i
+        if "信託報酬" in norm:
+            fee_col = i
+    if code_col is None or fee_col is None:
         return None
-    # Normalize full-width characters
-    s = s.replace("％", "%")
-    match = re.search(r"(\d+(?:\.\d+)?)\s*%", s)
-    if match:
-        return float(match.group(1))
-    return None
+    return code_col, fee_col
 
 
 def _parse_fee_html(html: str) -> dict[str, float]:
-    """Parse JPX ETF fee page HTML into ``{code: fee}``."""
-    tables = pd.read_html(io.StringIO(html))
-    fees: dict[str, float] = {}
-    for df in tables:
-        # Find tables that have both コード and 信託報酬 columns
-        # Normalize whitespace to handle "信託 報酬" vs "信託報酬"
-        code_col = None
-        fee_col = None
-        for col in df.columns:
-            col_norm = "".join(str(col).split())
-            if code_col is None and col_norm == "コード":
-                code_col = col
-            if "信託報酬" in col_norm:
-                fee_col = col
-        if code_col is None or fee_col is None:
+    """Parse JPX ETF fee page HTML into ``{code: fee}``.
+
+    Only tables with both コード and 信託報酬 header cells are read, and
+    only those two columns are kept.
+    """
+    import lxml.html
+
+    codes: list[str] = []
+    fee_texts: list[str] = []
+    for table in lxml.html.fromstring(html).iter("table"):
+        rows = _table_rows(table)
+        for row in islice(rows, _HEADER_ROWS):
+            columns = _fee_columns(row)
+            if columns is not None:
+                break
+        else:
             continue
-        for _, row in df.iterrows():
-            code = str(row[code_col]).strip()
-            # pandas may coerce 4-digit codes to int — normalize
-            if code.endswith(".0"):
-                code = code[:-2]
-            if not code or code == "nan":
-                continue
-            # Accept numeric codes (e.g. "1306") and alphanumeric (e.g. "200A")
-            if not code.isalnum():
-                continue
-            fee = _parse_fee_string(str(row[fee_col]))
-            if fee is not None:
-                fees[code] = fee
+        code_col, fee_col = columns
+        for row in rows:
+            if len(row) > max(code_col, fee_col):
+                codes.append(row[code_col].strip())
+                fee_texts.append(row[fee_col])
+
+    fees: dict[str, float] = {}
+    for code, match in zip(codes, map(_FEE_RE.search, fee_texts)):
+        # Accept numeric codes (e.g. "1306") and alphanumeric (e.g. "200A")
+        if match is not None and code.isalnum():
+            fees[code] = float(match.group(1))
     return fees
 
 
@@ -75,10 +118,12 @@ def _fetch_and_parse() -> dict[str, float]:
 
 
 _cache = TieredCache(
-    disk_path=Path.home() / ".cache" / "pyjpx-etf" / "fees.json",
+    disk_path=Path.home() / ".cache" / "pyjpx-etf" / "cache.db",
     ttl=7 * 24 * 3600,
+    soft_ttl=24 * 3600,
     key="fees",
     fetcher=_fetch_and_parse,
+    store=SQLiteStore("fees", legacy="fees.json"),
 )
 
 _reset_cache = _cache.reset
@@ -92,3 +137,11 @@ def get_fees(*, refresh: bool = False) -> dict[str, float]:
     Returns an empty dict if the fetch or parse fails (graceful degradation).
     """
     return _cache.get(refresh=refresh)
+
+
+def get_fee(code: str) -> float | None:
+    """Return the JPX fee for one *code*, or None.
+
+    Reads just that row from the disk cache when the fees aren't in memory.
+    """
+    return _cache.lookup(code)
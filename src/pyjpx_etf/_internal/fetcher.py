@@ -3,11 +3,12 @@
 from __future__ import annotations
 
 import time
-
-import requests
+from typing import Any
+from urllib.parse import urlsplit
 
 from ..config import config
 from ..exceptions import ETFNotFoundError, FetchError
+from ._trace import span
 
 
 def _looks_like_csv(text: str) -> bool:
@@ -22,6 +23,17 @@ def fetch_pcf(code: str) -> str:
     Raises ETFNotFoundError if all providers return 404.
     Raises FetchError on network or HTTP errors.
     """
+    with span("fetch_pcf", code) as s:
+        response, url = _fetch_pcf(code)
+        s.provider = urlsplit(url).hostname
+        s.bytes = len(response.content)
+    return response.text
+
+
+def _fetch_pcf(code: str) -> tuple[Any, str]:
+    """Return the first CSV response and the URL it came from."""
+    import requests
+
     errors: list[Exception] = []
 
     for i, url_template in enumerate(config.provider_urls):
@@ -37,7 +49,7 @@ def fetch_pcf(code: str) -> str:
 
         if response.status_code == 200:
             if _looks_like_csv(response.text):
-                return response.text
+                return response, url
             errors.append(FetchError(f"Non-CSV response from {url}"))
             continue
 
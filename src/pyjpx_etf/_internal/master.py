@@ -2,39 +2,46 @@
 
 from __future__ import annotations
 
-import io
 from pathlib import Path
 
-import pandas as pd
-import requests
-
 from ..config import _JPX_MASTER_URL, config
 from ._cache import TieredCache
+from .cache_store import SQLiteStore
 
 
 def _fetch_master_xls() -> bytes:
     """Fetch the JPX master XLS and return raw bytes."""
+    import requests
+
     resp = requests.get(_JPX_MASTER_URL, timeout=config.timeout)
     resp.raise_for_status()
     return resp.content
 
 
+def _cell_text(value: object) -> str:
+    """Return a cell as text; xlrd reads numeric codes as floats (1306.0)."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
 def _parse_master_xls(content: bytes) -> dict[str, str]:
     """Parse JPX master XLS bytes into ``{code: japanese_name}``."""
-    # xlrd is required for .xls format (see pyproject.toml)
-    df = pd.read_excel(
-        io.BytesIO(content),
-        header=None,
-        dtype=str,
-    )
-    # Column 1 = security code (4-digit string), column 2 = Japanese name
-    lookup: dict[str, str] = {}
-    for _, row in df.iterrows():
-        code = str(row.iloc[1]).strip()
-        name = str(row.iloc[2]).strip()
-        if code and name and code != "nan" and name != "nan":
-            lookup[code] = name
-    return lookup
+    import xlrd
+
+    book = xlrd.open_workbook(file_contents=content, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        # Column 1 = security code (4-digit string), column 2 = Japanese name
+        codes = sheet.col_values(1)
+        names = sheet.col_values(2)
+    finally:
+        book.release_resources()
+    return {
+        code: name
+        for code, name in zip(map(_cell_text, codes), map(_cell_text, names))
+        if code and name
+    }
 
 
 def _fetch_and_parse() -> dict[str, str]:
@@ -42,10 +49,12 @@ def _fetch_and_parse() -> dict[str, str]:
 
 
 _cache = TieredCache(
-    disk_path=Path.home() / ".cache" / "pyjpx-etf" / "master.json",
+    disk_path=Path.home() / ".cache" / "pyjpx-etf" / "cache.db",
     ttl=7 * 24 * 3600,
+    soft_ttl=24 * 3600,
     key="names",
     fetcher=_fetch_and_parse,
+    store=SQLiteStore("names", legacy="master.json"),
 )
 
 _reset_cache = _cache.reset
@@ -8,6 +8,7 @@ import io
 
 from ..exceptions import ParseError
 from ..models import ETFInfo, Holding
+from ._trace import span
 
 
 def _split_sections(text: str) -> tuple[str, str]:
@@ -48,9 +49,12 @@ def parse_pcf(csv_text: str) -> tuple[ETFInfo, list[Holding]]:
       Section 1 (header + 1 row): ETF metadata
       Section 2 (header + N rows): constituent holdings
     """
-    info_text, holdings_text = _split_sections(csv_text)
-    info = _parse_info_section(info_text)
-    holdings = _parse_holdings_section(holdings_text)
+    with span("parse_pcf") as s:
+        info_text, holdings_text = _split_sections(csv_text)
+        info = _parse_info_section(info_text)
+        holdings = _parse_holdings_section(holdings_text)
+        s.code = info.code
+        s.rows = len(holdings)
     return info, holdings
 
 
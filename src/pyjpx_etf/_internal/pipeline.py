@@ -93,6 +93,37 @@ def _store_fees(conn) -> None:
         )
 
 
+def _store_metrics(conn, today: str) -> None:
+    """Store today's Rakuten fee, yield and returns in ``etf_metrics``.
+
+    The fee falls back to JPX's, as in ``ranking()``. Skipped if the
+    refresh in :func:`_store_fees` failed: the cache would then hand out an
+    older copy, which must not be recorded under *today*.
+    """
+    from .fees import get_fees
+    from .rakuten import PERIOD_COLUMNS, get_rakuten_data
+    from .rakuten import _cache as rakuten_cache
+
+    status = rakuten_cache.status()
+    if status.stale or status.failures:
+        logger.warning(
+            "Rakuten data not refreshed (%s); no metrics stored for %s",
+            status.last_error,
+            today,
+        )
+        return
+    rakuten = get_rakuten_data()
+    jpx_fees = get_fees()
+    metrics = {
+        code: {
+            **entry,
+            "fee": entry["fee"] if entry.get("fee") is not None else jpx_fees.get(code),
+        }
+        for code, entry in rakuten.items()
+    }
+    db.insert_metrics(conn, today, metrics, PERIOD_COLUMNS)
+
+
 def _store_master_names(conn) -> None:
     """Fetch Japanese names from master list and store in DB."""
     from .master import get_japanese_names
@@ -152,9 +183,10 @@ def run_pipeline(
         conn.commit()
         logger.info("PCF fetch complete: %d success, %d failed", success, failed)
 
-        # 3. Fetch fees
+        # 3. Fetch fees and store the day's return/fee/yield snapshot
         logger.info("Fetching fees...")
         _store_fees(conn)
+        _store_metrics(conn, today)
         conn.commit()
 
         # 4. Fetch master names
@@ -164,7 +196,7 @@ def run_pipeline(
 
         # 5. Update meta
         now = datetime.datetime.now(datetime.timezone.utc).isoformat()
-        db.update_meta(conn, "version", "1")
+        db.update_meta(conn, "version", str(db.SCHEMA_VERSION))
         db.update_meta(conn, "updated_at", now)
         conn.commit()
 
@@ -4,6 +4,8 @@ from __future__ import annotations
 
 import argparse
 import logging
+import shutil
+import tempfile
 from pathlib import Path
 
 from .pipeline import run_pipeline
@@ -30,6 +32,31 @@ def main() -> None:
         default=None,
         help="Save unparseable CSV files to this directory for debugging",
     )
+    parser.add_argument(
+        "--artifacts",
+        type=Path,
+        default=None,
+        help="Write the compressed DB, daily patch and manifest.json for release "
+        "to this directory (an existing manifest.json there is extended)",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        nargs="?",
+        const=Path("pcf-pipeline.prof"),
+        metavar="PATH",
+        help="Write cProfile stats (default: pcf-pipeline.prof) and print the "
+        "top calls by cumulative time",
+    )
+    parser.add_argument(
+        "--memprofile",
+        type=Path,
+        nargs="?",
+        const=Path("pcf-pipeline-mem"),
+        metavar="DIR",
+        help="Save tracemalloc snapshots after the first parse, insert, ... "
+        "(default: pcf-pipeline-mem/) and print a memory summary",
+    )
     args = parser.parse_args()
 
     logging.basicConfig(
@@ -41,7 +68,29 @@ def main() -> None:
 
     config.request_delay = args.delay
 
-    run_pipeline(args.db, debug_dir=args.debug_dir)
+    from .profiling import profiled
+
+    with profiled(args.profile, args.memprofile):
+        _run(args)
+
+
+def _run(args: argparse.Namespace) -> None:
+    if args.artifacts is None:
+        run_pipeline(args.db, debug_dir=args.debug_dir)
+        return
+
+    from .release import write_artifacts
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the pre-run DB so today's rows can be published as a patch.
+        base = Path(tmp) / "base.db"
+        if args.db.is_file():
+            shutil.copyfile(args.db, base)
+
+        run_pipeline(args.db, debug_dir=args.debug_dir)
+
+        for path in write_artifacts(args.db, args.artifacts, base=base):
+            logging.info("Wrote %s", path)
 
 
 if __name__ == "__main__":
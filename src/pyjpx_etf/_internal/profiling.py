@@ -0,0 +1,193 @@
+"""``--profile`` / ``--memprofile`` for the ``etf`` and ``pcf-pipeline`` CLIs.
+
+:func:`profiled` runs a block under cProfile, writes a pstats file and prints
+the slowest calls by cumulative time. With a memory profile, tracemalloc runs
+as well and the stage boundaries are the events sent to ``config.on_event``:
+a snapshot is saved when the first ``parse_pcf``, ``insert_holdings``,
+``dataframe``, ... finishes, and one more at the end.
+
+Reports go to stderr so ``--format json|csv`` output stays clean.
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+from ..config import config
+
+if TYPE_CHECKING:
+    from ..events import Event
+
+TOP = 25  # rows in the cumulative-time summary
+TOP_ALLOCATIONS = 10
+
+
+def pop_profile(
+    argv: list[str], name: str
+) -> tuple[Path | None, Path | None, list[str]]:
+    """Split ``--profile[=PATH]`` and ``--memprofile[=DIR]`` off *argv*.
+
+    The value must be attached with ``=``: the ``etf`` CLI's positional
+    arguments are ETF codes and subcommands, which a separate value would
+    swallow. Without one they default to ``<name>.prof`` and
+    ``<name>-mem``. Returns the pstats path, the snapshot directory
+    (``None`` if not requested) and the remaining arguments.
+    """
+    profile = memprofile = None
+    rest: list[str] = []
+    for arg in argv:
+        option, eq, value = arg.partition("=")
+        if option == "--profile":
+            profile = Path(value if eq else f"{name}.prof")
+        elif option == "--memprofile":
+            memprofile = Path(value if eq else f"{name}-mem")
+        else:
+            rest.append(arg)
+    return profile, memprofile, rest
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1e6:,.2f}"
+
+
+class _MemProfile:
+    """``on_event`` hook recording traced memory at each stage boundary."""
+
+    def __init__(self, directory: Path, hook: Callable[[Event], None] | None):
+        self.directory = directory
+        self.hook = hook
+        self.prof: Any = None  # paused while snapshotting
+        self.final: Any = None
+        self.peak = 0
+        # operation -> [calls, MB after the last call, max MB after a call]
+        self.stages: dict[str, list[int]] = {}
+
+    def __call__(self, event: Event) -> None:
+        import tracemalloc
+
+        current = tracemalloc.get_traced_memory()[0]
+        stage = self.stages.get(event.operation)
+        if stage is None:
+            self.stages[event.operation] = [1, current, current]
+            self._dump(f"{len(self.stages):02d}-{event.operation}")
+        else:
+            stage[0] += 1
+            stage[1] = current
+            stage[2] = max(stage[2], current)
+        if self.hook is not None:
+            self.hook(event)
+
+    def _dump(self, name: str) -> Any:
+        import tracemalloc
+
+        if self.prof is not None:
+            self.prof.disable()
+        snapshot = tracemalloc.take_snapshot()
+        snapshot.dump(str(self.directory / f"{name}.snap"))
+        if self.prof is not None:
+            self.prof.enable()
+        return snapshot
+
+    def stop(self) -> None:
+        import tracemalloc
+
+        self.prof = None
+        self.final = self._dump("final")
+        self.peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    def report(self, out: IO[str]) -> None:
+        import tracemalloc
+
+        from .cli_fmt import format_table
+
+        print(f"\n Memory (tracemalloc): peak {_mb(self.peak)} MB", file=out)
+        if self.stages:
+            names = list(self.stages)
+            stats = list(self.stages.values())
+            columns = [
+                names,
+                [f"{calls:,}" for calls, _, _ in stats],
+                [_mb(last) for _, last, _ in stats],
+                [_mb(high) for _, _, high in stats],
+            ]
+            header = ["Stage", "Calls", "MB after last", "Max MB"]
+            print(f"\n{format_table(header, columns, align='<>>>')}", file=out)
+
+        # Leave out the profilers' own bookkeeping.
+        filters = [tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+        for name in ("tracemalloc", "cProfile", "profile"):
+            module = sys.modules.get(name)
+            if module is not None and module.__file__:
+                filters.append(tracemalloc.Filter(False, module.__file__))
+        final = self.final.filter_traces(filters)
+        top = final.statistics("lineno")[:TOP_ALLOCATIONS]
+        if top:
+            columns = [
+                [str(s.traceback[0]) for s in top],
+                [_mb(s.size) for s in top],
+                [f"{s.count:,}" for s in top],
+            ]
+            header = ["Live at exit", "MB", "Blocks"]
+            print(f"\n{format_table(header, columns, align='<>>')}", file=out)
+        print(f"\n Snapshots written to {self.directory}/", file=out)
+
+
+def _report_profile(prof: Any, path: Path, top: int, out: IO[str]) -> None:
+    import pstats
+
+    prof.dump_stats(path)
+    print(f"\n Top {top} by cumulative time:", file=out)
+    pstats.Stats(prof, stream=out).strip_dirs().sort_stats("cumulative").print_stats(
+        top
+    )
+    print(f" Profile written to {path} (python -m pstats {path})", file=out)
+
+
+@contextmanager
+def profiled(
+    profile: Path | None = None,
+    memprofile: Path | None = None,
+    *,
+    top: int = TOP,
+    out: IO[str] | None = None,
+) -> Iterator[None]:
+    """Profile the ``with`` block; a no-op if both paths are ``None``.
+
+    *profile* is where the pstats file goes; *memprofile* is a directory for
+    tracemalloc snapshots. Reports are written even if the block raises or
+    exits. tracemalloc slows everything down, so profile time and memory in
+    separate runs when the timings matter.
+    """
+    out = sys.stderr if out is None else out
+    mem = prof = None
+    if memprofile is not None:
+        import tracemalloc
+
+        memprofile.mkdir(parents=True, exist_ok=True)
+        mem = _MemProfile(memprofile, config.on_event)
+        config.on_event = mem
+        tracemalloc.start()
+    if profile is not None:
+        import cProfile
+
+        prof = cProfile.Profile()
+        if mem is not None:
+            mem.prof = prof
+        prof.enable()
+    try:
+        yield
+    finally:
+        if prof is not None:
+            prof.disable()
+        if mem is not None:
+            config.on_event = mem.hook
+            mem.stop()
+        if prof is not None:
+            _report_profile(prof, profile, top, out)
+        if mem is not None:
+            mem.report(out)
@@ -6,10 +6,9 @@ import csv
 import io
 from pathlib import Path
 
-import requests
-
 from ..config import _RAKUTEN_URL, config
 from ._cache import TieredCache
+from .cache_store import SQLiteStore
 
 # Column indices (headerless CSV)
 _COL_TICKER = 0  # e.g. "1306.T"
@@ -42,6 +41,8 @@ PERIOD_COLUMNS: dict[str, int] = {
 
 def _fetch_rakuten_csv() -> str:
     """Fetch the Rakuten ETF CSV and return raw text."""
+    import requests
+
     resp = requests.get(_RAKUTEN_URL, timeout=config.timeout)
     resp.raise_for_status()
     resp.encoding = "utf-8-sig"
@@ -101,10 +102,12 @@ def _fetch_and_parse() -> dict[str, dict]:
 
 
 _cache = TieredCache(
-    disk_path=Path.home() / ".cache" / "pyjpx-etf" / "rakuten.json",
+    disk_path=Path.home() / ".cache" / "pyjpx-etf" / "cache.db",
     ttl=24 * 3600,
+    soft_ttl=6 * 3600,
     key="rakuten",
     fetcher=_fetch_and_parse,
+    store=SQLiteStore("rakuten", legacy="rakuten.json"),
 )
 
 _reset_cache = _cache.reset
@@ -118,3 +121,11 @@ def get_rakuten_data(*, refresh: bool = False) -> dict[str, dict]:
     Returns an empty dict if the fetch or parse fails (graceful degradation).
     """
     return _cache.get(refresh=refresh)
+
+
+def get_rakuten_entry(code: str) -> dict | None:
+    """Return the Rakuten entry for one *code*, or None.
+
+    Reads just that row from the disk cache when the data isn't in memory.
+    """
+    return _cache.lookup(code)
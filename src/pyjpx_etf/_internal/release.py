@@ -0,0 +1,194 @@
+"""Release artifacts for the daily DB: compressed copy, patches, manifest and
+the schema v1 export for older library releases."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import lzma
+import re
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from ..config import _DB_ASSET
+from .db_core import SCHEMA_VERSION
+from .db_patch import MAX_PATCHES, build_patch
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = 1
+
+# Library releases before schema v2 (0.5.x) download this asset and read it
+# as-is, so it keeps the v1 layout; see export_v1().
+V1_ASSET = "pcf.db"
+
+# The v1 layout as 0.5.x created it. Frozen: it must not follow _SCHEMA_SQL.
+_V1_SCHEMA_SQL = """\
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE etfs (code TEXT PRIMARY KEY, name_ja TEXT, name_en TEXT, fee REAL);
+CREATE TABLE pcf_info (
+    code               TEXT NOT NULL,
+    date               TEXT NOT NULL,
+    name               TEXT,
+    cash_component     REAL,
+    shares_outstanding INTEGER,
+    PRIMARY KEY (code, date)
+);
+CREATE TABLE pcf_holdings (
+    code         TEXT NOT NULL,
+    date         TEXT NOT NULL,
+    holding_code TEXT NOT NULL,
+    name         TEXT,
+    isin         TEXT,
+    exchange     TEXT,
+    currency     TEXT,
+    shares       REAL,
+    price        REAL,
+    weight       REAL,
+    PRIMARY KEY (code, date, holding_code)
+);
+CREATE INDEX idx_holdings_stock ON pcf_holdings(holding_code);
+CREATE TABLE securities (code TEXT PRIMARY KEY, name_ja TEXT, name_en TEXT);
+"""
+
+# The reverse of db_migrate's v1 -> v2 copy: day numbers back to ISO dates,
+# interned instruments back onto each row ('' back to NULL).
+_V2_TO_V1_SQL = """\
+INSERT INTO meta SELECT key, value FROM v2.meta WHERE key <> 'version';
+INSERT INTO meta VALUES ('version', '1');
+INSERT INTO etfs SELECT code, name_ja, name_en, fee FROM v2.etfs;
+INSERT INTO securities
+SELECT code, name_ja, name_en FROM v2.securities
+WHERE name_ja IS NOT NULL OR name_en IS NOT NULL;
+INSERT INTO pcf_info
+SELECT s.code, date(p.date * 86400, 'unixepoch'),
+    p.name, p.cash_component, p.shares_outstanding
+FROM v2.pcf_info p JOIN v2.securities s ON s.id = p.etf_id;
+INSERT INTO pcf_holdings
+SELECT e.code, date(h.date * 86400, 'unixepoch'), s.code,
+    NULLIF(i.name, ''), NULLIF(i.isin, ''), NULLIF(i.exchange, ''),
+    NULLIF(i.currency, ''), h.shares, h.price, h.weight
+FROM v2.pcf_holdings h
+JOIN v2.securities e ON e.id = h.etf_id
+JOIN v2.securities s ON s.id = h.security_id
+JOIN v2.instruments i ON i.id = h.instrument_id;
+"""
+
+_BLOCK_SIZE = 1024 * 1024
+
+
+def _read_updated_at(db_path: Path) -> str | None:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'updated_at'").fetchone()
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def _compress(src_path: Path, xz_path: Path) -> tuple[int, str]:
+    """xz-compress *src_path*. Returns the uncompressed size and SHA-256."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(src_path, "rb") as src, lzma.open(xz_path, "wb") as dst:
+        for block in iter(lambda: src.read(_BLOCK_SIZE), b""):
+            digest.update(block)
+            size += len(block)
+            dst.write(block)
+    return size, digest.hexdigest()
+
+
+def export_v1(db_path: Path, dest: Path) -> None:
+    """Write the DB at *db_path* to *dest* in the schema v1 layout."""
+    tmp = dest.with_name(f".{dest.name}.tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(_V1_SCHEMA_SQL)
+        conn.execute("ATTACH DATABASE ? AS v2", (f"file:{db_path}?mode=ro",))
+        conn.executescript(f"BEGIN;\n{_V2_TO_V1_SQL}COMMIT;")
+        conn.execute("DETACH DATABASE v2")
+    finally:
+        conn.close()
+    tmp.replace(dest)
+
+
+def _previous_patches(manifest_path: Path) -> list[dict[str, Any]]:
+    """Return the patch entries of an earlier manifest on the same schema."""
+    try:
+        previous = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    if previous.get("schema_version") != SCHEMA_VERSION:
+        return []
+    return list(previous.get("patches", []))
+
+
+def write_artifacts(
+    db_path: Path, out_dir: Path, *, base: Path | None = None
+) -> list[Path]:
+    """Write ``<asset>.xz``, a daily patch, the v1 export and ``manifest.json``
+    into *out_dir*.
+
+    The manifest records the SHA-256 of the uncompressed DB so that ``sync``
+    can verify the file it reconstructs, whichever artifact it downloaded.
+
+    If *base* is the database as it was before this pipeline run, the rows
+    added since are written as an xz-compressed patch and appended to the
+    patch list of the ``manifest.json`` already in *out_dir* (the previous
+    release's), keeping the last ``MAX_PATCHES``. Without a patch the chain
+    is broken, so older patches are dropped.
+
+    Returns the written paths; upload the manifest last.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    updated_at = _read_updated_at(db_path)
+    manifest_path = out_dir / MANIFEST_NAME
+
+    xz_path = out_dir / f"{_DB_ASSET}.xz"
+    size, sha256 = _compress(db_path, xz_path)
+    export_v1(db_path, out_dir / V1_ASSET)
+    written = [xz_path, out_dir / V1_ASSET]
+
+    patches: list[dict[str, Any]] = []
+    base_updated_at = _read_updated_at(base) if base and base.is_file() else None
+    if base_updated_at and updated_at and base_updated_at != updated_at:
+        with tempfile.TemporaryDirectory() as tmp:
+            raw = Path(tmp) / "patch.db"
+            if build_patch(db_path, base, raw):
+                stamp = re.sub(r"[^0-9T]", "", updated_at[:19])
+                patch_path = out_dir / f"{Path(_DB_ASSET).stem}-patch-{stamp}.db.xz"
+                patch_size, patch_sha256 = _compress(raw, patch_path)
+                patches = _previous_patches(manifest_path)
+                patches.append(
+                    {
+                        "name": patch_path.name,
+                        "base": base_updated_at,
+                        "updated_at": updated_at,
+                        "size": patch_size,
+                        "sha256": patch_sha256,
+                    }
+                )
+                patches = patches[-MAX_PATCHES:]
+                written.append(patch_path)
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "schema_version": SCHEMA_VERSION,
+        "updated_at": updated_at,
+        "db": {"name": _DB_ASSET, "size": size, "sha256": sha256},
+        "artifacts": [
+            {
+                "name": xz_path.name,
+                "compression": "xz",
+                "size": xz_path.stat().st_size,
+            }
+        ],
+        "patches": patches,
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    written.append(manifest_path)
+    return written
@@ -0,0 +1,434 @@
+"""Local HTTP JSON server over pcf.db (``etf serve``).
+
+One process keeps everything a request needs warm: a pool of read-only
+SQLite connections, the etfs table in memory, and the encoded response of
+every query already answered. All of it belongs to one :class:`_Generation`,
+i.e. one pcf.db file. ``sync`` installs a new DB by atomically replacing the
+file, which shows as a new inode; the next request then starts a new
+generation, while requests already running finish on the old one.
+
+Japanese names are read from ``securities.name_ja`` with the rows, so the
+JPX master list is never loaded.
+
+Endpoints (GET, JSON):
+
+    /health
+    /etf/<code>[?n=&date=]
+    /search/<stock_code>[?n=&date=]
+    /history/<etf_code>[/<stock_code>]
+    /ranking[?period=&n=&date=]
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import queue
+import sqlite3
+import statistics
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from . import db_read
+from .db_core import _from_day
+from .rakuten import PERIOD_COLUMNS
+
+# Idle connections kept per generation; more are opened under load.
+_POOL_SIZE = 8
+# Encoded responses cached per generation.
+_CACHE_SIZE = 4096
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _stamp(path: Path) -> tuple[int, int, int]:
+    st = os.stat(path)
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class _Generation:
+    """Connections and cached data for one pcf.db file."""
+
+    def __init__(self, path: Path, stamp: tuple[int, int, int]) -> None:
+        self.path = path
+        self.stamp = stamp
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._retired = False
+        self._lock = threading.Lock()
+        self._etfs: dict[str, dict] | None = None
+        self._responses: OrderedDict[tuple, bytes] = OrderedDict()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if self._retired or self._idle.qsize() >= _POOL_SIZE:
+                conn.close()
+            else:
+                self._idle.put(conn)
+
+    def retire(self) -> None:
+        """Close idle connections; busy ones are closed when released."""
+        self._retired = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def etfs(self, conn: sqlite3.Connection) -> dict[str, dict]:
+        if self._etfs is None:
+            self._etfs = db_read._etf_list(conn)
+        return self._etfs
+
+    def cached(self, key: tuple, build: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            body = self._responses.get(key)
+            if body is not None:
+                self._responses.move_to_end(key)
+                return body
+        body = build()  # concurrent misses may build twice; the result is the same
+        with self._lock:
+            self._responses[key] = body
+            if len(self._responses) > _CACHE_SIZE:
+                self._responses.popitem(last=False)
+        return body
+
+
+def _encode(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False).encode()
+
+
+def _records(columns: tuple[str, ...], rows: list[tuple]) -> list[dict[str, Any]]:
+    # NaN (from the Rakuten ranking) is not valid JSON.
+    return [
+        dict(zip(columns, [None if v != v else v for v in row], strict=True))
+        for row in rows
+    ]
+
+
+def _int(params: dict[str, list[str]], name: str, default: int) -> int:
+    try:
+        return int(params[name][-1]) if name in params else default
+    except ValueError:
+        raise _HTTPError(400, f"{name} must be an integer") from None
+
+
+def _date(params: dict[str, list[str]]) -> str | None:
+    if "date" not in params:
+        return None
+    value = params["date"][-1]
+    try:
+        datetime.date.fromisoformat(value)
+    except ValueError:
+        raise _HTTPError(400, "date must be YYYY-MM-DD") from None
+    return value
+
+
+class QueryServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering queries from the DB at *db_path*."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], db_path: Path) -> None:
+        super().__init__(address, _Handler)
+        self.db_path = db_path
+        self.verbose = False
+        self._generation = _Generation(db_path, _stamp(db_path))
+        self._swap = threading.Lock()
+        # /ranking without a date: responses for the Rakuten frame they
+        # were built from, dropped when ranking() starts using a newer one.
+        self._live_lock = threading.Lock()
+        self._live_frame: Any = None
+        self._live_responses: OrderedDict[tuple, bytes] = OrderedDict()
+
+    def generation(self) -> _Generation:
+        """Return the generation for the current pcf.db, starting one if the
+        file was replaced since the last request."""
+        gen = self._generation
+        try:
+            stamp = _stamp(self.db_path)
+        except OSError:
+            return gen  # mid-replace or removed: keep serving what we have
+        if stamp != gen.stamp:
+            with self._swap:
+                if self._generation.stamp != stamp:
+                    old = self._generation
+                    self._generation = _Generation(self.db_path, stamp)
+                    old.retire()
+                gen = self._generation
+        return gen
+
+    # -- endpoints ---------------------------------------------------------
+
+    def route(self, url: str) -> bytes:
+        parts = urlsplit(url)
+        path = [p for p in parts.path.split("/") if p]
+        params = parse_qs(parts.query)
+        gen = self.generation()
+        if path == ["health"]:
+            return self._health(gen)
+        if len(path) == 2 and path[0] == "etf":
+            n, date = _int(params, "n", 0), _date(params)
+            key = ("etf", path[1], n, date)
+            return gen.cached(key, lambda: self._etf(gen, path[1], n, date))
+        if len(path) == 2 and path[0] == "search":
+            n, date = _int(params, "n", 10), _date(params)
+            key = ("search", path[1], n, date)
+            return gen.cached(key, lambda: self._search(gen, path[1], n, date))
+        if len(path) in (2, 3) and path[0] == "history":
+            stock = path[2] if len(path) == 3 else None
+            key = ("history", path[1], stock)
+            return gen.cached(key, lambda: self._history(gen, path[1], stock))
+        if path == ["ranking"]:
+            return self._ranking(gen, params)
+        raise _HTTPError(404, f"no such endpoint: {parts.path}")
+
+    def _health(self, gen: _Generation) -> bytes:
+        with gen.connection() as conn:
+            row = conn.execute(
+                "SELECT value FROM meta WHERE key = 'updated_at'"
+            ).fetchone()
+        return _encode({"db": str(gen.path), "updated_at": row[0] if row else None})
+
+    def _etf(self, gen: _Generation, code: str, n: int, date: str | None) -> bytes:
+        with gen.connection() as conn:
+            info = db_read._read_info(conn, code, date)
+            holdings = db_read._read_holdings(conn, code, date) if info else None
+            fee = gen.etfs(conn).get(code, {}).get("fee")
+        if info is None or holdings is None:
+            raise _HTTPError(404, f"ETF {code} not found in the local database")
+        nav = round(info.cash_component + sum(h.shares * h.price for h in holdings))
+        return _encode(
+            {
+                **info.to_dict(),
+                "date": info.date.isoformat(),
+                "nav": nav,
+                "fee": fee,
+                "holdings": [h.to_dict() for h in holdings[: n or None]],
+            }
+        )
+
+    def _search(self, gen: _Generation, code: str, n: int, date: str | None) -> bytes:
+        with gen.connection() as conn:
+            rows = db_read._search_rows(conn, code, n, date)
+        return _encode(_records(db_read.SEARCH_COLUMNS, rows))
+
+    def _history(self, gen: _Generation, code: str, stock: str | None) -> bytes:
+        with gen.connection() as conn:
+            rows = db_read._history_rows(conn, code, stock)
+        columns = db_read.SERIES_COLUMNS if stock else db_read.CHANGE_COLUMNS
+        return _encode(_records(columns, rows))
+
+    def _ranking(self, gen: _Generation, params: dict[str, list[str]]) -> bytes:
+        period = params.get("period", ["1m"])[-1]
+        if period not in PERIOD_COLUMNS:
+            raise _HTTPError(400, f"period must be one of {tuple(PERIOD_COLUMNS)}")
+        n, date = _int(params, "n", 10), _date(params)
+        if date is None:
+            return self._live_ranking(period, n)
+
+        def build() -> bytes:
+            with gen.connection() as conn:
+                rows = db_read._ranking_rows(conn, period, n, date)
+            return _encode(_records(db_read.RANKING_COLUMNS, rows))
+
+        return gen.cached(("ranking", period, n, date), build)
+
+    def _live_ranking(self, period: str, n: int) -> bytes:
+        """Rank like ``ranking()`` and ``etf rank``: from the cached Rakuten data.
+
+        The response is reused until that data is refreshed.
+        """
+        from ..ranking import _rakuten_frame, ranking
+
+        frame = _rakuten_frame()
+        key = (period, n)
+        with self._live_lock:
+            if self._live_frame is not frame:
+                self._live_frame = frame
+                self._live_responses.clear()
+            body = self._live_responses.get(key)
+        if body is not None:
+            return body
+        rows = list(ranking(period, n).itertuples(index=False, name=None))
+        body = _encode(_records(db_read.RANKING_COLUMNS, rows))
+        with self._live_lock:
+            if self._live_frame is frame:
+                self._live_responses[key] = body
+                if len(self._live_responses) > _CACHE_SIZE:
+                    self._live_responses.popitem(last=False)
+        return body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: QueryServer
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # Headers and body go out in two writes; with Nagle on, the body waits
+    # for the client's delayed ACK (~40 ms) on a kept-alive connection.
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:  # noqa: N802
+        try:
+            status, body = 200, self.server.route(self.path)
+        except _HTTPError as e:
+            status, body = e.status, _encode({"error": str(e)})
+        except Exception as e:  # a bad request must not take the server down
+            status, body = 500, _encode({"error": f"{type(e).__name__}: {e}"})
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+# -- benchmark -------------------------------------------------------------
+
+
+def _workload(db_path: Path, size: int) -> list[str]:
+    """Return *size* request paths spread over all endpoints, from real codes."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        etfs = [r[0] for r in conn.execute("SELECT code FROM etfs ORDER BY code")]
+        stocks = [
+            r[0]
+            for r in conn.execute(
+                "SELECT s.code FROM pcf_holdings h "
+                "JOIN securities s ON s.id = h.security_id "
+                "GROUP BY h.security_id ORDER BY COUNT(*) DESC LIMIT 200"
+            )
+        ]
+        # Stored rankings only (with a date, periods that have returns): the
+        # live ranking would go to the network.
+        periods: list[str] = []
+        if db_read._has_table(conn, "etf_metrics"):
+            latest = conn.execute("SELECT MAX(date) FROM etf_metrics").fetchone()[0]
+            periods = [
+                p
+                for p in PERIOD_COLUMNS
+                if conn.execute(
+                    f"SELECT 1 FROM etf_metrics WHERE return_{p} IS NOT NULL LIMIT 1"
+                ).fetchone()
+            ]
+    finally:
+        conn.close()
+    if not etfs or not stocks:
+        raise ValueError(f"{db_path} has no ETFs to query")
+    paths = []
+    for i in range(size):
+        etf, stock = etfs[i % len(etfs)], stocks[i % len(stocks)]
+        kind = i % 10
+        if kind < 5:
+            paths.append(f"/etf/{etf}?n=10")
+        elif kind < 7:
+            paths.append(f"/search/{stock}")
+        elif kind < 9 or not periods:
+            paths.append(f"/history/{etf}/{stock}")
+        else:
+            period = periods[i % len(periods)]
+            paths.append(f"/ranking?period={period}&date={_from_day(latest)}")
+    return paths
+
+
+def _percentile(sorted_ms: list[float], q: int) -> float:
+    if len(sorted_ms) == 1:
+        return sorted_ms[0]
+    return statistics.quantiles(sorted_ms, n=100, method="inclusive")[q - 1]
+
+
+def bench(
+    db_path: Path, *, requests: int = 5000, concurrency: int = 8
+) -> dict[str, Any]:
+    """Serve *db_path* on a free local port and time *requests* GETs.
+
+    Client threads each keep one connection open. A first pass over the
+    workload warms the caches; the timed pass is the second one. Returns
+    throughput (req/s) for both passes and latency percentiles (ms) overall
+    and per endpoint.
+    """
+    server = QueryServer(("127.0.0.1", 0), db_path)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    port = server.server_address[1]
+    paths = _workload(db_path, requests)
+
+    def run(chunk: list[str], out: list[tuple[str, float]]) -> None:
+        conn = HTTPConnection("127.0.0.1", port)
+        try:
+            for path in chunk:
+                t0 = time.perf_counter()
+                conn.request("GET", path)
+                resp = conn.getresponse()
+                resp.read()
+                out.append((path, (time.perf_counter() - t0) * 1000))
+        finally:
+            conn.close()
+
+    def timed_pass() -> tuple[float, list[tuple[str, float]]]:
+        results: list[list[tuple[str, float]]] = [[] for _ in range(concurrency)]
+        threads = [
+            threading.Thread(target=run, args=(paths[i::concurrency], results[i]))
+            for i in range(concurrency)
+        ]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - t0, [r for rs in results for r in rs]
+
+    try:
+        cold_elapsed, _ = timed_pass()
+        elapsed, samples = timed_pass()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    def summary(latencies: list[float]) -> dict[str, float]:
+        latencies = sorted(latencies)
+        return {
+            "requests": len(latencies),
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+        }
+
+    by_endpoint: dict[str, list[float]] = {}
+    for path, ms in samples:
+        by_endpoint.setdefault(path.split("/")[1].split("?")[0], []).append(ms)
+    return {
+        "concurrency": concurrency,
+        "cold_rps": len(samples) / cold_elapsed,
+        "rps": len(samples) / elapsed,
+        "total": summary([ms for _, ms in samples]),
+        "endpoints": {name: summary(ms) for name, ms in sorted(by_endpoint.items())},
+    }
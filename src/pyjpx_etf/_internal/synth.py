@@ -0,0 +1,192 @@
+"""Synthetic pcf.db and PCF data for benchmarks (``etf bench``).
+
+Writes the real schema directly, shaped like the pipeline output: each ETF
+holds a fixed basket drawn from a universe of listed codes, with skewed
+weights that drift and prices that random-walk from one business day to
+the next, plus a daily ``etf_metrics`` row. Everything derives from *seed*,
+so two builds with the same arguments hold the same data.
+"""
+
+from __future__ import annotations
+
+import datetime
+import random
+import sqlite3
+from pathlib import Path
+
+from .db_core import _SCHEMA_SQL, SCHEMA_VERSION, _to_day
+from .rakuten import PERIOD_COLUMNS
+
+_WORDS = ("NIPPON", "TOKYO", "OSAKA", "SANWA", "CHUO", "TOYO", "DAIWA", "FUJI")
+_TRADES = ("ELECTRIC", "MOTOR", "STEEL", "HOLDINGS", "CHEMICAL", "BANK", "FOODS")
+
+
+def business_days(n: int, end: datetime.date | None = None) -> list[str]:
+    """Return the *n* weekdays up to *end* (default today), oldest first."""
+    day = end or datetime.date.today()
+    days: list[str] = []
+    while len(days) < n:
+        if day.weekday() < 5:
+            days.append(day.isoformat())
+        day -= datetime.timedelta(days=1)
+    return days[::-1]
+
+
+def etf_codes(n: int) -> list[str]:
+    return [str(1300 + i) for i in range(n)]
+
+
+def stock_codes(n: int) -> list[str]:
+    """Listed-company codes, disjoint from :func:`etf_codes`."""
+    return [str(5000 + i) if i < 5000 else f"{i - 5000:03d}A" for i in range(n)]
+
+
+def _name(rng: random.Random, code: str) -> str:
+    return f"{rng.choice(_WORDS)} {rng.choice(_TRADES)} CO LTD {code}"
+
+
+class _Basket:
+    """One ETF's holdings, advanced a business day at a time."""
+
+    def __init__(self, rng: random.Random, members: list[str]) -> None:
+        self.rng = rng
+        self.members = sorted(members)
+        # Pareto-distributed sizes: a few large holdings, a long tail.
+        self.size = [rng.paretovariate(1.2) for _ in self.members]
+        self.shares = [float(rng.randrange(100, 5_000_000, 100)) for _ in members]
+        self.price = [round(rng.uniform(100, 20_000), 1) for _ in members]
+
+    def step(self) -> None:
+        rand = self.rng.random
+        self.size = [s * (0.99 + 0.02 * rand()) for s in self.size]
+        self.price = [p * (0.985 + 0.03 * rand()) for p in self.price]
+
+    def weights(self) -> list[float]:
+        total = sum(self.size)
+        return [s / total for s in self.size]
+
+
+def build_db(
+    path: Path,
+    *,
+    etfs: int = 100,
+    holdings: int = 500,
+    days: int = 60,
+    seed: int = 42,
+    end: datetime.date | None = None,
+) -> None:
+    """Write a synthetic schema v2 pcf.db to *path* (replacing any file there).
+
+    *etfs* ETFs each hold *holdings* stocks on each of the last *days*
+    business days up to *end* (default today). For example, 400 x 2,000 x
+    1,250 is five years of a large market.
+    """
+    rng = random.Random(seed)
+    etf_list = etf_codes(etfs)
+    universe = stock_codes(max(4000, holdings * 6 // 5))
+    dates = business_days(days, end)
+
+    path.unlink(missing_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA cache_size = -262144")  # 256 MiB
+        conn.executescript(_SCHEMA_SQL)
+        # Bulk-load first, index afterwards.
+        conn.execute("DROP INDEX idx_holdings_security")
+
+        codes = etf_list + universe
+        conn.executemany(
+            "INSERT INTO securities (id, code, name_ja, name_en) VALUES (?, ?, ?, ?)",
+            [(i, c, f"銘柄{c}", _name(rng, c)) for i, c in enumerate(codes, start=1)],
+        )
+        ids = {c: i for i, c in enumerate(codes, start=1)}
+        # One instrument per stock; ids match the security ids.
+        conn.execute(
+            "INSERT INTO instruments (id, security_id, name, isin, exchange, currency) "
+            "SELECT id, id, UPPER(name_en), 'JP3' || printf('%09d', id), 'TSE', 'JPY' "
+            "FROM securities"
+        )
+        fees = {c: round(rng.uniform(0.05, 1), 3) for c in etf_list}
+        conn.executemany(
+            "INSERT INTO etfs (code, name_ja, name_en, fee) VALUES (?, ?, ?, ?)",
+            [(c, f"ETF{c}連動型上場投資信託", f"ETF {c}", fees[c]) for c in etf_list],
+        )
+
+        day_nums = [_to_day(d) for d in dates]
+        for code in etf_list:
+            etf_id = ids[code]
+            basket = _Basket(rng, rng.sample(universe, min(holdings, len(universe))))
+            members = [ids[m] for m in basket.members]
+            info = []
+            for i, day in enumerate(day_nums):
+                if i:
+                    basket.step()
+                cash = rng.uniform(-1e8, 1e9)
+                info.append((etf_id, day, f"ETF {code}", cash, 10_000_000))
+                conn.executemany(
+                    "INSERT INTO pcf_holdings "
+                    "(etf_id, date, security_id, instrument_id, shares, price, weight) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    zip(
+                        [etf_id] * len(members),
+                        [day] * len(members),
+                        members,
+                        members,
+                        basket.shares,
+                        basket.price,
+                        basket.weights(),
+                        strict=True,
+                    ),
+                )
+            conn.executemany("INSERT INTO pcf_info VALUES (?, ?, ?, ?, ?)", info)
+
+        periods = list(PERIOD_COLUMNS)
+        columns = ", ".join(f"return_{p}" for p in periods)
+        marks = ", ".join("?" * (len(periods) + 4))
+        conn.executemany(
+            f"INSERT INTO etf_metrics (date, etf_id, fee, dividend_yield, {columns}) "
+            f"VALUES ({marks})",
+            (
+                (
+                    day,
+                    ids[code],
+                    fees[code],
+                    round(rng.uniform(0, 5), 2),
+                    *(round(rng.gauss(0, 10), 2) for _ in periods),
+                )
+                for day in day_nums
+                for code in etf_list
+            ),
+        )
+        conn.execute("CREATE INDEX idx_holdings_security ON pcf_holdings(security_id)")
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [
+                ("version", str(SCHEMA_VERSION)),
+                ("updated_at", f"{dates[-1]}T07:00:00+09:00"),
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def pcf_csv(code: str, holdings: int, *, seed: int = 42) -> str:
+    """Return a PCF CSV (the ICE / Solactive layout) with *holdings* rows."""
+    rng = random.Random(seed)
+    basket = _Basket(rng, stock_codes(max(holdings, 1))[:holdings])
+    lines = [
+        "ETF Code,ETF Name,Fund Cash Component,Shares Outstanding,Fund Date",
+        f"{code},ETF {code},{rng.uniform(1e8, 1e9):.1f},10000000,20260302",
+        "",
+        "Code,Name,ISIN,Exchange,Currency,Shares Amount,Stock Price",
+    ]
+    lines.extend(
+        f"{m},{_name(rng, m)},JP3{i:09d},TSE,JPY,{s},{p}"
+        for i, (m, s, p) in enumerate(
+            zip(basket.members, basket.shares, basket.price, strict=True)
+        )
+    )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,42 @@
+"""Point-in-time holdings of every ETF."""
+
+from __future__ import annotations
+
+import datetime
+from typing import TYPE_CHECKING
+
+from ._internal.db import read_as_of
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def as_of(date: str | datetime.date) -> pd.DataFrame:
+    """Return every ETF's holdings from its latest snapshot on or before *date*.
+
+    One query over the local database, for backtests that need the
+    portfolios as they were known on a given day.
+
+    Parameters
+    ----------
+    date : str | datetime.date
+        The day (YYYY-MM-DD). ETFs with no snapshot on or before it are left
+        out.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns: ``etf``, ``date`` (of that ETF's snapshot), ``code``,
+        ``name``, ``weight``, ``shares``, ``price``. Sorted by ETF, then
+        weight descending.
+
+    Raises
+    ------
+    DatabaseError
+        If the local database does not exist. Run ``etf sync`` first.
+    """
+    from .etf import _require_db
+
+    day = datetime.date.fromisoformat(str(date)).isoformat()
+    _require_db()
+    return read_as_of(day)
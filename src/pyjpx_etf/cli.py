@@ -1,4 +1,4 @@
-"""CLI entry point: etf <code> | etf rank | etf sync | etf search | etf history"""
+"""CLI entry point: etf <code ...> | rank | sync | search | history | serve | bench"""
 
 from __future__ import annotations
 
@@ -12,13 +12,28 @@ def _print_help() -> None:
 pyjpx-etf {__version__}
 
 Usage:
-  etf <code|alias> [--en] [-a] [--live]  Show ETF portfolio composition
-  etf rank [n] [period] [--en]           Rank ETFs by return
-  etf sync [--force]                     Download/update PCF database
-  etf find <stock_code> [n] [--en]       Find ETFs holding a stock
-  etf history <etf_code> [stock] [--en]  Weight history
-  etf --version                          Show version
-  etf --help                             Show this help
+  etf <code|alias> ... [--en] [-a] [--live]  Show ETF portfolio composition
+  etf - [--en] [-a] [--live]                 Same, codes read from stdin
+  etf rank [n] [period] [--en]               Rank ETFs by return (Rakuten data)
+  etf sync [--force]                         Download/update PCF database
+  etf find <stock_code> [n] [--en]           Find ETFs holding a stock
+  etf history <etf_code> [stock] [--en]      Weight history
+  etf serve [--host H] [--port P] [--en]     Local JSON query server
+  etf serve --bench [-n N] [-c C]            Benchmark the query server
+  etf bench [--etfs N] [--holdings N] [--days N] [-o FILE] [--compare FILE]
+                                             Benchmark suite on a synthetic DB
+  etf --version                              Show version
+  etf --help                                 Show this help
+
+Output:
+  --format table|json|csv  Table (default), NDJSON or CSV rows
+                           (etf, rank, find and history)
+
+Profiling (any command):
+  --profile[=PATH]         Write cProfile stats (default etf.prof) and
+                           print the top calls by cumulative time
+  --memprofile[=DIR]       Save tracemalloc snapshots at each stage
+                           (default etf-mem/) and print a memory summary
 
 Aliases:
   topix, 225, core30, div50, div70, pbr, sox, jpsox1, jpsox2
@@ -35,11 +50,33 @@ Examples:
   etf sync                Download latest PCF database
   etf find 6857            ETFs holding Advantest
   etf find 7203 5          Top 5 ETFs holding Toyota
-  etf history 1306 6857   Advantest weight in TOPIX ETF over time""")
+  etf history 1306 6857   Advantest weight in TOPIX ETF over time
+  etf serve --port 8080   Serve /etf/1306, /search/6857, ... as JSON
+  etf bench -o new.json --compare old.json
+                          Time this version against a saved run
+  etf history 1306 --profile
+                          Profile a slow command; attach etf.prof to a bug report
+
+Batch:
+  etf 1306 1321 --format csv
+      Top 10 holdings of both ETFs as CSV
+  etf - -a --format json < codes.txt
+      All holdings of every ETF listed in codes.txt, one JSON object per line""")
 
 
 def main() -> None:
     argv = sys.argv[1:]
+    if any(a.startswith(("--profile", "--memprofile")) for a in argv):
+        from ._internal.profiling import pop_profile, profiled
+
+        profile, memprofile, argv = pop_profile(argv, "etf")
+        with profiled(profile, memprofile):
+            _run(argv)
+    else:
+        _run(argv)
+
+
+def _run(argv: list[str]) -> None:
     if not argv or (argv[0] in ("-h", "--help")):
         _print_help()
         return
@@ -49,17 +86,32 @@ def main() -> None:
         print(f"pyjpx-etf {__version__}")
         return
 
-    from ._internal.cli_db import main_history, main_search, main_sync
-    from ._internal.cli_rank import main_rank
-    from ._internal.cli_show import main_etf
-
+    # Each handler imports only what its command needs.
     if argv[0] == "rank":
+        from ._internal.cli_rank import main_rank
+
         main_rank(argv[1:])
     elif argv[0] == "sync":
+        from ._internal.cli_db import main_sync
+
         main_sync(argv[1:])
     elif argv[0] in ("find", "search"):
+        from ._internal.cli_db import main_search
+
         main_search(argv[1:])
     elif argv[0] == "history":
+        from ._internal.cli_db import main_history
+
         main_history(argv[1:])
+    elif argv[0] == "serve":
+        from ._internal.cli_serve import main_serve
+
+        main_serve(argv[1:])
+    elif argv[0] == "bench":
+        from ._internal.cli_bench import main_bench
+
+        main_bench(argv[1:])
     else:
+        from ._internal.cli_show import main_etf
+
         main_etf(argv)
@@ -2,8 +2,13 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .events import Event
 
 _ICE_URL = "https://inav.ice.com/pcf-download/{code}.csv"
 _SOLACTIVE_URL = (
@@ -19,9 +24,13 @@ _JPX_FEE_URL = "https://www.jpx.co.jp/equities/products/etfs/issues/01.html"
 
 _RAKUTEN_URL = "https://www.rakuten-sec.co.jp/web/market/search/etf_search/ETFD.csv"
 
-_DB_RELEASE_URL = (
-    "https://github.com/obichan117/pyjpx-etf/releases/download/db-latest/pcf.db"
-)
+_DB_RELEASE_BASE = "https://github.com/obichan117/pyjpx-etf/releases/download/db-latest"
+# The asset name carries the schema version so that older library releases,
+# which expect the v1 layout at pcf.db, are not handed a DB they can't read.
+# The pipeline keeps publishing a v1 export there (release.export_v1).
+_DB_ASSET = "pcf-v2.db"
+_DB_RELEASE_URL = f"{_DB_RELEASE_BASE}/{_DB_ASSET}"
+_DB_MANIFEST_URL = f"{_DB_RELEASE_BASE}/manifest.json"
 
 _ALIASES: dict[str, str] = {
     "topix": "1306",
@@ -44,10 +53,19 @@ class Config:
 
     timeout: int = 30
     request_delay: float = 0.0
+    download_workers: int = 1
+    lock_timeout: float = 300.0
     provider_urls: list[str] = field(
         default_factory=lambda: [_ICE_URL, _SOLACTIVE_URL, _SP_GLOBAL_URL]
     )
     db_path: Path | None = field(default=None, repr=False)
+    background_sync: bool = False
+    on_db_refresh: Callable[[Path], None] | None = field(default=None, repr=False)
+    background_refresh: bool = False
+    on_cache_refresh: Callable[[str, Exception | None], None] | None = field(
+        default=None, repr=False
+    )
+    on_event: Callable[[Event], None] | None = field(default=None, repr=False)
     _lang: str = field(default="ja", repr=False)
 
     @property
@@ -2,20 +2,27 @@
 
 from __future__ import annotations
 
+import datetime
+import threading
 import warnings
+from collections.abc import Iterable
 from dataclasses import replace
-
-import pandas as pd
+from typing import TYPE_CHECKING
 
 from ._internal import db
-from ._internal.fees import get_fees
+from ._internal._trace import span
+from ._internal.fees import get_fee
 from ._internal.fetcher import fetch_pcf
 from ._internal.master import get_japanese_names
 from ._internal.parser import parse_pcf
-from ._internal.rakuten import get_rakuten_data
+from ._internal.rakuten import get_rakuten_entry
 from .config import config
+from .exceptions import DatabaseError, ETFNotFoundError
 from .models import ETFInfo, Holding
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 def _resolve_japanese_names(
     info: ETFInfo, holdings: list[Holding]
@@ -56,27 +63,67 @@ def _resolve_japanese_names(
 
 _UNSET = object()  # sentinel: "not loaded yet" vs "loaded but None"
 _db_checked = False  # has auto-sync been attempted this session?
+_db_lock = threading.Lock()  # makes concurrent first calls wait for the sync
+_sync_thread: threading.Thread | None = None  # background sync, if running
 
 
-def _ensure_db() -> None:
-    """Auto-sync the DB if missing or stale (> 1 day). Runs once per session."""
-    global _db_checked  # noqa: PLW0603
-    if _db_checked:
-        return
-    _db_checked = True
-
-    from .sync import sync
+def _sync_db(*, quiet: bool = False) -> None:
+    """Run sync() and call ``config.on_db_refresh`` if a newer DB was installed."""
+    from .sync import _local_updated_at, sync
 
+    path = db.db_path()
+    before = _local_updated_at(path) if path.is_file() else None
     try:
-        sync()
+        sync(quiet=quiet)
     except Exception:
-        pass  # graceful — fall through to live fetch
+        return  # graceful — fall through to the current DB or live fetch
+    if config.on_db_refresh is not None and path.is_file():
+        if _local_updated_at(path) != before:
+            config.on_db_refresh(path)
+
+
+def _ensure_db() -> None:
+    """Auto-sync the DB if missing or stale (> 1 day). Runs once per session.
+
+    With ``config.background_sync``, an existing DB on the current schema is
+    used as-is while the sync runs in a background thread; a missing DB or
+    one on an older schema (which queries could not read) blocks.
+    """
+    global _db_checked, _sync_thread  # noqa: PLW0603
+    if _db_checked:
+        return
+    with _db_lock:
+        if _db_checked:
+            return
+        try:
+            if config.background_sync and db.is_current_schema(db.db_path()):
+                _sync_thread = threading.Thread(
+                    target=_sync_db,
+                    kwargs={"quiet": True},
+                    name="pyjpx-etf-sync",
+                    daemon=True,
+                )
+                _sync_thread.start()
+            elif not db.is_fresh(db.db_path()):
+                # sync() would return at once for a fresh DB; checking here
+                # spares the CLI importing the download code.
+                _sync_db()
+        finally:
+            _db_checked = True
+
+
+def _require_db() -> None:
+    """Auto-sync as needed; raise DatabaseError if there is still no DB."""
+    _ensure_db()
+    if not db.db_exists():
+        raise DatabaseError("Local database not found. Check your network connection.")
 
 
 class ETF:
     """Fetch and access JPX ETF portfolio composition data.
 
-    Data is lazy-loaded from PCF providers on first property access.
+    Data is lazy-loaded from PCF providers on first property access. An
+    instance may be shared between threads; it is loaded only once.
 
     Usage::
 
@@ -86,51 +133,100 @@ class ETF:
         e.info.name          # "TOPIX連動型上場投資信託"
         e.holdings[:5]       # first 5 holdings
         e.to_dataframe()     # pandas DataFrame
+
+    With *date*, the snapshot of that day is read from the local database;
+    with *as_of*, the latest snapshot on or before that day. Either raises
+    ``ETFNotFoundError`` on first access if there is no such snapshot.
     """
 
-    def __init__(self, code: str, *, live: bool = False) -> None:
+    def __init__(
+        self,
+        code: str,
+        *,
+        live: bool = False,
+        date: str | datetime.date | None = None,
+        as_of: str | datetime.date | None = None,
+    ) -> None:
+        if date is not None and as_of is not None:
+            raise ValueError("pass date or as_of, not both")
+        day = date if as_of is None else as_of
+        if day is not None:
+            if live:
+                raise ValueError("live=True fetches today's PCF; drop date/as_of")
+            day = datetime.date.fromisoformat(str(day)).isoformat()
         self._code = str(code)
         self._live = live
+        self._date: str | None = day
+        self._as_of = as_of is not None
         self._info: ETFInfo | None = None
         self._holdings: list[Holding] | None = None
         self._fee: float | None | object = _UNSET
+        self._lock = threading.Lock()
 
     def _load(self) -> None:
-        # Auto-sync DB (once per day, silent when fresh)
-        if not self._live:
-            _ensure_db()
-
-        # DB-first: read from local DB when available, live fallback
-        if not self._live and db.db_exists():
-            info = db.read_etf_info(self._code)
-            holdings = db.read_holdings(self._code)
-            if info is not None and holdings is not None:
-                if config.lang == "ja":
-                    info, holdings = _resolve_japanese_names(info, holdings)
-                self._info = info
-                self._holdings = holdings
-                return
-
-        # Live fetch (when DB unavailable or live=True)
-        csv_text = fetch_pcf(self._code)
-        info, holdings = parse_pcf(csv_text)
-
-        if config.lang == "ja":
-            info, holdings = _resolve_japanese_names(info, holdings)
-
-        self._info = info
+        if self._date is not None:
+            self._load_snapshot(self._date)
+            return
+        with span("etf_load", self._code) as s:
+            # Auto-sync DB (once per day, silent when fresh)
+            if not self._live:
+                _ensure_db()
+
+            # DB-first: read from local DB when available, live fallback
+            if not self._live and db.db_exists():
+                info = db.read_etf_info(self._code)
+                holdings = db.read_holdings(self._code)
+                if info is not None and holdings is not None:
+                    s.provider, s.rows = "db", len(holdings)
+                    self._set_data(info, holdings)
+                    return
+
+            # Live fetch (when DB unavailable or live=True). DB reads come
+            # with Japanese names already; a PCF only has English ones.
+            s.provider = "live"
+            info, holdings = parse_pcf(fetch_pcf(self._code))
+            if config.lang == "ja":
+                info, holdings = _resolve_japanese_names(info, holdings)
+            s.rows = len(holdings)
+            self._set_data(info, holdings)
+
+    def _load_snapshot(self, date: str) -> None:
+        with span("etf_load", self._code) as s:
+            _require_db()
+            s.provider = "db"
+            info = db.read_etf_info(self._code, date, as_of=self._as_of)
+            holdings = None
+            if info is not None:
+                # The holdings of the snapshot found, not a later <= match.
+                holdings = db.read_holdings(self._code, info.date.isoformat())
+            if info is None or holdings is None:
+                when = "on or before" if self._as_of else "on"
+                raise ETFNotFoundError(
+                    f"ETF {self._code}: no snapshot {when} {date} in the local database"
+                )
+            s.rows = len(holdings)
+            self._set_data(info, holdings)
+
+    def _set_data(self, info: ETFInfo, holdings: list[Holding]) -> None:
+        # holdings first: readers check _info without the lock
         self._holdings = holdings
+        self._info = info
+
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            if self._info is None or self._holdings is None:
+                self._load()
 
     @property
     def info(self) -> ETFInfo:
         if self._info is None:
-            self._load()
+            self._ensure_loaded()
         return self._info  # type: ignore[return-value]
 
     @property
     def holdings(self) -> list[Holding]:
         if self._holdings is None:
-            self._load()
+            self._ensure_loaded()
         return self._holdings  # type: ignore[return-value]
 
     @property
@@ -146,11 +242,9 @@ class ETF:
             if not self._live and db.db_exists():
                 fee = db.read_etf_fee(self._code)
             if fee is None:
-                fees = get_fees()
-                fee = fees.get(self._code)
+                fee = get_fee(self._code)
             if fee is None:
-                rakuten = get_rakuten_data()
-                entry = rakuten.get(self._code)
+                entry = get_rakuten_entry(self._code)
                 if entry is not None:
                     fee = entry.get("fee")
             self._fee = fee
@@ -168,7 +262,12 @@ class ETF:
 
     def to_dataframe(self) -> pd.DataFrame:
         """Return holdings as a pandas DataFrame."""
-        return pd.DataFrame([h.to_dict() for h in self.holdings])
+        import pandas as pd
+
+        holdings = self.holdings
+        with span("dataframe", self._code) as s:
+            s.rows = len(holdings)
+            return pd.DataFrame([h.to_dict() for h in holdings])
 
     def top(self, n: int = 10) -> pd.DataFrame:
         """Return top N holdings by weight with code, name, and weight (%)."""
@@ -182,4 +281,29 @@ class ETF:
     def __repr__(self) -> str:
         if self._live:
             return f"ETF('{self._code}', live=True)"
+        if self._date is not None:
+            key = "as_of" if self._as_of else "date"
+            return f"ETF('{self._code}', {key}='{self._date}')"
         return f"ETF('{self._code}')"
+
+
+def _load_many(codes: Iterable[str], *, live: bool = False) -> list[ETF]:
+    """Return an ETF per code, with those in the local DB read in one pass.
+
+    Codes missing from the DB load (live) on first access, as usual.
+    """
+    etfs = [ETF(code, live=live) for code in codes]
+    if live:
+        return etfs
+    _ensure_db()
+    if not db.db_exists():
+        return etfs
+    loaded = db.read_etfs(e._code for e in etfs)
+    fees = db.read_etf_list()
+    for e in etfs:
+        if e._code in loaded:
+            e._set_data(*loaded[e._code])
+        fee = fees.get(e._code, {}).get("fee")
+        if fee is not None:
+            e._fee = fee
+    return etfs
@@ -0,0 +1,55 @@
+"""Timing events for instrumentation hooks (``config.on_event``)."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Event:
+    """One timed operation inside the library, passed to ``config.on_event``.
+
+    Fields that do not apply to an operation are ``None``.
+
+    Attributes
+    ----------
+    operation : str
+        What ran: ``fetch_pcf``, ``parse_pcf``, ``etf_load``, a ``db_read``
+        function (``read_holdings``, ``search_rows``, ...), ``dataframe``
+        (building a DataFrame from rows), ``insert_holdings``, ``cache_get``,
+        ``cache_lookup``, ``cache_fetch``, ``sync`` or ``download``.
+    start : float
+        Wall-clock start time (``time.time()``).
+    duration : float
+        Elapsed seconds, from a monotonic clock.
+    code : str | None
+        The ETF or stock code, the dataset of a cache event (``fees``,
+        ``names``, ``rakuten``) or the file of a download.
+    provider : str | None
+        Where the data came from: the host that served a fetch or download,
+        ``db`` or ``live`` for ``etf_load``, ``patch`` or ``download`` for
+        ``sync``.
+    bytes : int | None
+        Bytes received over the network.
+    rows : int | None
+        Rows, holdings or entries returned.
+    cache : str | None
+        ``hit`` (served from a cache or an unchanged DB), ``miss`` (fetched)
+        or ``stale`` (served past its TTL because fetching failed).
+    error : str | None
+        ``"ExceptionType: message"`` if the operation raised.
+    """
+
+    operation: str
+    start: float
+    duration: float
+    code: str | None = None
+    provider: str | None = None
+    bytes: int | None = None
+    rows: int | None = None
+    cache: str | None = None
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
@@ -19,3 +19,7 @@ class ParseError(PyJPXETFError):
 
 class DatabaseError(PyJPXETFError):
     """Raised when the local database is missing or corrupted."""
+
+
+class StaleDataWarning(UserWarning):
+    """Warned when a fetch fails and older cached data is served instead."""
@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
-import pandas as pd
+from typing import TYPE_CHECKING
 
 from ._internal.db import read_history
-from .exceptions import DatabaseError
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def history(etf_code: str, holding_code: str | None = None) -> pd.DataFrame:
@@ -30,10 +32,7 @@ def history(etf_code: str, holding_code: str | None = None) -> pd.DataFrame:
     DatabaseError
         If the local database does not exist. Run ``etf sync`` first.
     """
-    from ._internal.db import db_exists
-    from .etf import _ensure_db
+    from .etf import _require_db
 
-    _ensure_db()
-    if not db_exists():
-        raise DatabaseError("Local database not found. Check your network connection.")
+    _require_db()
     return read_history(etf_code, holding_code)
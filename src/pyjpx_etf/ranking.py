@@ -2,16 +2,64 @@
 
 from __future__ import annotations
 
+import datetime
+from collections.abc import Mapping, Sequence
+
+import numpy as np
 import pandas as pd
 
+from ._internal.db import read_ranking
 from ._internal.fees import get_fees
 from ._internal.rakuten import PERIOD_COLUMNS, get_rakuten_data
 from .config import config
 
 _VALID_PERIODS = tuple(PERIOD_COLUMNS.keys())
 
+_COLUMNS = ["code", "name", "return", "fee", "dividend_yield"]
+
+# Columns a ranking_table() score may weight, besides the periods.
+_SCORE_COLUMNS = ("fee", "dividend_yield")
+
+# (rakuten dict, fees dict, frame): the frame built from those exact objects.
+# TieredCache hands out the same dicts until it refreshes, so holding them
+# (not just their ids) makes identity a safe cache key.
+_frame_cache: tuple[dict, dict, pd.DataFrame] | None = None
+
 
-def ranking(period: str = "1m", n: int = 10) -> pd.DataFrame:
+def _rakuten_frame() -> pd.DataFrame:
+    """Return the Rakuten data as one row per ETF, JPX fees filling gaps.
+
+    Columns: ``code``, ``name_ja``, ``name_en``, ``fee``, ``dividend_yield``
+    and one per period. Rebuilt only when either source has been refreshed.
+    """
+    global _frame_cache  # noqa: PLW0603
+    data = get_rakuten_data()
+    jpx_fees = get_fees()
+    cached = _frame_cache
+    if cached is not None and cached[0] is data and cached[1] is jpx_fees:
+        return cached[2]
+
+    entries = list(data.values())
+    frame = pd.DataFrame(
+        {
+            "code": list(data),
+            "name_ja": [e.get("name_ja", "") for e in entries],
+            "name_en": [e.get("name_en", "") for e in entries],
+            **{
+                col: pd.Series([e.get(col) for e in entries], dtype=float)
+                for col in ("fee", "dividend_yield", *_VALID_PERIODS)
+            },
+        }
+    )
+    if jpx_fees:
+        frame["fee"] = frame["fee"].fillna(frame["code"].map(jpx_fees))
+    _frame_cache = (data, jpx_fees, frame)
+    return frame
+
+
+def ranking(
+    period: str = "1m", n: int = 10, *, date: str | datetime.date | None = None
+) -> pd.DataFrame:
     """Return a DataFrame of TSE ETFs ranked by return for the given period.
 
     Parameters
@@ -21,48 +69,124 @@ def ranking(period: str = "1m", n: int = 10) -> pd.DataFrame:
     n : int
         Positive for top N (descending), negative for worst N (ascending),
         0 for all (sorted descending).
+    date : str | datetime.date | None
+        ISO date (e.g. ``"2026-01-15"``). If given, rank from the daily
+        snapshot stored in the local database on or before that date
+        instead of the latest Rakuten data.
 
     Returns
     -------
     pd.DataFrame
         Columns: ``code``, ``name``, ``return``, ``fee``, ``dividend_yield``.
+
+    Raises
+    ------
+    ValueError
+        If *period* is unknown or *date* is not a YYYY-MM-DD date.
+    DatabaseError
+        If *date* is given and the local database does not exist.
     """
     if period not in _VALID_PERIODS:
         raise ValueError(f"period must be one of {_VALID_PERIODS}, got {period!r}")
 
-    data = get_rakuten_data()
-    if not data:
-        return pd.DataFrame(columns=["code", "name", "return", "fee", "dividend_yield"])
+    if date is not None:
+        from .etf import _require_db
 
-    jpx_fees = get_fees()
-    name_key = "name_ja" if config.lang == "ja" else "name_en"
-
-    rows = []
-    for code, entry in data.items():
-        ret = entry.get(period)
-        if ret is None:
-            continue
-        fee = entry.get("fee")
-        if fee is None:
-            fee = jpx_fees.get(code)
-        rows.append(
-            {
-                "code": code,
-                "name": entry.get(name_key, ""),
-                "return": ret,
-                "fee": fee,
-                "dividend_yield": entry.get("dividend_yield"),
-            }
+        day = datetime.date.fromisoformat(str(date)).isoformat()
+        _require_db()
+        return read_ranking(period, n, day)
+
+    frame = _rakuten_frame()
+    rows = _select(frame[period].to_numpy(), n)
+    name_col = "name_ja" if config.lang == "ja" else "name_en"
+    sources = ["code", name_col, period, "fee", "dividend_yield"]
+    return pd.DataFrame(
+        {col: frame[src].to_numpy()[rows] for col, src in zip(_COLUMNS, sources)}
+    )
+
+
+def ranking_table(
+    periods: Sequence[str] | None = None,
+    *,
+    score: Mapping[str, float] | None = None,
+    n: int = 0,
+) -> pd.DataFrame:
+    """Return returns, ranks and percentiles for several periods in one table.
+
+    Parameters
+    ----------
+    periods : sequence of str, optional
+        Periods to include (see :func:`ranking`); all of them by default.
+    score : mapping, optional
+        Weights for a composite ``score`` column, a weighted sum of period
+        returns, ``fee`` and ``dividend_yield``. For example
+        ``{"1y": 1, "fee": -1}`` is the 1-year return minus the fee. ETFs
+        missing any weighted value get no score.
+    n : int
+        Positive for top N, negative for worst N, 0 for all, ordered by
+        ``score`` if given, else by the first period's return. ETFs without
+        a value to order by are dropped.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns: ``code``, ``name``, ``fee``, ``dividend_yield``, then per
+        period ``<p>`` (return), ``<p>_rank`` (1 = best) and ``<p>_pct``
+        (percentile, 100 = best), then ``score`` if requested.
+    """
+    periods = list(_VALID_PERIODS if periods is None else periods)
+    if not periods:
+        raise ValueError("periods must not be empty")
+    for period in periods:
+        if period not in _VALID_PERIODS:
+            raise ValueError(f"period must be one of {_VALID_PERIODS}, got {period!r}")
+    for col in score or {}:
+        if col not in _VALID_PERIODS + _SCORE_COLUMNS:
+            raise ValueError(
+                f"score keys must be periods or one of {_SCORE_COLUMNS}, got {col!r}"
+            )
+
+    frame = _rakuten_frame()
+    name_col = "name_ja" if config.lang == "ja" else "name_en"
+    returns = frame[periods]
+    ranks = returns.rank(ascending=False, method="min")
+    pcts = returns.rank(pct=True) * 100
+
+    columns: dict[str, object] = {
+        "code": frame["code"],
+        "name": frame[name_col],
+        "fee": frame["fee"],
+        "dividend_yield": frame["dividend_yield"],
+    }
+    for period in periods:
+        columns[period] = returns[period]
+        columns[f"{period}_rank"] = ranks[period].astype("Int64")
+        columns[f"{period}_pct"] = pcts[period]
+    if score:
+        weights = pd.Series(score, dtype=float)
+        # min_count: any missing weighted value leaves the score NaN.
+        columns["score"] = (frame[list(weights.index)] * weights).sum(
+            axis=1, min_count=len(weights)
         )
+    table = pd.DataFrame(columns)
 
-    df = pd.DataFrame(rows)
-    if df.empty:
-        return df
+    order_by = "score" if score else periods[0]
+    return table.take(_select(table[order_by].to_numpy(), n)).reset_index(drop=True)
 
-    ascending = n < 0
-    df = df.sort_values("return", ascending=ascending).reset_index(drop=True)
 
-    if n == 0:
-        return df
+def _select(values: np.ndarray, n: int) -> np.ndarray:
+    """Return positions of the top *n* values (bottom ``-n``; 0 = all sorted).
 
-    return df.head(abs(n)).reset_index(drop=True)
+    NaNs are skipped and ties keep the data's order, as in a stable sort.
+    Only the values up to the N-th are sorted.
+    """
+    rows = np.flatnonzero(~np.isnan(values))
+    keys = values[rows] if n < 0 else -values[rows]
+    k = len(rows) if n == 0 else min(abs(n), len(rows))
+    if k < len(rows):
+        # argpartition picks arbitrarily among ties at the cut-off, so take
+        # every value up to the k-th and let the stable sort choose.
+        kth = np.partition(keys, k - 1)[k - 1]
+        part = np.flatnonzero(keys <= kth)
+        return rows[part[np.argsort(keys[part], kind="stable")][:k]]
+    return rows[np.argsort(keys, kind="stable")]
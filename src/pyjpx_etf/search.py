@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
-import pandas as pd
+from typing import TYPE_CHECKING
 
 from ._internal.db import search_by_holding
-from .exceptions import DatabaseError
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def search(stock_code: str, *, n: int = 10, date: str | None = None) -> pd.DataFrame:
@@ -30,10 +32,7 @@ def search(stock_code: str, *, n: int = 10, date: str | None = None) -> pd.DataF
     DatabaseError
         If the local database does not exist. Run ``etf sync`` first.
     """
-    from ._internal.db import db_exists
-    from .etf import _ensure_db
+    from .etf import _require_db
 
-    _ensure_db()
-    if not db_exists():
-        raise DatabaseError("Local database not found. Check your network connection.")
+    _require_db()
     return search_by_holding(stock_code, n=n, date=date)
@@ -2,23 +2,482 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
+import lzma
+import os
+import sqlite3
 import sys
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
 
 import requests
 
-from .config import _DB_RELEASE_URL, config
+from .config import _DB_MANIFEST_URL, _DB_RELEASE_BASE, _DB_RELEASE_URL, config
 from .exceptions import DatabaseError
 
+_CHUNK_SIZE = 256 * 1024
 
-def sync(*, force: bool = False) -> Path:
+# Files at least this large are fetched as ``config.download_workers``
+# concurrent range requests.
+_PARALLEL_MIN_SIZE = 16 * 1024 * 1024
+
+# Compressions sync() can decode, in order of preference.
+_DECOMPRESSORS = {"xz": lzma.LZMADecompressor}
+
+_quiet: ContextVar[bool] = ContextVar("quiet", default=False)
+
+
+def _echo(message: str, **kwargs: Any) -> None:
+    """Print a status message to stderr unless ``sync(quiet=True)``."""
+    if not _quiet.get():
+        print(message, file=sys.stderr, **kwargs)
+
+
+class _NotModified(Exception):
+    """The server answered a conditional request with 304 Not Modified."""
+
+
+class _RangeNotSupported(Exception):
+    """The server ignored a Range header and sent the whole file."""
+
+
+class _Progress:
+    """Thread-safe download progress on stderr."""
+
+    def __init__(self, name: str, total: int = 0, done: int = 0) -> None:
+        self.name = name
+        self.total = total
+        self.done = done
+        self._printed = False
+        self._quiet = _quiet.get()  # worker threads don't inherit the context
+        self._lock = threading.Lock()
+
+    def add(self, n: int) -> None:
+        with self._lock:
+            self.done += n
+            if self.total > 0 and not self._quiet:
+                pct = self.done * 100 // self.total
+                mb = self.done / 1_000_000
+                print(
+                    f"\rDownloading {self.name}: {mb:.1f} MB ({pct}%)",
+                    end="",
+                    file=sys.stderr,
+                    flush=True,
+                )
+                self._printed = True
+
+    def close(self) -> None:
+        if self._printed:
+            print(file=sys.stderr)  # newline after progress
+
+
+def _is_current_schema(path: Path) -> bool:
+    """Return True if the DB at *path* uses the schema this version reads."""
+    from ._internal.db_core import is_current_schema
+
+    return is_current_schema(path)
+
+
+def _validators_path(dest: Path) -> Path:
+    return dest.with_name(dest.name + ".http.json")
+
+
+def _load_validators(dest: Path) -> dict[str, dict[str, str]]:
+    """Return the ETag/Last-Modified of the responses the local DB came from."""
+    try:
+        data = json.loads(_validators_path(dest).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_validators(dest: Path, validators: dict[str, dict[str, str]]) -> None:
+    path = _validators_path(dest)
+    validators = {url: v for url, v in validators.items() if v}
+    if validators:
+        path.write_text(json.dumps(validators), encoding="utf-8")
+    else:
+        path.unlink(missing_ok=True)
+
+
+def _response_validators(resp: Any) -> dict[str, str]:
+    validators = {}
+    for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified")):
+        value = resp.headers.get(header)
+        if isinstance(value, str):
+            validators[key] = value
+    return validators
+
+
+def _conditional_headers(validators: dict[str, str] | None) -> dict[str, str]:
+    headers = {}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def _fetch_manifest(
+    validators: dict[str, str] | None = None,
+) -> tuple[dict[str, Any] | None, dict[str, str]]:
+    """Return the release manifest and its validators.
+
+    The manifest is None if it is missing or malformed. Raises _NotModified
+    if *validators* match the published manifest.
+    """
+    try:
+        resp = requests.get(
+            _DB_MANIFEST_URL,
+            headers=_conditional_headers(validators),
+            timeout=config.timeout,
+        )
+        if resp.status_code == 304:
+            raise _NotModified
+        resp.raise_for_status()
+        manifest = resp.json()
+    except _NotModified:
+        raise
+    except Exception:
+        return None, {}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("db"), dict):
+        return None, {}
+    return manifest, _response_validators(resp)
+
+
+def _fetch_range(
+    url: str,
+    part: Path,
+    start: int = 0,
+    end: int | None = None,
+    *,
+    progress: _Progress,
+    headers: dict[str, str] | None = None,
+    size: int | None = None,
+) -> dict[str, str]:
+    """Download bytes ``start..end`` of *url* into *part*, resuming if present.
+
+    ``end=None`` means to the end of the file, whose *size* may be known. The
+    ETag of the response that started *part* is kept next to it so that a
+    resumed request is only honoured (``If-Range``) for the same version of
+    the file. *headers* are sent only on a fresh whole-file request. Returns
+    the response validators.
+    """
+    etag_path = part.with_name(part.name + ".etag")
+    have = part.stat().st_size if part.is_file() else 0
+    if end is not None and have >= end - start + 1:
+        return {}  # segment already complete
+    if end is None and size is not None and have >= size:
+        if have == size:
+            return _part_validators(etag_path)  # interrupted after the last byte
+        _drop_part(part)
+        have = 0
+
+    request_headers = dict(headers or {}) if not have and end is None else {}
+    if have or end is not None:
+        stop = "" if end is None else str(end)
+        request_headers["Range"] = f"bytes={start + have}-{stop}"
+        if have and etag_path.is_file():
+            request_headers["If-Range"] = etag_path.read_text(encoding="utf-8")
+
+    resp = requests.get(
+        url, headers=request_headers, stream=True, timeout=config.timeout
+    )
+    if resp.status_code == 304:
+        raise _NotModified
+    if resp.status_code == 416 and have and end is None:
+        # Nothing left past *have*: the part is complete if the file is
+        # exactly that long (_assemble still checks the sha256 when known);
+        # otherwise it is not a prefix of this file and starts over.
+        total = resp.headers.get("Content-Range", "").rpartition("/")[2]
+        if total == str(start + have):
+            return _part_validators(etag_path)
+        _drop_part(part)
+        return _fetch_range(url, part, start, progress=progress, headers=headers)
+    resp.raise_for_status()
+    if "Range" in request_headers and resp.status_code != 206:
+        if end is not None:
+            raise _RangeNotSupported(url)
+        have = 0  # whole file sent (e.g. it changed): start over
+
+    validators = _response_validators(resp)
+    if not have:
+        if validators.get("etag"):
+            etag_path.write_text(validators["etag"], encoding="utf-8")
+        else:
+            etag_path.unlink(missing_ok=True)
+    if end is None:
+        length = int(resp.headers.get("content-length", 0))
+        progress.total = have + length if length else 0
+        progress.done = have
+
+    with open(part, "ab" if have else "wb") as f:
+        for chunk in resp.iter_content(chunk_size=_CHUNK_SIZE):
+            f.write(chunk)
+            progress.add(len(chunk))
+    return validators
+
+
+def _part_validators(etag_path: Path) -> dict[str, str]:
+    """The validators of a complete part, from the ETag stored next to it."""
+    if etag_path.is_file():
+        return {"etag": etag_path.read_text(encoding="utf-8")}
+    return {}
+
+
+def _drop_part(part: Path) -> None:
+    part.unlink(missing_ok=True)
+    part.with_name(part.name + ".etag").unlink(missing_ok=True)
+
+
+def _segment_parts(part: Path, size: int, workers: int) -> dict[Path, tuple[int, int]]:
+    """Split *size* bytes into ranges, one ``<part>.<start>-<end>`` file each."""
+    step = -(-size // workers)
+    segments = {}
+    for start in range(0, size, step):
+        end = min(start + step, size) - 1
+        segments[part.with_name(f"{part.name}.{start}-{end}")] = (start, end)
+    return segments
+
+
+def _fetch_parallel(url: str, part: Path, size: int, workers: int) -> list[Path]:
+    """Download *url* as concurrent range requests. Returns the part files."""
+    segments = _segment_parts(part, size, workers)
+    for stale in part.parent.glob(f"{part.name}.*-*"):
+        if stale.with_name(stale.name.removesuffix(".etag")) not in segments:
+            stale.unlink(missing_ok=True)  # left over from another layout
+    done = sum(p.stat().st_size for p in segments if p.is_file())
+    progress = _Progress(url.rsplit("/", 1)[-1], size, done)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_fetch_range, url, p, start, end, progress=progress)
+                for p, (start, end) in segments.items()
+            ]
+            for future in futures:
+                future.result()
+    finally:
+        progress.close()
+    return list(segments)
+
+
+def _assemble(
+    parts: list[Path],
+    tmp: Path,
+    name: str,
+    *,
+    compression: str | None,
+    sha256: str | None,
+) -> None:
+    """Concatenate *parts* into *tmp*, decompressing and verifying *sha256*."""
+    decompressor = _DECOMPRESSORS[compression]() if compression else None
+    digest = hashlib.sha256()
+    with open(tmp, "wb") as out:
+        for part in parts:
+            with open(part, "rb") as f:
+                for block in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                    if decompressor is not None:
+                        block = decompressor.decompress(block)
+                    out.write(block)
+                    digest.update(block)
+
+    if decompressor is not None and not decompressor.eof:
+        raise DatabaseError(f"Downloaded {name} is truncated")
+    if sha256 is not None and digest.hexdigest() != sha256:
+        raise DatabaseError(f"Checksum mismatch for downloaded {name}")
+
+
+def _download(
+    url: str,
+    tmp: Path,
+    *,
+    compression: str | None = None,
+    sha256: str | None = None,
+    size: int | None = None,
+    headers: dict[str, str] | None = None,
+) -> dict[str, str]:
+    """Fetch *url* into *tmp*, decompressing and verifying *sha256*.
+
+    The raw bytes are kept in ``.part`` files next to *tmp* until the file is
+    complete, so an interrupted download resumes where it stopped. Files of
+    a known *size* of at least ``_PARALLEL_MIN_SIZE`` are fetched with
+    ``config.download_workers`` concurrent range requests. *sha256* is the
+    digest of the decompressed bytes. Returns the response validators.
+    """
+    from ._internal._trace import span
+
+    name = url.rsplit("/", 1)[-1]
+    part = tmp.with_name(f"{name}.part")
+    workers = config.download_workers
+    parts = None
+    validators: dict[str, str] = {}
+
+    with span("download", name) as s:
+        s.provider = urlsplit(url).hostname
+        if size and workers > 1 and size >= _PARALLEL_MIN_SIZE:
+            try:
+                parts = _fetch_parallel(url, part, size, workers)
+            except _RangeNotSupported:
+                for p in _segment_parts(part, size, workers):
+                    p.unlink(missing_ok=True)
+        if parts is None:
+            progress = _Progress(name)
+            try:
+                validators = _fetch_range(
+                    url, part, progress=progress, headers=headers, size=size
+                )
+            finally:
+                progress.close()
+            parts = [part]
+        s.bytes = sum(p.stat().st_size for p in parts if p.is_file())
+
+    try:
+        _assemble(parts, tmp, name, compression=compression, sha256=sha256)
+    finally:
+        # Resuming only helps after a network error; bad data starts over.
+        for p in parts:
+            _drop_part(p)
+    return validators
+
+
+def _download_compressed(manifest: dict[str, Any] | None, tmp: Path) -> bool:
+    """Try each compressed artifact listed in *manifest*. Returns True on success."""
+    if manifest is None:
+        return False
+    sha256 = manifest["db"].get("sha256")
+    for artifact in manifest.get("artifacts", []):
+        compression = artifact.get("compression")
+        if compression not in _DECOMPRESSORS:
+            continue
+        try:
+            _download(
+                f"{_DB_RELEASE_BASE}/{artifact['name']}",
+                tmp,
+                compression=compression,
+                sha256=sha256,
+                size=artifact.get("size"),
+            )
+            return True
+        except (requests.RequestException, lzma.LZMAError, DatabaseError) as e:
+            _echo(f"Compressed download failed ({e}); trying next source.")
+    return False
+
+
+def _local_updated_at(path: Path) -> str | None:
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            row = conn.execute(
+                "SELECT value FROM meta WHERE key = 'updated_at'"
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def _patch_chain(manifest: dict[str, Any], since: str) -> list[dict[str, Any]] | None:
+    """Return the patches leading from *since* to the manifest's ``updated_at``.
+
+    None if the chain is broken, i.e. the local DB is too far behind, or
+    loops (a malformed manifest); either way a full download follows.
+    """
+    patches = manifest.get("patches", [])
+    by_base = {p.get("base"): p for p in patches}
+    chain: list[dict[str, Any]] = []
+    current = since
+    while current != manifest.get("updated_at"):
+        patch = by_base.get(current)
+        if patch is None or len(chain) == len(patches):
+            return None
+        chain.append(patch)
+        current = patch.get("updated_at")
+    return chain
+
+
+def _sync_patches(dest: Path, manifest: dict[str, Any] | None) -> bool:
+    """Bring *dest* up to date with the manifest's daily patches.
+
+    Returns False if a full download is needed instead: no usable manifest,
+    a schema change, a local DB outside the patch window, or any failure
+    while downloading or applying (the local DB is then left untouched).
+    """
+    from ._internal.db import SCHEMA_VERSION
+    from ._internal.db_patch import MAX_PATCHES, apply_patches
+
+    if manifest is None or manifest.get("schema_version") != SCHEMA_VERSION:
+        return False
+    if not _is_current_schema(dest):
+        return False
+    since = _local_updated_at(dest)
+    if since is None:
+        return False
+    chain = _patch_chain(manifest, since)
+    if chain is None or len(chain) > MAX_PATCHES:
+        return False
+    if not chain:
+        os.utime(dest)  # already current; restart the freshness window
+        return True
+
+    from ._internal._lock import temp_path
+
+    tmps = [temp_path(dest) for _ in chain]
+    try:
+        for patch, tmp in zip(chain, tmps):
+            _download(
+                f"{_DB_RELEASE_BASE}/{patch['name']}",
+                tmp,
+                compression="xz",
+                sha256=patch.get("sha256"),
+            )
+        conn = sqlite3.connect(dest)
+        try:
+            apply_patches(conn, tmps)
+        finally:
+            conn.close()
+    except (
+        requests.RequestException,
+        lzma.LZMAError,
+        DatabaseError,
+        sqlite3.Error,
+    ) as e:
+        _echo(f"Patch update failed ({e}); downloading full database.")
+        return False
+    finally:
+        for tmp in tmps:
+            tmp.unlink(missing_ok=True)
+    return True
+
+
+def sync(*, force: bool = False, quiet: bool = False) -> Path:
     """Download pcf.db from GitHub Releases.
 
+    Nothing is transferred if the release hasn't changed since the last
+    sync (``If-None-Match``/``If-Modified-Since``). An existing local DB on
+    the current schema is brought up to date by applying the missing daily
+    patches from the release manifest, in a single transaction. Otherwise
+    (or if that fails) the whole DB is downloaded, preferring the compressed
+    artifact, and checked against the manifest's SHA-256 before it replaces
+    the local DB. Falls back to the uncompressed file.
+
+    Interrupted downloads resume with HTTP range requests on the next call.
+    Set ``config.download_workers`` above 1 to fetch large files with that
+    many concurrent range requests.
+
     Parameters
     ----------
     force : bool
-        Re-download even if local DB is fresh (< 1 day old).
+        Download the full DB even if the local one is fresh (< 1 day old),
+        unchanged or could be patched. A local DB with an older schema
+        version is always re-downloaded.
+    quiet : bool
+        Don't print status and progress messages to stderr.
 
     Returns
     -------
@@ -28,54 +487,97 @@ def sync(*, force: bool = False) -> Path:
     Raises
     ------
     DatabaseError
-        If the download fails.
+        If the download fails or does not match the published checksum.
     """
+    token = _quiet.set(quiet)
+    try:
+        return _sync(force=force)
+    finally:
+        _quiet.reset(token)
+
+
+def _is_fresh(dest: Path) -> bool:
+    """True if *dest* exists, is < 1 day old and on the current schema."""
+    from ._internal.db_core import is_fresh
+
+    return is_fresh(dest)
+
+
+def _sync(*, force: bool) -> Path:
+    from ._internal._lock import FileLock, lock_path
+    from ._internal._trace import span
     from ._internal.db import db_path
 
     dest = db_path()
-
-    if not force and dest.is_file():
-        age = time.time() - dest.stat().st_mtime
-        if age < 24 * 3600:
+    with span("sync") as s:
+        s.cache = "hit"  # until something is transferred
+        if not force and _is_fresh(dest):
             return dest
 
-    dest.parent.mkdir(parents=True, exist_ok=True)
+        dest.parent.mkdir(parents=True, exist_ok=True)
 
-    print("Syncing ETF database...", file=sys.stderr, flush=True)
+        # One process downloads; the others wait here and reuse its result.
+        lock = FileLock(lock_path(dest), config.lock_timeout)
+        try:
+            lock.acquire()
+        except TimeoutError as e:
+            raise DatabaseError(
+                f"Timed out after {config.lock_timeout}s waiting for another "
+                f"process to sync {dest}"
+            ) from e
+        try:
+            if (not force or lock.waited) and _is_fresh(dest):
+                return dest
+            transferred = _sync_locked(dest, force=force)
+            if transferred is not None:
+                s.provider, s.cache = transferred, "miss"
+        finally:
+            lock.release()
+    return dest
 
-    try:
-        resp = requests.get(_DB_RELEASE_URL, stream=True, timeout=config.timeout)
-        resp.raise_for_status()
-    except requests.RequestException as e:
-        raise DatabaseError(
-            f"Failed to download database: {e}. "
-            "The database may not be published yet. "
-            "Run the pipeline first or check the GitHub release."
-        ) from e
 
-    total = int(resp.headers.get("content-length", 0))
-    downloaded = 0
+def _sync_locked(dest: Path, *, force: bool) -> str | None:
+    """Bring *dest* up to date. Returns ``patch`` or ``download`` for what
+    was transferred, or None if the release was unchanged."""
+    from ._internal._lock import remove_temp_files, temp_path
 
-    tmp = dest.with_suffix(".tmp")
+    remove_temp_files(dest)  # left by killed syncs; we hold the lock
+    _echo("Syncing ETF database...", flush=True)
+
+    current = dest.is_file() and _is_current_schema(dest)
+    validators = _load_validators(dest) if current and not force else {}
     try:
-        with open(tmp, "wb") as f:
-            for chunk in resp.iter_content(chunk_size=8192):
-                f.write(chunk)
-                downloaded += len(chunk)
-                if total > 0:
-                    pct = downloaded * 100 // total
-                    mb = downloaded / 1_000_000
-                    print(
-                        f"\rDownloading pcf.db: {mb:.1f} MB ({pct}%)",
-                        end="",
-                        file=sys.stderr,
-                        flush=True,
+        manifest, seen = _fetch_manifest(validators.get(_DB_MANIFEST_URL))
+        if not force and current and _sync_patches(dest, manifest):
+            _save_validators(dest, {_DB_MANIFEST_URL: seen})
+            return "patch"
+
+        tmp = temp_path(dest)
+        plain: dict[str, str] = {}
+        try:
+            if not _download_compressed(manifest, tmp):
+                db_info = manifest["db"] if manifest else {}
+                try:
+                    plain = _download(
+                        _DB_RELEASE_URL,
+                        tmp,
+                        sha256=db_info.get("sha256"),
+                        size=db_info.get("size"),
+                        headers=_conditional_headers(validators.get(_DB_RELEASE_URL)),
                     )
-        if total > 0:
-            print(file=sys.stderr)  # newline after progress
-        tmp.rename(dest)
-    except Exception:
-        tmp.unlink(missing_ok=True)
-        raise
+                except requests.RequestException as e:
+                    raise DatabaseError(
+                        f"Failed to download database: {e}. "
+                        "The database may not be published yet. "
+                        "Run the pipeline first or check the GitHub release."
+                    ) from e
+            tmp.replace(dest)
+        except Exception:
+            tmp.unlink(missing_ok=True)
+            raise
+    except _NotModified:
+        os.utime(dest)  # unchanged upstream; restart the freshness window
+        return None
 
-    return dest
+    _save_validators(dest, {_DB_MANIFEST_URL: seen, _DB_RELEASE_URL: plain})
+    return "download"
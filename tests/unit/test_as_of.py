@@ -0,0 +1,35 @@
+"""Tests for as_of.py — point-in-time holdings of every ETF."""
+
+import datetime
+import importlib
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from pyjpx_etf.as_of import as_of
+from pyjpx_etf.exceptions import DatabaseError
+
+# pyjpx_etf.as_of is shadowed by the function in __init__.py.
+_as_of_mod = importlib.import_module("pyjpx_etf.as_of")
+
+
+class TestAsOf:
+    @patch("pyjpx_etf._internal.db_core.db_path")
+    def test_raises_without_db(self, mock_path, tmp_path):
+        mock_path.return_value = tmp_path / "nonexistent.db"
+        with pytest.raises(DatabaseError, match="Local database not found"):
+            as_of("2026-03-01")
+
+    @patch.object(_as_of_mod, "read_as_of", return_value=pd.DataFrame())
+    @patch("pyjpx_etf._internal.db_core.db_path")
+    def test_accepts_date(self, mock_path, mock_read, tmp_path):
+        fake_db = tmp_path / "test.db"
+        fake_db.write_bytes(b"fake")
+        mock_path.return_value = fake_db
+        as_of(datetime.date(2026, 3, 1))
+        mock_read.assert_called_once_with("2026-03-01")
+
+    def test_rejects_malformed_date(self):
+        with pytest.raises(ValueError):
+            as_of("03/01/2026")
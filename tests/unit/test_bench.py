@@ -0,0 +1,114 @@
+import datetime
+import json
+from unittest.mock import patch
+
+import pytest
+
+from pyjpx_etf import config
+from pyjpx_etf._internal import db
+from pyjpx_etf._internal.bench import CASES, compare, run
+from pyjpx_etf._internal.parser import parse_pcf
+from pyjpx_etf._internal.synth import build_db, business_days, pcf_csv
+from pyjpx_etf.cli import main
+
+
+class TestSynth:
+    def test_business_days(self):
+        days = business_days(6, datetime.date(2026, 3, 2))  # a Monday
+        assert days == [
+            "2026-02-23",
+            "2026-02-24",
+            "2026-02-25",
+            "2026-02-26",
+            "2026-02-27",
+            "2026-03-02",
+        ]
+
+    def test_build_db(self, tmp_path):
+        path = tmp_path / "pcf.db"
+        build_db(path, etfs=3, holdings=50, days=4, end=datetime.date(2026, 3, 2))
+        assert db.is_current_schema(path)
+
+        config.db_path = path
+        holdings = db.read_holdings("1300")
+        assert len(holdings) == 50
+        assert sum(h.weight for h in holdings) == pytest.approx(1.0)
+        assert db.read_etf_info("1302").date == datetime.date(2026, 3, 2)
+        assert len(db.read_etf_dates("1301")) == 4
+        assert db.ranking_rows("1m", 0, "2026-03-02")
+
+    def test_build_db_is_deterministic(self, tmp_path):
+        build_db(tmp_path / "a.db", etfs=2, holdings=20, days=2)
+        build_db(tmp_path / "b.db", etfs=2, holdings=20, days=2)
+        config.db_path = tmp_path / "a.db"
+        a = db.read_holdings("1300")
+        config.db_path = tmp_path / "b.db"
+        assert db.read_holdings("1300") == a
+
+    def test_pcf_csv_parses(self):
+        info, holdings = parse_pcf(pcf_csv("1306", 120))
+        assert info.code == "1306"
+        assert len(holdings) == 120
+        assert sum(h.weight for h in holdings) == pytest.approx(1.0)
+
+
+class TestRun:
+    def test_all_cases(self, tmp_path):
+        result = run(etfs=3, holdings=30, days=3, repeat=2, db_path=tmp_path / "s.db")
+        assert list(result["results"]) == list(CASES)
+        assert result["params"] == {"etfs": 3, "holdings": 30, "days": 3}
+        assert result["db"]["rows"] == 3 * 30 * 3
+        for timing in result["results"].values():
+            assert timing["min_ms"] <= timing["median_ms"] <= timing["max_ms"]
+        json.dumps(result)
+
+    def test_reuses_db_and_leaves_it_unchanged(self, tmp_path):
+        path = tmp_path / "s.db"
+        build_db(path, etfs=2, holdings=20, days=2)
+        before = path.read_bytes()
+        result = run(db_path=path, repeat=1, only=["sync_apply", "pipeline_insert"])
+        assert result["db"]["build_s"] is None
+        assert result["params"] == {"etfs": 2, "holdings": 20, "days": 2}
+        assert path.read_bytes() == before
+
+    def test_restores_config(self, tmp_path):
+        config.lang = "en"
+        saved = config.db_path
+        run(etfs=2, holdings=10, days=2, repeat=1, only=["read_holdings"])
+        assert config.lang == "en"
+        assert config.db_path == saved
+
+    def test_unknown_case(self):
+        with pytest.raises(ValueError, match="unknown benchmark"):
+            run(only=["nope"])
+
+    def test_compare(self):
+        current = {"results": {"a": {"median_ms": 1.0}, "b": {"median_ms": 3.0}}}
+        baseline = {"results": {"a": {"median_ms": 2.0}}}
+        assert compare(current, baseline) == [
+            ("a", 2.0, 1.0, 0.5),
+            ("b", None, 3.0, None),
+        ]
+
+
+class TestCLI:
+    def test_output_and_compare(self, tmp_path, capsys):
+        out = tmp_path / "bench.json"
+        args = ["--db", str(tmp_path / "s.db"), "--etfs", "2", "--holdings", "10"]
+        args += ["--days", "2", "--repeat", "1", "--only", "parse_pcf,ranking"]
+        with patch("sys.argv", ["etf", "bench", *args, "-o", str(out)]):
+            main()
+        saved = json.loads(out.read_text())
+        assert set(saved["results"]) == {"parse_pcf", "ranking"}
+
+        with patch("sys.argv", ["etf", "bench", *args, "--compare", str(out)]):
+            main()
+        stdout = capsys.readouterr().out
+        assert "Baseline" in stdout
+        assert "parse_pcf" in stdout
+
+    def test_bad_option(self, capsys):
+        with patch("sys.argv", ["etf", "bench", "--etfs", "many"]):
+            with pytest.raises(SystemExit):
+                main()
+        assert "--etfs must be an integer" in capsys.readouterr().err
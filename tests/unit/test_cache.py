@@ -0,0 +1,285 @@
+"""Tests for _internal/_cache.py — memory → disk → fetch cache."""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from pyjpx_etf._internal import _cache as _cache_mod
+from pyjpx_etf._internal._cache import TieredCache
+from pyjpx_etf._internal.cache_store import SQLiteStore
+from pyjpx_etf.exceptions import StaleDataWarning
+
+
+def _cache(path, fetcher):
+    return TieredCache(
+        disk_path=path, ttl=3600, key="data", fetcher=fetcher, store=SQLiteStore("data")
+    )
+
+
+class TestDisk:
+    def test_failed_write_keeps_previous_rows(self, tmp_path):
+        path = tmp_path / "cache.db"
+        _cache(path, lambda: {"a": 1}).get()
+        assert _cache(path, lambda: {"a": object()}).get(refresh=True)
+        assert _cache(path, dict)._read_disk()[1] == {"a": 1}
+
+    def test_expired_entry_is_a_miss(self, tmp_path):
+        cache = _cache(tmp_path / "cache.db", lambda: {"a": 2})
+        cache._save_disk({"a": 1}, timestamp=time.time() - 7200)
+        assert cache.get() == {"a": 2}
+
+
+class TestCrossProcessFetch:
+    def test_waiters_reuse_first_fetch(self, tmp_path):
+        """Separate instances stand in for processes sharing the disk file."""
+        path = tmp_path / "cache.db"
+        calls = []
+
+        def fetcher():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"a": 1}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(_cache(path, fetcher).get()))
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results == [{"a": 1}] * 4
+        assert len(calls) == 1
+
+
+class TestSingleFlight:
+    def test_concurrent_misses_fetch_once(self, tmp_path):
+        calls = []
+
+        def fetcher():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"a": len(calls)}
+
+        cache = _cache(tmp_path / "cache.db", fetcher)
+        barrier = threading.Barrier(16)
+        results = []
+
+        def worker():
+            barrier.wait(timeout=5)
+            results.append(cache.get())
+
+        threads = [threading.Thread(target=worker) for _ in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+        assert len(calls) == 1
+        assert results == [{"a": 1}] * 16
+
+    def test_concurrent_failures_fetch_once(self, tmp_path):
+        calls = []
+
+        def fetcher():
+            calls.append(1)
+            time.sleep(0.05)
+            raise ConnectionError("JPX down")
+
+        cache = _cache(tmp_path / "cache.db", fetcher)
+        barrier = threading.Barrier(8)
+        results = []
+
+        def worker():
+            barrier.wait(timeout=5)
+            results.append(cache.get())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        with pytest.warns(StaleDataWarning):
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(timeout=10)
+        assert len(calls) == 1
+        assert results == [{}] * 8
+
+
+class TestFailureBackoff:
+    @pytest.fixture(autouse=True)
+    def clock(self, monkeypatch):
+        self.now = 1_000_000.0
+        monkeypatch.setattr(_cache_mod, "time", SimpleNamespace(time=lambda: self.now))
+
+    def _failing(self):
+        calls = []
+
+        def fetcher():
+            calls.append(self.now)
+            raise ConnectionError("JPX down")
+
+        return fetcher, calls
+
+    def test_no_refetch_during_backoff(self, tmp_path):
+        fetcher, calls = self._failing()
+        cache = _cache(tmp_path / "cache.db", fetcher)
+        with pytest.warns(StaleDataWarning):
+            assert cache.get() == {}
+        for _ in range(400):
+            assert cache.get() == {}
+            assert cache.get(refresh=True) == {}
+        assert len(calls) == 1
+        assert cache.status().retry_at == self.now + 30
+
+    def test_backoff_doubles_then_resets(self, tmp_path):
+        fetcher, calls = self._failing()
+        cache = _cache(tmp_path / "cache.db", fetcher)
+        with pytest.warns(StaleDataWarning):
+            cache.get()
+        for delay in (30, 60, 120):
+            self.now += delay
+            cache.get()
+        assert len(calls) == 4
+        assert cache.status().retry_at == self.now + 240
+
+        cache._fetcher = lambda: {"a": 1}
+        self.now += 240
+        assert cache.get() == {"a": 1}
+        assert cache.status().failures == 0
+
+    def test_serves_expired_disk_copy(self, tmp_path):
+        path = tmp_path / "cache.db"
+        _cache(path, lambda: {"a": 1}).get()
+        self.now += 7200  # past the 1h TTL
+        fetcher, calls = self._failing()
+        cache = _cache(path, fetcher)
+        with pytest.warns(StaleDataWarning, match="serving cached data"):
+            assert cache.get() == {"a": 1}
+        status = cache.status()
+        assert status.stale
+        assert status.fetched_at == self.now - 7200
+        assert status.last_error == "ConnectionError: JPX down"
+
+    def test_recovers_after_backoff(self, tmp_path):
+        path = tmp_path / "cache.db"
+        _cache(path, lambda: {"a": 1}).get()
+        self.now += 7200
+        fetcher, _ = self._failing()
+        cache = _cache(path, fetcher)
+        with pytest.warns(StaleDataWarning):
+            cache.get()
+        cache._fetcher = lambda: {"a": 2}
+        assert cache.get() == {"a": 1}  # still backing off
+        self.now += 30
+        assert cache.get() == {"a": 2}
+        assert not cache.status().stale
+
+    def test_failed_refresh_keeps_memory(self, tmp_path):
+        cache = _cache(tmp_path / "cache.db", lambda: {"a": 1})
+        cache.get()
+        cache._fetcher, _ = self._failing()
+        with pytest.warns(StaleDataWarning):
+            assert cache.get(refresh=True) == {"a": 1}
+        assert not cache.status().stale  # still within its TTL
+
+
+class TestStaleWhileRevalidate:
+    @pytest.fixture(autouse=True)
+    def clock(self, monkeypatch):
+        self.now = 1_000_000.0
+        monkeypatch.setattr(_cache_mod, "time", SimpleNamespace(time=lambda: self.now))
+        monkeypatch.setattr(_cache_mod.config, "background_refresh", True)
+        self.events = []
+        monkeypatch.setattr(
+            _cache_mod.config,
+            "on_cache_refresh",
+            lambda key, error: self.events.append((key, error)),
+        )
+
+    def _cache(self, path, fetcher):
+        return TieredCache(
+            disk_path=path,
+            ttl=3600,
+            soft_ttl=600,
+            key="data",
+            fetcher=fetcher,
+            store=SQLiteStore("data"),
+        )
+
+    def _join(self, cache):
+        if cache._refresh_thread is not None:
+            cache._refresh_thread.join(5)
+
+    def test_past_soft_ttl_serves_cached_and_refreshes_once(self, tmp_path):
+        release = threading.Event()
+        values = iter([{"v": 1}, {"v": 2}])
+
+        def fetcher():
+            data = next(values)
+            if data["v"] == 2:
+                release.wait(5)
+            return data
+
+        cache = self._cache(tmp_path / "cache.db", fetcher)
+        assert cache.get() == {"v": 1}
+        self.now += 900
+        for _ in range(5):
+            assert cache.get() == {"v": 1}  # no blocking, one refresh thread
+        release.set()
+        self._join(cache)
+        assert cache.get() == {"v": 2}
+        assert self.events == [("data", None), ("data", None)]
+
+    def test_within_soft_ttl_does_not_refresh(self, tmp_path):
+        calls = []
+        cache = self._cache(tmp_path / "cache.db", lambda: calls.append(1) or {"v": 1})
+        cache.get()
+        self.now += 300
+        cache.get()
+        assert cache._refresh_thread is None
+        assert len(calls) == 1
+
+    def test_past_hard_ttl_blocks(self, tmp_path):
+        values = iter([{"v": 1}, {"v": 2}])
+        cache = self._cache(tmp_path / "cache.db", lambda: next(values))
+        cache.get()
+        self.now += 7200
+        assert cache.get() == {"v": 2}
+        assert cache._refresh_thread is None
+
+    def test_disk_entry_past_soft_ttl_refreshes(self, tmp_path):
+        path = tmp_path / "cache.db"
+        self._cache(path, lambda: {"v": 1}).get()
+        self.now += 900
+        cache = self._cache(path, lambda: {"v": 2})
+        assert cache.get() == {"v": 1}
+        self._join(cache)
+        assert cache.get() == {"v": 2}
+
+    def test_failed_refresh_reports_error_without_warning(self, tmp_path, recwarn):
+        cache = self._cache(tmp_path / "cache.db", lambda: {"v": 1})
+        cache.get()
+        error = ConnectionError("JPX down")
+
+        def failing():
+            raise error
+
+        cache._fetcher = failing
+        self.now += 900
+        assert cache.get() == {"v": 1}
+        self._join(cache)
+        assert self.events[-1] == ("data", error)
+        assert cache.status().failures == 1
+        assert not recwarn.list
+        assert cache.get() == {"v": 1}
+
+    def test_off_by_default(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(_cache_mod.config, "background_refresh", False)
+        calls = []
+        cache = self._cache(tmp_path / "cache.db", lambda: calls.append(1) or {"v": 1})
+        cache.get()
+        self.now += 7200
+        cache.get()  # memory never expires without revalidation
+        assert cache._refresh_thread is None
+        assert len(calls) == 1
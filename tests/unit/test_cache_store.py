@@ -0,0 +1,123 @@
+"""Tests for _internal/cache_store.py — SQLite disk tier for TieredCache."""
+
+import json
+import sqlite3
+import time
+
+import pytest
+
+from pyjpx_etf._internal import cache_store
+from pyjpx_etf._internal._cache import TieredCache
+from pyjpx_etf._internal.cache_store import SQLiteStore
+
+RAKUTEN = {
+    "1306": {"name_ja": "TOPIX", "fee": 0.06, "1y": None},
+    "1321": {"name_ja": "日経225", "fee": 0.11, "1y": 20.5},
+}
+
+
+def _cache(path, fetcher, dataset="data", **kwargs):
+    return TieredCache(
+        disk_path=path,
+        ttl=3600,
+        key=dataset,
+        fetcher=fetcher,
+        store=SQLiteStore(dataset, **kwargs),
+    )
+
+
+class TestSQLiteStore:
+    def test_roundtrip(self, tmp_path):
+        store = SQLiteStore("rakuten")
+        store.write(tmp_path / "cache.db", RAKUTEN, 123.0)
+        assert store.read(tmp_path / "cache.db") == (123.0, RAKUTEN)
+
+    def test_lookup(self, tmp_path):
+        store = SQLiteStore("fees")
+        store.write(tmp_path / "cache.db", {"1306": 0.06}, 123.0)
+        assert store.lookup(tmp_path / "cache.db", "1306") == (123.0, 0.06)
+        assert store.lookup(tmp_path / "cache.db", "9999") == (123.0, None)
+        assert SQLiteStore("names").lookup(tmp_path / "cache.db", "1306") is None
+
+    def test_missing_file(self, tmp_path):
+        store = SQLiteStore("fees")
+        assert store.read(tmp_path / "cache.db") is None
+        assert store.lookup(tmp_path / "cache.db", "1306") is None
+        assert not (tmp_path / "cache.db").exists()
+
+    def test_datasets_share_one_file(self, tmp_path):
+        path = tmp_path / "cache.db"
+        SQLiteStore("fees").write(path, {"1306": 0.06}, 1.0)
+        SQLiteStore("names").write(path, {"1306": "TOPIX"}, 2.0)
+        SQLiteStore("fees").write(path, {"1321": 0.11}, 3.0)  # replaces fees only
+        assert SQLiteStore("fees").read(path) == (3.0, {"1321": 0.11})
+        assert SQLiteStore("names").read(path) == (2.0, {"1306": "TOPIX"})
+
+    def test_failed_write_keeps_previous_rows(self, tmp_path):
+        path = tmp_path / "cache.db"
+        store = SQLiteStore("fees")
+        store.write(path, {"1306": 0.06}, 1.0)
+
+        class Boom(dict):
+            def items(self):
+                yield "1321", 0.11
+                raise RuntimeError("parse failed halfway")
+
+        with pytest.raises(RuntimeError):
+            store.write(path, Boom(), 2.0)
+        assert store.read(path) == (1.0, {"1306": 0.06})
+
+    def test_other_python_version_is_a_miss(self, tmp_path, monkeypatch):
+        path = tmp_path / "cache.db"
+        SQLiteStore("rakuten").write(path, RAKUTEN, 1.0)
+        monkeypatch.setattr(cache_store, "_STAMP", "0:2.7")
+        assert SQLiteStore("rakuten").read(path) is None
+        assert SQLiteStore("rakuten").lookup(path, "1306") is None
+
+
+class TestTieredCacheWithStore:
+    def test_get_writes_rows(self, tmp_path):
+        path = tmp_path / "cache.db"
+        _cache(path, lambda: {"1306": 0.06}, "fees").get()
+        conn = sqlite3.connect(path)
+        rows = conn.execute("SELECT dataset, code, value FROM entries").fetchall()
+        conn.close()
+        assert rows == [("fees", "1306", 0.06)]
+
+    def test_lookup_reads_one_row_without_loading(self, tmp_path):
+        path = tmp_path / "cache.db"
+        _cache(path, lambda: {"1306": 0.06, "1321": 0.11}, "fees").get()
+
+        cache = _cache(path, lambda: pytest.fail("should not fetch"), "fees")
+        assert cache.lookup("1321") == 0.11
+        assert cache.lookup("9999") is None
+        assert cache._memory is None
+
+    def test_lookup_fetches_when_expired(self, tmp_path):
+        path = tmp_path / "cache.db"
+        SQLiteStore("fees").write(path, {"1306": 0.06}, time.time() - 7200)
+        cache = _cache(path, lambda: {"1306": 0.07}, "fees")
+        assert cache.lookup("1306") == 0.07
+        assert cache._memory == {"1306": 0.07}
+
+    def test_lookup_uses_memory(self, tmp_path):
+        cache = _cache(tmp_path / "cache.db", lambda: {"1306": 0.06}, "fees")
+        cache.get()
+        (tmp_path / "cache.db").unlink()
+        assert cache.lookup("1306") == 0.06
+
+    def test_migrates_legacy_json(self, tmp_path):
+        legacy = tmp_path / "fees.json"
+        legacy.write_text(
+            json.dumps({"timestamp": time.time(), "fees": {"1306": 0.06}}),
+            encoding="utf-8",
+        )
+        cache = _cache(
+            tmp_path / "cache.db",
+            lambda: pytest.fail("should not fetch"),
+            "fees",
+            legacy="fees.json",
+        )
+        assert cache.get() == {"1306": 0.06}
+        assert not legacy.exists()
+        assert SQLiteStore("fees").read(tmp_path / "cache.db")[1] == {"1306": 0.06}
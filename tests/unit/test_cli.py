@@ -1,14 +1,22 @@
 import importlib
+import io
+import json
 from unittest.mock import patch
 
+import pytest
+
 from pyjpx_etf import config
-from pyjpx_etf._internal.cli_fmt import format_yen
+from pyjpx_etf._internal.cli_fmt import display_width, format_table, format_yen
 from pyjpx_etf._internal.cli_show import _resolve_code
 from pyjpx_etf.cli import main
+from pyjpx_etf.exceptions import ETFNotFoundError
+from pyjpx_etf.models import Holding
+from pyjpx_etf.ranking import ranking
 
 # pyjpx_etf.ranking is shadowed by the function in __init__.py.
 # importlib gives us the actual module for patching.
 _ranking_mod = importlib.import_module("pyjpx_etf.ranking")
+_cli_rank_mod = importlib.import_module("pyjpx_etf._internal.cli_rank")
 
 MOCK_CSV = """\
 ETF Code,ETF Name,Fund Cash Component,Shares Outstanding,Fund Date
@@ -46,6 +54,35 @@ class TestFormatYen:
         assert format_yen(1_0000_0000) == "1億"
 
 
+class TestFormatTable:
+    def test_display_width(self):
+        assert display_width("TOPIX") == 5
+        assert display_width("トヨタ自動車") == 12
+        assert display_width("ﾄﾖﾀ A") == 5  # half-width katakana
+
+    def test_layout(self):
+        table = format_table(
+            ("Code", "Name", "Weight"),
+            (["7203", "6857"], ["トヨタ自動車", "ADVANTEST"], ["3.9%", "12.0%"]),
+            align="<<>",
+            min_widths=(5, 4, 6),
+        )
+        assert table.splitlines() == [
+            " Code   Name          Weight",
+            "─────  ────────────  ──────",
+            " 7203   トヨタ自動車    3.9%",
+            " 6857   ADVANTEST      12.0%",
+        ]
+
+    def test_cells_wider_than_minimum(self):
+        table = format_table(("A",), (["abcdef"],), align=">", min_widths=(3,))
+        assert table.splitlines() == ["      A", "──────", " abcdef"]
+
+    def test_no_rows(self):
+        table = format_table(("Code", "Name"), ([], []), align="<<")
+        assert table.splitlines() == [" Code  Name", "────  ────"]
+
+
 class TestResolveCode:
     def test_alias_topix(self):
         assert _resolve_code("topix") == "1306"
@@ -84,8 +121,8 @@ class TestResolveCode:
         assert _resolve_code("unknown") == "unknown"
 
 
-@patch("pyjpx_etf.etf.get_rakuten_data", return_value={})
-@patch("pyjpx_etf.etf.get_fees", return_value={})
+@patch("pyjpx_etf.etf.get_rakuten_entry", return_value=None)
+@patch("pyjpx_etf.etf.get_fee", return_value=None)
 @patch("pyjpx_etf.etf.fetch_pcf", return_value=MOCK_CSV)
 @patch("pyjpx_etf.etf.get_japanese_names", return_value={})
 class TestCLI:
@@ -146,8 +183,8 @@ class TestCLI:
         assert title_pos < nav_pos < table_pos
 
 
-@patch("pyjpx_etf.etf.get_rakuten_data", return_value={})
-@patch("pyjpx_etf.etf.get_fees", return_value={})
+@patch("pyjpx_etf.etf.get_rakuten_entry", return_value=None)
+@patch("pyjpx_etf.etf.get_fee", return_value=None)
 @patch("pyjpx_etf.etf.fetch_pcf", return_value=MOCK_CSV)
 @patch("pyjpx_etf.etf.get_japanese_names", return_value=MOCK_JAPANESE_NAMES)
 class TestCLIEnFlag:
@@ -176,8 +213,8 @@ class TestCLIEnFlag:
 MOCK_FEES = {"1306": 0.06}
 
 
-@patch("pyjpx_etf.etf.get_rakuten_data", return_value={})
-@patch("pyjpx_etf.etf.get_fees", return_value=MOCK_FEES)
+@patch("pyjpx_etf.etf.get_rakuten_entry", return_value=None)
+@patch("pyjpx_etf.etf.get_fee", side_effect=MOCK_FEES.get)
 @patch("pyjpx_etf.etf.fetch_pcf", return_value=MOCK_CSV)
 @patch("pyjpx_etf.etf.get_japanese_names", return_value=MOCK_JAPANESE_NAMES)
 class TestCLIFee:
@@ -214,8 +251,8 @@ class TestCLIFee:
             raise AssertionError("Nav: line not found")
 
 
-@patch("pyjpx_etf.etf.get_rakuten_data", return_value={})
-@patch("pyjpx_etf.etf.get_fees", return_value={})
+@patch("pyjpx_etf.etf.get_rakuten_entry", return_value=None)
+@patch("pyjpx_etf.etf.get_fee", return_value=None)
 @patch("pyjpx_etf.etf.fetch_pcf", return_value=MOCK_CSV)
 @patch("pyjpx_etf.etf.get_japanese_names", return_value={})
 class TestCLIAllFlag:
@@ -251,8 +288,8 @@ class TestCLIAllFlag:
         assert "TOYOTA" in out
 
 
-@patch("pyjpx_etf.etf.get_rakuten_data", return_value={})
-@patch("pyjpx_etf.etf.get_fees", return_value={})
+@patch("pyjpx_etf.etf.get_rakuten_entry", return_value=None)
+@patch("pyjpx_etf.etf.get_fee", return_value=None)
 @patch("pyjpx_etf.etf.fetch_pcf", return_value=MOCK_CSV)
 @patch("pyjpx_etf.etf.get_japanese_names", return_value={})
 class TestCLIAlias:
@@ -299,9 +336,9 @@ MOCK_RANKING_DATA = {
 }
 
 
-@patch.object(_ranking_mod, "get_fees", return_value={})
+@patch.object(_cli_rank_mod, "get_fees", return_value={})
 @patch.object(
-    _ranking_mod,
+    _cli_rank_mod,
     "get_rakuten_data",
     return_value=MOCK_RANKING_DATA,
 )
@@ -348,9 +385,47 @@ class TestCLIRank:
         out = capsys.readouterr().out
         assert "TOPIX連動型上場投資信託" in out
 
-
-@patch("pyjpx_etf.etf.get_rakuten_data", return_value={})
-@patch("pyjpx_etf.etf.get_fees", return_value={})
+    def test_rank_json_missing_values_are_null(self, mock_data, mock_fees, capsys):
+        mock_data.return_value = {
+            "2644": {**MOCK_RANKING_DATA["2644"], "fee": None},
+            "1306": MOCK_RANKING_DATA["1306"],
+        }
+        with patch("sys.argv", ["etf", "rank", "--format", "json"]):
+            main()
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [r["code"] for r in records] == ["2644", "1306"]
+        assert records[0]["fee"] is None
+
+    def test_rank_ignores_stored_metrics(self, mock_data, mock_fees, capsys):
+        from pyjpx_etf._internal import db
+
+        with patch.object(db, "ranking_rows", side_effect=AssertionError):
+            with patch("sys.argv", ["etf", "rank", "1"]):
+                main()
+        assert "2644" in capsys.readouterr().out
+
+    @pytest.mark.parametrize("n", [10, 1, -1, 0])
+    @pytest.mark.parametrize("period", ["1m", "3y"])
+    def test_rows_match_ranking(self, mock_data, mock_fees, period, n):
+        data = {
+            **MOCK_RANKING_DATA,
+            "1321": {**MOCK_RANKING_DATA["1306"], "fee": None},  # ties with 1306
+            "1343": {"name_ja": "REIT", "1m": float("nan"), "3y": -4.0},
+        }
+        mock_data.return_value = data
+        mock_fees.return_value = {"1321": 0.11}
+        with (
+            patch.object(_ranking_mod, "get_rakuten_data", return_value=data),
+            patch.object(_ranking_mod, "get_fees", return_value={"1321": 0.11}),
+            patch.object(_ranking_mod, "_frame_cache", None),
+        ):
+            expected = ranking(period, n).itertuples(index=False, name=None)
+            expected = [tuple(None if v != v else v for v in row) for row in expected]
+        assert _cli_rank_mod._ranking_rows(period, n) == expected
+
+
+@patch("pyjpx_etf.etf.get_rakuten_entry", return_value=None)
+@patch("pyjpx_etf.etf.get_fee", return_value=None)
 @patch("pyjpx_etf.etf.fetch_pcf", return_value=MOCK_CSV)
 @patch("pyjpx_etf.etf.get_japanese_names", return_value={})
 @patch("pyjpx_etf.etf.db.db_exists", return_value=False)
@@ -384,3 +459,106 @@ class TestCLIHelp:
         assert "find" in out
         assert "history" in out
         assert "--live" in out
+
+
+class TestCLIFromDB:
+    """Batch lookups and find/history/rank, straight from DB rows."""
+
+    @pytest.fixture(autouse=True)
+    def pcf_db(self, tmp_path):
+        from pyjpx_etf._internal import db
+
+        config.db_path = tmp_path / "pcf.db"
+        config.lang = "en"
+        conn = db.get_connection(readonly=False)
+        db.init_schema(conn)
+        db.upsert_etf(conn, "1306", name_ja="TOPIX連動型", name_en="TOPIX ETF")
+        db.upsert_etf(conn, "2644", name_ja="半導体ETF", name_en="Semiconductor ETF")
+        for day, weight in (("2026-02-27", 0.02), ("2026-03-02", 0.03)):
+            h = Holding("6857", "ADVANTEST", "JP2", "TSE", "JPY", 500.0, 9e3, weight)
+            for code in ("1306", "2644"):
+                db.insert_pcf_info(conn, code, day, name=code, cash_component=0.0)
+                db.insert_holdings(conn, code, day, [h])
+        conn.commit()
+        conn.close()
+
+    def test_find(self, capsys):
+        with patch("sys.argv", ["etf", "find", "6857"]):
+            main()
+        out = capsys.readouterr().out
+        assert "TOPIX ETF" in out
+        assert "Semiconductor ETF" in out
+        assert "3.00%" in out
+
+    def test_history_series(self, capsys):
+        with patch("sys.argv", ["etf", "history", "1306", "6857"]):
+            main()
+        out = capsys.readouterr().out
+        assert "2026-02-27" in out
+        assert "2026-03-02" in out
+
+    def test_history_change(self, capsys):
+        with patch("sys.argv", ["etf", "history", "1306"]):
+            main()
+        out = capsys.readouterr().out
+        assert "ADVANTEST" in out
+        assert "+  1.00%" in out
+
+    @patch("pyjpx_etf.etf.fetch_pcf", side_effect=AssertionError)
+    def test_batch_json(self, mock_fetch, capsys):
+        with patch("sys.argv", ["etf", "1306", "2644", "--format", "json"]):
+            main()
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [r["etf"] for r in records] == ["1306", "2644"]
+        assert records[0] == {
+            "etf": "1306",
+            "date": "2026-03-02",
+            "code": "6857",
+            "name": "ADVANTEST",
+            "weight": 0.03,
+            "shares": 500.0,
+            "price": 9000.0,
+        }
+
+    def test_batch_from_stdin_csv(self, monkeypatch, capsys):
+        monkeypatch.setattr("sys.stdin", io.StringIO("1306\n2644\n"))
+        with patch("sys.argv", ["etf", "-", "--format=csv"]):
+            main()
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0] == "etf,date,code,name,weight,shares,price"
+        assert lines[1:] == [
+            "1306,2026-03-02,6857,ADVANTEST,0.03,500.0,9000.0",
+            "2644,2026-03-02,6857,ADVANTEST,0.03,500.0,9000.0",
+        ]
+
+    @patch("pyjpx_etf.etf.get_rakuten_entry", return_value=None)
+    @patch("pyjpx_etf.etf.get_fee", return_value=None)
+    @patch("pyjpx_etf.etf.fetch_pcf", side_effect=ETFNotFoundError("no 9999"))
+    def test_batch_continues_past_errors(
+        self, mock_fetch, mock_fee, mock_rakuten, capsys
+    ):
+        with patch("sys.argv", ["etf", "9999", "1306"]), pytest.raises(SystemExit):
+            main()
+        captured = capsys.readouterr()
+        assert "no 9999" in captured.err
+        assert "1306" in captured.out
+
+    def test_find_csv(self, capsys):
+        with patch("sys.argv", ["etf", "find", "6857", "--format", "csv"]):
+            main()
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0] == "code,name,weight,shares"
+        assert len(lines) == 3
+
+    def test_history_json(self, capsys):
+        with patch("sys.argv", ["etf", "history", "1306", "--format", "json"]):
+            main()
+        (record,) = map(json.loads, capsys.readouterr().out.splitlines())
+        assert record["code"] == "6857"
+        assert record["weight_change"] == pytest.approx(0.01)
+
+    def test_unknown_format(self, capsys):
+        with patch("sys.argv", ["etf", "rank", "--format", "xml"]):
+            with pytest.raises(SystemExit):
+                main()
+        assert "--format" in capsys.readouterr().err
@@ -1,12 +1,15 @@
 """Tests for _internal/db.py — SQLite read/write layer."""
 
 import datetime
+import shutil
+import sqlite3
 
 import pytest
 
-from pyjpx_etf._internal import db
+from pyjpx_etf._internal import db, db_read
+from pyjpx_etf._internal.db_patch import apply_patches, build_patch
 from pyjpx_etf.config import config
-from pyjpx_etf.models import Holding
+from pyjpx_etf.models import ETFInfo, Holding
 
 
 @pytest.fixture()
@@ -113,11 +116,28 @@ class TestSchema:
             "SELECT name FROM sqlite_master WHERE type='table'"
         ).fetchall()
         names = {r["name"] for r in tables}
-        assert {"meta", "etfs", "pcf_info", "pcf_holdings", "securities"} <= names
+        assert {
+            "meta",
+            "etfs",
+            "pcf_info",
+            "pcf_holdings",
+            "securities",
+            "instruments",
+            "etf_metrics",
+        } <= names
+
+    def test_metric_columns_match_periods(self, tmp_db):
+        from pyjpx_etf._internal.rakuten import PERIOD_COLUMNS
+
+        columns = {r["name"] for r in tmp_db.execute("PRAGMA table_info(etf_metrics)")}
+        assert {f"return_{p}" for p in PERIOD_COLUMNS} <= columns
 
     def test_init_schema_idempotent(self, tmp_db):
         db.init_schema(tmp_db)  # second call should not fail
 
+    def test_schema_version(self, tmp_db):
+        assert db.schema_version(tmp_db) == db.SCHEMA_VERSION
+
 
 class TestWriteQueries:
     def test_upsert_etf(self, tmp_db):
@@ -146,8 +166,14 @@ class TestWriteQueries:
             cash_component=1000.0,
             shares_outstanding=100,
         )
-        row = conn.execute("SELECT * FROM pcf_info WHERE code='1306'").fetchone()
+        row = conn.execute(
+            "SELECT p.* FROM pcf_info p JOIN securities s ON s.id = p.etf_id "
+            "WHERE s.code = '1306'"
+        ).fetchone()
         assert row["name"] == "TOPIX"
+        assert (
+            row["date"] == (datetime.date(2026, 3, 1) - datetime.date(1970, 1, 1)).days
+        )
 
     def test_insert_holdings(self, tmp_db):
         conn = tmp_db
@@ -164,8 +190,39 @@ class TestWriteQueries:
             )
         ]
         db.insert_holdings(conn, "1306", "2026-03-01", h)
-        row = conn.execute("SELECT * FROM pcf_holdings WHERE code='1306'").fetchone()
-        assert row["holding_code"] == "7203"
+        row = conn.execute(
+            "SELECT s.code FROM pcf_holdings h "
+            "JOIN securities s ON s.id = h.security_id"
+        ).fetchone()
+        assert row["code"] == "7203"
+
+    def test_insert_holdings_shares_instruments(self, tmp_db):
+        conn = tmp_db
+        h = Holding(
+            code="7203",
+            name="TOYOTA",
+            isin="JP001",
+            exchange="TSE",
+            currency="JPY",
+            shares=100.0,
+            price=2500.0,
+            weight=1.0,
+        )
+        db.insert_holdings(conn, "1306", "2026-03-01", [h])
+        db.insert_holdings(conn, "1306", "2026-03-02", [h])
+        db.insert_holdings(conn, "1321", "2026-03-02", [h])
+        count = conn.execute("SELECT COUNT(*) FROM instruments").fetchone()[0]
+        assert count == 1
+
+    def test_insert_metrics(self, tmp_db):
+        conn = tmp_db
+        metrics = {"1306": {"fee": 0.06, "dividend_yield": 1.9, "1m": 2.5, "1y": None}}
+        db.insert_metrics(conn, "2026-03-01", metrics, ["1m", "1y"])
+        db.insert_metrics(conn, "2026-03-01", metrics, ["1m", "1y"])  # re-run
+        rows = conn.execute(
+            "SELECT date, fee, dividend_yield, return_1m, return_1y FROM etf_metrics"
+        ).fetchall()
+        assert [tuple(r) for r in rows] == [(20513, 0.06, 1.9, 2.5, None)]
 
     def test_update_meta(self, tmp_db):
         conn = tmp_db
@@ -189,15 +246,102 @@ class TestReadQueries:
     def test_read_etf_info_missing(self, populated_db):
         assert db.read_etf_info("9999") is None
 
+    def test_read_etf_info_malformed_date(self, populated_db):
+        assert db.read_etf_info("1306", "2026/03/01") is None
+
+    def test_read_etfs(self, populated_db):
+        found = db.read_etfs(["1306", "9999", "1306"])
+        assert list(found) == ["1306"]
+        info, holdings = found["1306"]
+        assert info == db.read_etf_info("1306")
+        assert holdings == db.read_holdings("1306")
+        assert db.read_etfs(["1306"], "2026-02-28")["1306"][0].cash_component == 900.0
+
     def test_read_holdings_latest(self, populated_db):
+        config.lang = "en"
         holdings = db.read_holdings("1306")
         assert holdings is not None
         assert len(holdings) == 2
         assert holdings[0].code == "7203"  # higher weight
+        assert holdings[0] == Holding(
+            code="7203",
+            name="TOYOTA",
+            isin="JP001",
+            exchange="TSE",
+            currency="JPY",
+            shares=1000.0,
+            price=2500.0,
+            weight=0.6,
+        )
+
+    def test_read_holdings_specific_date(self, populated_db):
+        holdings = db.read_holdings("1306", "2026-02-28")
+        assert holdings is not None
+        assert holdings[0].price == 2400.0
 
     def test_read_holdings_missing(self, populated_db):
         assert db.read_holdings("9999") is None
 
+    def test_read_as_of(self, populated_db):
+        assert db.read_etf_info("1306", "2026-03-05", as_of=True).date == (
+            datetime.date(2026, 3, 1)
+        )
+        assert db.read_etf_info("1306", "2026-02-28", as_of=True).date == (
+            datetime.date(2026, 2, 28)
+        )
+        assert db.read_etf_info("1306", "2026-02-27", as_of=True) is None
+        assert db.read_etf_info("1306", "2026-03-05") is None  # exact date
+        holdings = db.read_holdings("1306", "2026-02-28", as_of=True)
+        assert holdings[0].price == 2400.0
+        assert db.read_holdings("1306", "2026-02-27", as_of=True) is None
+
+    def test_as_of_rows(self, populated_db):
+        config.lang = "en"
+        db.insert_pcf_info(populated_db, "2644", "2026-02-28", name="SEMI")
+        db.insert_holdings(
+            populated_db,
+            "2644",
+            "2026-02-28",
+            [Holding("6857", "ADVANTEST", "JP002", "TSE", "JPY", 10.0, 4800.0, 1.0)],
+        )
+        populated_db.commit()
+
+        rows = db.as_of_rows("2026-03-01")
+        assert [(r[0], r[1], r[2]) for r in rows] == [
+            ("1306", "2026-03-01", "7203"),
+            ("1306", "2026-03-01", "6857"),
+            ("2644", "2026-02-28", "6857"),
+        ]
+        assert rows[0] == ("1306", "2026-03-01", "7203", "TOYOTA", 0.6, 1000.0, 2500.0)
+        assert {r[1] for r in db.as_of_rows("2026-02-28")} == {"2026-02-28"}
+        assert db.as_of_rows("2026-01-01") == []
+
+        df = db.read_as_of("2026-03-01")
+        assert list(df.columns) == list(db_read.AS_OF_COLUMNS)
+        assert len(df) == 3
+
+    def test_japanese_names_from_securities(self, populated_db):
+        db.upsert_security(populated_db, "1306", name_ja="TOPIX連動型上場投資信託")
+        populated_db.commit()
+        config.lang = "ja"
+        info = db.read_etf_info("1306")
+        holdings = db.read_holdings("1306")
+        assert info.name == "TOPIX連動型上場投資信託"
+        assert [h.name for h in holdings] == ["トヨタ自動車", "アドバンテスト"]
+        assert db.history_rows("1306")[0][1] == "トヨタ自動車"
+        assert db.as_of_rows("2026-03-01")[0][3] == "トヨタ自動車"
+
+        config.lang = "en"
+        assert db.read_etf_info("1306").name == "TOPIX ETF"
+        assert db.read_holdings("1306")[0].name == "TOYOTA"
+
+    def test_japanese_name_falls_back_to_pcf(self, populated_db):
+        populated_db.execute("UPDATE securities SET name_ja = NULL")
+        populated_db.commit()
+        config.lang = "ja"
+        assert db.read_etf_info("1306").name == "TOPIX ETF"
+        assert db.read_holdings("1306")[0].name == "TOYOTA"
+
     def test_read_etf_fee(self, populated_db):
         assert db.read_etf_fee("1306") == 0.06
 
@@ -225,11 +369,13 @@ class TestReadQueries:
         assert len(df) == 2
         assert "date" in df.columns
         assert "weight" in df.columns
+        assert list(df["date"]) == ["2026-02-28", "2026-03-01"]
 
     def test_read_history_overview(self, populated_db):
         df = db.read_history("1306")
         assert len(df) == 2
         assert "weight_change" in df.columns
+        assert df.iloc[0]["weight_change"] == pytest.approx(0.05)
 
 
 class TestDbMissing:
@@ -242,3 +388,220 @@ class TestDbMissing:
         config.db_path = tmp_path / "nonexistent.db"
         assert not db.db_exists()
         config.db_path = None
+
+
+_V1_SCHEMA_SQL = """\
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE etfs (code TEXT PRIMARY KEY, name_ja TEXT, name_en TEXT, fee REAL);
+CREATE TABLE pcf_info (
+    code TEXT NOT NULL, date TEXT NOT NULL, name TEXT,
+    cash_component REAL, shares_outstanding INTEGER,
+    PRIMARY KEY (code, date)
+);
+CREATE TABLE pcf_holdings (
+    code TEXT NOT NULL, date TEXT NOT NULL, holding_code TEXT NOT NULL,
+    name TEXT, isin TEXT, exchange TEXT, currency TEXT,
+    shares REAL, price REAL, weight REAL,
+    PRIMARY KEY (code, date, holding_code)
+);
+CREATE INDEX idx_holdings_stock ON pcf_holdings(holding_code);
+CREATE TABLE securities (code TEXT PRIMARY KEY, name_ja TEXT, name_en TEXT);
+INSERT INTO meta VALUES ('version', '1');
+INSERT INTO etfs VALUES ('1306', 'TOPIX連動型', 'TOPIX ETF', 0.06);
+INSERT INTO pcf_info VALUES ('1306', '2026-02-28', 'TOPIX ETF', 900.0, 100000);
+INSERT INTO pcf_info VALUES ('1306', '2026-03-01', 'TOPIX ETF', 1000.0, 100000);
+INSERT INTO pcf_holdings VALUES
+    ('1306', '2026-02-28', '7203', 'TOYOTA', 'JP001', 'TSE', 'JPY',
+     1000.0, 2400.0, 0.55),
+    ('1306', '2026-02-28', '6857', 'ADVANTEST', 'JP002', 'TSE', 'JPY',
+     500.0, 4800.0, 0.45),
+    ('1306', '2026-03-01', '7203', 'TOYOTA', 'JP001', 'TSE', 'JPY',
+     1000.0, 2500.0, 0.6),
+    ('1306', '2026-03-01', '6857', 'ADVANTEST', NULL, NULL, NULL,
+     500.0, 5000.0, 0.4);
+INSERT INTO securities VALUES ('7203', 'トヨタ自動車', NULL);
+"""
+
+
+class TestMigration:
+    @pytest.fixture()
+    def v1_db(self, tmp_path):
+        db_file = tmp_path / "v1.db"
+        original = config.db_path
+        config.db_path = db_file
+        conn = db.get_connection(readonly=False)
+        conn.executescript(_V1_SCHEMA_SQL)
+        yield conn
+        conn.close()
+        config.db_path = original
+
+    def test_detects_v1(self, v1_db):
+        assert db.schema_version(v1_db) == 1
+
+    def test_init_schema_migrates(self, v1_db):
+        db.init_schema(v1_db)
+        assert db.schema_version(v1_db) == db.SCHEMA_VERSION
+        row = v1_db.execute("SELECT value FROM meta WHERE key='version'").fetchone()
+        assert row["value"] == str(db.SCHEMA_VERSION)
+        tables = {
+            r["name"]
+            for r in v1_db.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        }
+        assert not any(t.endswith("_v1") for t in tables)
+
+    def test_reads_match_after_migration(self, v1_db):
+        db.init_schema(v1_db)
+        info = db.read_etf_info("1306")
+        assert info == ETFInfo(
+            code="1306",
+            name="TOPIX ETF",
+            cash_component=1000.0,
+            shares_outstanding=100000,
+            date=datetime.date(2026, 3, 1),
+        )
+        holdings = db.read_holdings("1306")
+        assert [h.code for h in holdings] == ["7203", "6857"]
+        assert holdings[1].isin == ""  # NULL in v1 reads back as ""
+        assert db.read_etf_dates("1306") == [
+            datetime.date(2026, 3, 1),
+            datetime.date(2026, 2, 28),
+        ]
+        assert list(db.read_history("1306", "6857")["price"]) == [4800.0, 5000.0]
+        assert db.read_etf_fee("1306") == 0.06
+
+    def test_securities_names_preserved(self, v1_db):
+        db.init_schema(v1_db)
+        row = v1_db.execute(
+            "SELECT name_ja FROM securities WHERE code='7203'"
+        ).fetchone()
+        assert row["name_ja"] == "トヨタ自動車"
+
+    def test_migrate_noop_on_current(self, tmp_path):
+        config.db_path = tmp_path / "v2.db"
+        conn = db.get_connection(readonly=False)
+        db.init_schema(conn)
+        assert db.migrate(conn) == db.SCHEMA_VERSION
+        conn.close()
+        config.db_path = None
+
+
+_TABLES = (
+    "meta",
+    "etfs",
+    "securities",
+    "instruments",
+    "pcf_info",
+    "pcf_holdings",
+    "etf_metrics",
+)
+
+
+def _dump(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {
+            t: sorted(conn.execute(f"SELECT * FROM {t}").fetchall(), key=repr)
+            for t in _TABLES
+        }
+    finally:
+        conn.close()
+
+
+class TestPatches:
+    @pytest.fixture()
+    def base_and_new(self, populated_db, tmp_path):
+        """(base, new): the populated DB before and after one more day."""
+        conn = populated_db
+        db.update_meta(conn, "updated_at", "A")
+        conn.commit()
+        base = tmp_path / "base.db"
+        shutil.copyfile(config.db_path, base)
+
+        db.insert_pcf_info(conn, "1306", "2026-03-02", name="TOPIX ETF")
+        holdings = [
+            Holding("7203", "TOYOTA", "JP001", "TSE", "JPY", 900.0, 2600.0, 0.5),
+            Holding("9984", "SOFTBANK", "JP003", "TSE", "JPY", 100.0, 9000.0, 0.5),
+        ]
+        db.insert_holdings(conn, "1306", "2026-03-02", holdings)
+        db.upsert_etf(conn, "1306", fee=0.05)
+        db.update_meta(conn, "updated_at", "B")
+        conn.commit()
+        return base, config.db_path
+
+    def test_patch_holds_only_new_rows(self, base_and_new, tmp_path):
+        base, new = base_and_new
+        patch = tmp_path / "patch.db"
+        assert build_patch(new, base, patch)
+        rows = _dump(patch)
+        assert len(rows["pcf_info"]) == 1
+        assert len(rows["pcf_holdings"]) == 2
+        assert [r[1] for r in rows["securities"]] == ["9984"]
+        assert rows["etfs"] == [("1306", "TOPIX連動型", "TOPIX ETF", 0.05)]
+
+    def test_apply_reproduces_new_db(self, base_and_new, tmp_path):
+        base, new = base_and_new
+        patch = tmp_path / "patch.db"
+        build_patch(new, base, patch)
+        conn = sqlite3.connect(base)
+        apply_patches(conn, [patch])
+        conn.close()
+        assert _dump(base) == _dump(new)
+
+    def test_apply_is_all_or_nothing(self, base_and_new, tmp_path):
+        base, new = base_and_new
+        patch = tmp_path / "patch.db"
+        build_patch(new, base, patch)
+        broken = tmp_path / "broken.db"
+        sqlite3.connect(broken).close()  # no tables
+        before = _dump(base)
+        conn = sqlite3.connect(base)
+        with pytest.raises(sqlite3.OperationalError):
+            apply_patches(conn, [patch, broken])
+        conn.close()
+        assert _dump(base) == before
+
+    def test_lagging_etf_snapshot_is_included(self, base_and_new, tmp_path):
+        base, new = base_and_new
+        # 2644's 2026-03-01 PCF arrives after the base already has 1306 on
+        # 2026-03-02, the newest date there.
+        shutil.copyfile(new, base)
+        conn = db.get_connection(readonly=False)
+        db.insert_pcf_info(conn, "2644", "2026-03-01", name="SEMI")
+        h = Holding("6857", "ADVANTEST", "JP002", "TSE", "JPY", 10.0, 5000.0, 1.0)
+        db.insert_holdings(conn, "2644", "2026-03-01", [h])
+        conn.commit()
+        conn.close()
+
+        patch = tmp_path / "patch.db"
+        assert build_patch(new, base, patch)
+        rows = _dump(patch)
+        assert len(rows["pcf_info"]) == 1
+        assert len(rows["pcf_holdings"]) == 1
+        conn = sqlite3.connect(base)
+        apply_patches(conn, [patch])
+        conn.close()
+        assert _dump(base) == _dump(new)
+
+    def test_no_patch_without_base(self, base_and_new, tmp_path):
+        _, new = base_and_new
+        assert not build_patch(new, tmp_path / "missing.db", tmp_path / "p.db")
+        assert not (tmp_path / "p.db").exists()
+
+    def test_base_without_metrics_table(self, base_and_new, tmp_path):
+        base, new = base_and_new
+        conn = sqlite3.connect(new)
+        conn.execute(
+            "INSERT INTO etf_metrics (date, etf_id, return_1m) VALUES (20514, 1, 2.5)"
+        )
+        conn.commit()
+        conn.close()
+        conn = sqlite3.connect(base)
+        conn.execute("DROP TABLE etf_metrics")  # built by an older release
+        conn.close()
+
+        patch = tmp_path / "patch.db"
+        assert build_patch(new, base, patch)
+        conn = sqlite3.connect(base)
+        apply_patches(conn, [patch])
+        conn.close()
+        assert _dump(base) == _dump(new)
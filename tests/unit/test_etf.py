@@ -1,4 +1,8 @@
 import datetime
+import importlib
+import sqlite3
+import threading
+import time
 import warnings
 from unittest.mock import call, patch
 
@@ -6,6 +10,8 @@ import pandas as pd
 import pytest
 
 from pyjpx_etf import ETF, config
+from pyjpx_etf._internal import db
+from pyjpx_etf.etf import _ensure_db
 from pyjpx_etf.models import ETFInfo, Holding
 
 MOCK_CSV = """\
@@ -148,8 +154,8 @@ class TestETFNav:
         mock_fetch.assert_called_once()
 
 
-@patch("pyjpx_etf.etf.get_rakuten_data", return_value={})
-@patch("pyjpx_etf.etf.get_fees", return_value={"1306": 0.06})
+@patch("pyjpx_etf.etf.get_rakuten_entry", return_value=None)
+@patch("pyjpx_etf.etf.get_fee", side_effect={"1306": 0.06}.get)
 @patch("pyjpx_etf.etf.fetch_pcf", return_value=MOCK_CSV)
 @patch("pyjpx_etf.etf.get_japanese_names", return_value={})
 class TestETFFee:
@@ -182,11 +188,8 @@ class TestETFFee:
         mock_fetch.assert_not_called()
 
 
-@patch(
-    "pyjpx_etf.etf.get_rakuten_data",
-    return_value={"9999": {"fee": 0.33}},
-)
-@patch("pyjpx_etf.etf.get_fees", return_value={"1306": 0.06})
+@patch("pyjpx_etf.etf.get_rakuten_entry", side_effect={"9999": {"fee": 0.33}}.get)
+@patch("pyjpx_etf.etf.get_fee", side_effect={"1306": 0.06}.get)
 @patch("pyjpx_etf.etf.fetch_pcf", return_value=MOCK_CSV)
 @patch("pyjpx_etf.etf.get_japanese_names", return_value={})
 class TestETFFeeFallback:
@@ -319,6 +322,15 @@ class TestETFFromDB:
         e = ETF("1306")
         assert repr(e) == "ETF('1306')"
 
+    def test_ja_does_not_load_master(
+        self, mock_names, mock_info, mock_holdings, mock_exists
+    ):
+        # The DB read already resolved Japanese names in SQL.
+        config.lang = "ja"
+        e = ETF("1306")
+        assert e.holdings == MOCK_DB_HOLDINGS
+        mock_names.assert_not_called()
+
 
 @patch("pyjpx_etf.etf.db.db_exists", return_value=True)
 @patch("pyjpx_etf.etf.db.read_holdings", return_value=MOCK_DB_HOLDINGS)
@@ -380,10 +392,58 @@ class TestETFDBFallback:
         mock_fetch.assert_called_once_with("9999")
 
 
+@patch("pyjpx_etf.etf.db.db_exists", return_value=True)
+@patch("pyjpx_etf.etf.db.read_holdings", return_value=MOCK_DB_HOLDINGS)
+@patch("pyjpx_etf.etf.db.read_etf_info", return_value=MOCK_DB_INFO)
+@patch("pyjpx_etf.etf.fetch_pcf", return_value=MOCK_CSV)
+@patch("pyjpx_etf.etf.get_japanese_names", return_value={})
+class TestETFSnapshot:
+    """date= / as_of= read a past snapshot from the DB, never live."""
+
+    def setup_method(self):
+        config.lang = "en"
+
+    def test_date(self, mock_names, mock_fetch, mock_info, mock_holdings, mock_exists):
+        e = ETF("1306", date=datetime.date(2026, 3, 1))
+        assert e.holdings == MOCK_DB_HOLDINGS
+        mock_info.assert_called_once_with("1306", "2026-03-01", as_of=False)
+        mock_holdings.assert_called_once_with("1306", "2026-03-01")
+        assert repr(e) == "ETF('1306', date='2026-03-01')"
+
+    def test_as_of_reads_holdings_of_found_date(
+        self, mock_names, mock_fetch, mock_info, mock_holdings, mock_exists
+    ):
+        e = ETF("1306", as_of="2026-03-09")
+        assert e.info == MOCK_DB_INFO
+        mock_info.assert_called_once_with("1306", "2026-03-09", as_of=True)
+        mock_holdings.assert_called_once_with("1306", MOCK_DB_INFO.date.isoformat())
+        assert repr(e) == "ETF('1306', as_of='2026-03-09')"
+
+    def test_missing_snapshot_does_not_go_live(
+        self, mock_names, mock_fetch, mock_info, mock_holdings, mock_exists
+    ):
+        from pyjpx_etf.exceptions import ETFNotFoundError
+
+        mock_info.return_value = None
+        with pytest.raises(ETFNotFoundError, match="on or before 2020-01-01"):
+            _ = ETF("1306", as_of="2020-01-01").info
+        mock_fetch.assert_not_called()
+
+    def test_invalid_arguments(
+        self, mock_names, mock_fetch, mock_info, mock_holdings, mock_exists
+    ):
+        with pytest.raises(ValueError, match="not both"):
+            ETF("1306", date="2026-03-01", as_of="2026-03-01")
+        with pytest.raises(ValueError, match="live"):
+            ETF("1306", date="2026-03-01", live=True)
+        with pytest.raises(ValueError):
+            ETF("1306", date="2026/03/01")
+
+
 @patch("pyjpx_etf.etf.db.db_exists", return_value=True)
 @patch("pyjpx_etf.etf.db.read_etf_fee", return_value=0.06)
-@patch("pyjpx_etf.etf.get_fees", return_value={})
-@patch("pyjpx_etf.etf.get_rakuten_data", return_value={})
+@patch("pyjpx_etf.etf.get_fee", return_value=None)
+@patch("pyjpx_etf.etf.get_rakuten_entry", return_value=None)
 class TestETFFeeFromDB:
     """When DB has fee, uses it without hitting JPX/Rakuten."""
 
@@ -394,3 +454,158 @@ class TestETFFeeFromDB:
         e = ETF("1306")
         assert e.fee == 0.06
         mock_fees.assert_not_called()
+
+
+_etf_mod = importlib.import_module("pyjpx_etf.etf")
+_sync_mod = importlib.import_module("pyjpx_etf.sync")
+
+
+def _write_db(updated_at):
+    conn = db.get_connection(readonly=False)
+    db.init_schema(conn)
+    db.update_meta(conn, "updated_at", updated_at)
+    conn.commit()
+    conn.close()
+
+
+class TestEnsureDb:
+    """``_ensure_db`` itself (the autouse fixture patches it out elsewhere)."""
+
+    @pytest.fixture(autouse=True)
+    def _config(self, monkeypatch):
+        monkeypatch.setattr(config, "background_sync", True)
+        self.refreshed = []
+        monkeypatch.setattr(config, "on_db_refresh", self.refreshed.append)
+        yield
+        if _etf_mod._sync_thread is not None:
+            _etf_mod._sync_thread.join(timeout=5)
+            _etf_mod._sync_thread = None
+
+    def test_missing_db_blocks(self):
+        with patch.object(_sync_mod, "sync", side_effect=lambda **kw: _write_db("B")):
+            _ensure_db()
+            assert db.db_exists()
+        assert _etf_mod._sync_thread is None
+        assert self.refreshed == [config.db_path]
+
+    def test_stale_db_served_while_syncing(self):
+        _write_db("A")
+        release = threading.Event()
+
+        def slow_sync(**kwargs):
+            assert kwargs["quiet"] is True
+            release.wait(timeout=5)
+            _write_db("B")
+
+        with patch.object(_sync_mod, "sync", side_effect=slow_sync):
+            _ensure_db()  # returns while the sync is still waiting
+            assert self.refreshed == []
+            release.set()
+            _etf_mod._sync_thread.join(timeout=5)
+        assert self.refreshed == [config.db_path]
+
+    def test_old_schema_db_blocks(self):
+        conn = sqlite3.connect(config.db_path)
+        conn.execute("CREATE TABLE pcf_holdings (code TEXT, holding_code TEXT)")
+        conn.close()
+
+        def replace_db(**kwargs):
+            config.db_path.unlink()
+            _write_db("B")
+
+        with patch.object(_sync_mod, "sync", side_effect=replace_db):
+            _ensure_db()
+            assert db.is_current_schema(config.db_path)
+        assert _etf_mod._sync_thread is None
+
+    def test_no_hook_when_unchanged(self):
+        _write_db("A")
+        with patch.object(_sync_mod, "sync"):
+            _ensure_db()
+            _etf_mod._sync_thread.join(timeout=5)
+        assert self.refreshed == []
+
+    def test_sync_failure_is_silent(self):
+        _write_db("A")
+        with patch.object(_sync_mod, "sync", side_effect=RuntimeError("offline")):
+            _ensure_db()
+            _etf_mod._sync_thread.join(timeout=5)
+        assert self.refreshed == []
+
+    def test_runs_once(self):
+        with patch.object(_sync_mod, "sync") as mock_sync:
+            _ensure_db()
+            _ensure_db()
+        mock_sync.assert_called_once()
+
+    def test_concurrent_first_calls_wait_for_one_sync(self, monkeypatch):
+        monkeypatch.setattr(config, "background_sync", False)
+        release = threading.Event()
+
+        def slow_sync(**kwargs):
+            release.wait(timeout=5)
+            _write_db("B")
+
+        seen = []
+
+        def first_call():
+            _ensure_db()
+            seen.append(db.db_exists())
+
+        with patch.object(_sync_mod, "sync", side_effect=slow_sync) as mock_sync:
+            threads = [threading.Thread(target=first_call) for _ in range(8)]
+            for t in threads:
+                t.start()
+            release.set()
+            for t in threads:
+                t.join(timeout=5)
+        mock_sync.assert_called_once()
+        assert seen == [True] * 8
+
+
+@patch("pyjpx_etf.etf.get_japanese_names", return_value={})
+class TestConcurrentLoad:
+    """Stress: threads sharing one ETF, and many ETFs loading at once."""
+
+    def setup_method(self):
+        config.lang = "en"
+
+    def _run(self, target, n=16):
+        barrier = threading.Barrier(n)
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait(timeout=5)
+                target()
+            except Exception as e:  # collected; asserts in threads don't fail tests
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(n)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+        assert errors == []
+
+    def test_shared_instance_loads_once(self, mock_master):
+        calls = []
+
+        def slow_fetch(code):
+            calls.append(code)
+            time.sleep(0.01)
+            return MOCK_CSV
+
+        e = ETF("1306")
+        results = []
+        with patch("pyjpx_etf.etf.fetch_pcf", side_effect=slow_fetch):
+            self._run(lambda: results.append((e.info.code, len(e.holdings))))
+        assert calls == ["1306"]
+        assert results == [("1306", 2)] * 16
+
+    def test_many_instances(self, mock_master):
+        results = []
+        with patch("pyjpx_etf.etf.fetch_pcf", return_value=MOCK_CSV) as mock_fetch:
+            self._run(lambda: results.append(ETF("1306").nav))
+        assert mock_fetch.call_count == 16
+        assert len(set(results)) == 1
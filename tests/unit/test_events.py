@@ -0,0 +1,212 @@
+import time
+import warnings
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pyjpx_etf import ETF, config
+from pyjpx_etf._internal import _trace, db
+from pyjpx_etf._internal._cache import TieredCache
+from pyjpx_etf._internal._trace import _NO_SPAN, span, traced
+from pyjpx_etf._internal.cache_store import SQLiteStore
+from pyjpx_etf._internal.fetcher import fetch_pcf
+from pyjpx_etf._internal.parser import parse_pcf
+from pyjpx_etf.events import Event
+from pyjpx_etf.exceptions import FetchError
+from pyjpx_etf.models import Holding
+
+VALID_CSV = """\
+ETF Code,ETF Name,Fund Cash Component,Shares Outstanding,Fund Date
+1306,TOPIX ETF,496973797639.0,8133974978,20260227
+
+Code,Name,ISIN,Exchange,Currency,Shares Amount,Stock Price
+1332,NISSUI CORPORATION,JP3718800000,TSE,JPY,7647000.0,1506.5
+7203,TOYOTA MOTOR,JP3633400001,TSE,JPY,3000000.0,2500.0
+"""
+
+
+@pytest.fixture
+def events():
+    received: list[Event] = []
+    config.on_event = received.append
+    yield received
+    config.on_event = None
+
+
+def _ops(events: list[Event]) -> list[str]:
+    return [e.operation for e in events]
+
+
+class TestSpan:
+    def test_off_by_default(self):
+        assert config.on_event is None
+        assert span("x") is _NO_SPAN
+        with span("x") as s:
+            s.rows = 3  # ignored
+
+    def test_event_fields(self, events):
+        before = time.time()
+        with span("op", "1306") as s:
+            s.rows, s.bytes, s.cache, s.provider = 2, 10, "hit", "db"
+        (event,) = events
+        assert event.operation == "op"
+        assert event.code == "1306"
+        assert (event.rows, event.bytes, event.cache, event.provider) == (
+            2,
+            10,
+            "hit",
+            "db",
+        )
+        assert event.start >= before
+        assert event.duration >= 0
+        assert event.error is None
+        assert event.to_dict()["operation"] == "op"
+
+    def test_error(self, events):
+        with pytest.raises(ValueError):
+            with span("op"):
+                raise ValueError("boom")
+        assert events[0].error == "ValueError: boom"
+
+    def test_failing_hook_warns_once(self, monkeypatch):
+        monkeypatch.setattr(_trace, "_warned_hook", None)
+
+        def hook(event):
+            raise RuntimeError("exporter down")
+
+        config.on_event = hook
+        try:
+            with pytest.warns(RuntimeWarning, match="exporter down"):
+                with span("op"):
+                    pass
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                with span("op"):
+                    pass
+        finally:
+            config.on_event = None
+
+    def test_failing_hook_keeps_the_original_error(self, monkeypatch):
+        monkeypatch.setattr(_trace, "_warned_hook", None)
+        config.on_event = lambda event: 1 / 0
+        try:
+            with pytest.warns(RuntimeWarning), pytest.raises(ValueError, match="boom"):
+                with span("op"):
+                    raise ValueError("boom")
+        finally:
+            config.on_event = None
+
+    def test_traced(self, events):
+        @traced("lookup")
+        def lookup(code):
+            return [1, 2, 3]
+
+        assert lookup("7203") == [1, 2, 3]
+        assert events[0].code == "7203"
+        assert events[0].rows == 3
+
+
+class TestLayers:
+    @patch("requests.get")
+    def test_fetch_and_parse(self, mock_get, events, monkeypatch):
+        resp = MagicMock(status_code=200, text=VALID_CSV, content=VALID_CSV.encode())
+        mock_get.return_value = resp
+        monkeypatch.setattr(config, "provider_urls", ["https://pcf.example.com/{code}"])
+        parse_pcf(fetch_pcf("1306"))
+        fetch, parse = events
+        assert fetch.operation == "fetch_pcf"
+        assert fetch.provider == "pcf.example.com"
+        assert fetch.bytes == len(VALID_CSV)
+        assert (parse.operation, parse.code, parse.rows) == ("parse_pcf", "1306", 2)
+
+    def test_fetch_error(self, events, monkeypatch):
+        monkeypatch.setattr(config, "provider_urls", [])
+        with pytest.raises(FetchError):
+            fetch_pcf("1306")
+        assert events[0].error == "FetchError: No provider URLs configured"
+
+    def test_db_reads_and_load(self, tmp_path, events, monkeypatch):
+        config.db_path = tmp_path / "pcf.db"
+        monkeypatch.setattr(config, "lang", "en")
+        conn = db.get_connection(readonly=False)
+        db.init_schema(conn)
+        h = Holding("7203", "TOYOTA", "JP1", "TSE", "JPY", 100.0, 2500.0, 1.0)
+        db.insert_pcf_info(conn, "1306", "2026-03-02", name="TOPIX", cash_component=0)
+        db.insert_holdings(conn, "1306", "2026-03-02", [h])
+        conn.commit()
+        conn.close()
+        assert (events[0].operation, events[0].rows) == ("insert_holdings", 1)
+
+        events.clear()
+        assert ETF("1306").holdings == [h]
+        assert _ops(events) == ["read_etf_info", "read_holdings", "etf_load"]
+        load = events[-1]
+        assert (load.code, load.provider, load.rows) == ("1306", "db", 1)
+
+        events.clear()
+        db.search_rows("7203")
+        assert (events[0].operation, events[0].code) == ("search_rows", "7203")
+
+    def test_cache(self, tmp_path, events):
+        cache = TieredCache(
+            tmp_path / "c",
+            3600,
+            "fees",
+            lambda: {"1306": 0.06},
+            store=SQLiteStore("fees"),
+        )
+        cache.get()
+        cache.get()
+        assert _ops(events) == ["cache_fetch", "cache_get", "cache_get"]
+        assert [e.cache for e in events[1:]] == ["miss", "hit"]
+        assert events[0].rows == 1
+        assert events[0].code == "fees"
+
+    def test_failing_hook_keeps_fetched_data(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(_trace, "_warned_hook", None)
+
+        def hook(event):
+            if event.operation == "cache_fetch":
+                raise RuntimeError("exporter down")
+
+        cache = TieredCache(
+            tmp_path / "c",
+            3600,
+            "fees",
+            lambda: {"1306": 0.06},
+            store=SQLiteStore("fees"),
+        )
+        config.on_event = hook
+        try:
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                assert cache.get() == {"1306": 0.06}
+        finally:
+            config.on_event = None
+        assert [w.category for w in caught] == [RuntimeWarning]
+        assert not cache.status().stale
+        assert cache.status().failures == 0
+        assert SQLiteStore("fees").read(tmp_path / "c")[1] == {"1306": 0.06}
+
+    def test_cache_failure(self, tmp_path, events):
+        def fail():
+            raise ConnectionError("down")
+
+        cache = TieredCache(
+            tmp_path / "c", 3600, "names", fail, store=SQLiteStore("names")
+        )
+        with pytest.warns(Warning):
+            cache.get()
+        cache.get()  # backing off
+        assert events[0].error == "ConnectionError: down"
+        assert events[-1].cache == "stale"
+
+    def test_sync_fresh_db(self, tmp_path, events):
+        from pyjpx_etf.sync import sync
+
+        config.db_path = tmp_path / "pcf.db"
+        conn = db.get_connection(readonly=False)
+        db.init_schema(conn)
+        conn.close()
+        sync(quiet=True)
+        assert (events[0].operation, events[0].cache) == ("sync", "hit")
@@ -2,7 +2,10 @@ import json
 import time
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 from pyjpx_etf._internal import fees
+from pyjpx_etf.exceptions import StaleDataWarning
 
 MOCK_HTML = """
 <html><body>
@@ -43,30 +46,7 @@ def _mock_get_ok(html=MOCK_HTML):
 def _reset(tmp_path, monkeypatch):
     """Reset memory cache and redirect disk cache to tmp_path."""
     fees._reset_cache()
-    monkeypatch.setattr(fees._cache, "_disk_path", tmp_path / "fees.json")
-
-
-class TestParseFeeString:
-    def test_simple_percentage(self):
-        assert fees._parse_fee_string("0.06%") == 0.06
-
-    def test_with_footnote(self):
-        assert fees._parse_fee_string("0.06%（注10）") == 0.06
-
-    def test_fullwidth_percent(self):
-        assert fees._parse_fee_string("0.048％") == 0.048
-
-    def test_integer_percentage(self):
-        assert fees._parse_fee_string("1%") == 1.0
-
-    def test_returns_none_for_non_string(self):
-        assert fees._parse_fee_string(None) is None
-
-    def test_returns_none_for_no_match(self):
-        assert fees._parse_fee_string("N/A") is None
-
-    def test_returns_none_for_nan(self):
-        assert fees._parse_fee_string("nan") is None
+    monkeypatch.setattr(fees._cache, "_disk_path", tmp_path / "cache.db")
 
 
 class TestParseFeeHtml:
@@ -93,40 +73,84 @@ class TestParseFeeHtml:
         result = fees._parse_fee_html(html)
         assert result == {}
 
+    def test_only_code_and_fee_columns_matter(self):
+        html = """
+        <table>
+        <thead><tr><td>コード</td><td>銘柄名</td><td>信託 報酬（税込）</td></tr></thead>
+        <tbody>
+        <tr><td><a href="#">200A</a></td><td>NF 半導体</td><td>0.1815%</td></tr>
+        <tr><td>-</td><td>注記</td><td>0.5%</td></tr>
+        <tr><td>1321</td><td>日経225</td><td>-</td></tr>
+        </tbody>
+        </table>
+        <table><tr><th>コード</th><th>信託報酬</th></tr>
+        <tr><td>1306</td><td>0.06%</td></tr></table>
+        """
+        assert fees._parse_fee_html(html) == {"200A": 0.1815, "1306": 0.06}
+
+    def test_expands_rowspan_and_colspan(self):
+        html = """
+        <table>
+        <tr><th colspan="2">区分</th><th>コード</th><th>信託報酬</th></tr>
+        <tr><td rowspan="2">国内</td><td>株式</td><td>1306</td><td>0.06%</td></tr>
+        <tr><td>株式</td><td>1321</td><td>0.11%</td></tr>
+        </table>
+        """
+        assert fees._parse_fee_html(html) == {"1306": 0.06, "1321": 0.11}
+
 
 class TestGetFees:
-    @patch("pyjpx_etf._internal.fees.requests.get", return_value=_mock_get_ok())
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_returns_fee_dict(self, mock_get, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         result = fees.get_fees()
         assert result["1306"] == 0.06
         assert result["2644"] == 0.4125
 
-    @patch("pyjpx_etf._internal.fees.requests.get", return_value=_mock_get_ok())
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_caches_in_memory(self, mock_get, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         fees.get_fees()
         fees.get_fees()
         mock_get.assert_called_once()
 
-    @patch("pyjpx_etf._internal.fees.requests.get")
+    @patch("requests.get")
     def test_graceful_degradation(self, mock_get, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         mock_get.side_effect = Exception("network error")
-        result = fees.get_fees()
+        with pytest.warns(StaleDataWarning, match="no cached data"):
+            result = fees.get_fees()
         assert result == {}
 
+    @pytest.mark.parametrize("call", [fees.get_fees, lambda: fees.get_fee("1306")])
+    @patch("requests.get", side_effect=Exception("network error"))
+    def test_warning_points_at_caller(self, mock_get, call, tmp_path, monkeypatch):
+        _reset(tmp_path, monkeypatch)
+        with pytest.warns(StaleDataWarning) as record:
+            call()
+        assert record[0].filename == __file__
+
+
+class TestGetFee:
+    @patch("requests.get", return_value=_mock_get_ok())
+    def test_single_code_from_disk(self, mock_get, tmp_path, monkeypatch):
+        _reset(tmp_path, monkeypatch)
+        fees.get_fees()
+        fees._reset_cache()
+        assert fees.get_fee("1306") == 0.06
+        assert fees.get_fee("9999") is None
+        mock_get.assert_called_once()
+        assert fees._cache._memory is None
+
 
 class TestFeeDiskCache:
-    @patch("pyjpx_etf._internal.fees.requests.get", return_value=_mock_get_ok())
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_writes_disk_cache(self, mock_get, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         fees.get_fees()
-        cache_file = tmp_path / "fees.json"
-        assert cache_file.exists()
-        data = json.loads(cache_file.read_text(encoding="utf-8"))
-        assert "timestamp" in data
-        assert data["fees"]["1306"] == 0.06
+        assert (tmp_path / "cache.db").exists()
+        _, data = fees._cache._read_disk()
+        assert data["1306"] == 0.06
 
     def test_reads_fresh_disk_cache(self, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
@@ -141,7 +165,7 @@ class TestFeeDiskCache:
         result = fees.get_fees()
         assert result["1306"] == 0.06
 
-    @patch("pyjpx_etf._internal.fees.requests.get", return_value=_mock_get_ok())
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_expired_disk_cache_triggers_fetch(self, mock_get, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         cache_file = tmp_path / "fees.json"
@@ -157,7 +181,7 @@ class TestFeeDiskCache:
         assert result["1306"] == 0.06
         mock_get.assert_called_once()
 
-    @patch("pyjpx_etf._internal.fees.requests.get", return_value=_mock_get_ok())
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_refresh_bypasses_all_caches(self, mock_get, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         fees._cache._memory = {"1306": 99.0}
@@ -178,7 +202,7 @@ class TestFeeDiskCache:
         cache_file = tmp_path / "fees.json"
         cache_file.write_text("not json", encoding="utf-8")
         with patch(
-            "pyjpx_etf._internal.fees.requests.get",
+            "requests.get",
             return_value=_mock_get_ok(),
         ):
             result = fees.get_fees()
@@ -45,7 +45,7 @@ class TestLooksLikeCSV:
 
 
 @patch("pyjpx_etf._internal.fetcher.config")
-@patch("pyjpx_etf._internal.fetcher.requests.get")
+@patch("requests.get")
 class TestFetchPCF:
     def _setup_config(self, mock_config, urls=None):
         mock_config.provider_urls = (
@@ -0,0 +1,88 @@
+"""Import-time regression tests: the package and CLI start without pandas."""
+
+import subprocess
+import sys
+
+import pytest
+
+import pyjpx_etf
+
+# Too slow to import for ``etf --version`` or a single lookup.
+HEAVY = {"pandas", "numpy", "requests", "lxml", "xlrd"}
+
+
+def _imported(code: str) -> dict[str, int]:
+    """Run *code* under ``python -X importtime``; return ``{module: cumulative_us}``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def _heavy(modules: dict[str, int]) -> set[str]:
+    return {name.split(".")[0] for name in modules} & HEAVY
+
+
+class TestImportTime:
+    def test_package_import_is_light(self):
+        assert _heavy(_imported("import pyjpx_etf")) == set()
+
+    def test_version_is_light(self):
+        modules = _imported(
+            "import sys; sys.argv = ['etf', '--version']; "
+            "from pyjpx_etf.cli import main; main()"
+        )
+        assert "pyjpx_etf.etf" not in modules
+        assert _heavy(modules) == set()
+
+    @pytest.mark.parametrize(
+        "handler",
+        [
+            "cli_show",
+            "cli_db",
+            "cli_rank",
+            "cli_serve",
+            "cli_bench",
+            "server",
+            "profiling",
+        ],
+    )
+    def test_cli_handlers_are_light(self, handler):
+        modules = _imported(f"import pyjpx_etf._internal.{handler}")
+        assert _heavy(modules) == set()
+
+    def test_public_functions_still_load(self):
+        modules = _imported("import pyjpx_etf; pyjpx_etf.ranking")
+        assert "pandas" in modules
+
+
+class TestLazyAttributes:
+    def test_functions_not_shadowed_by_submodules(self):
+        import pyjpx_etf.as_of
+        import pyjpx_etf.history
+        import pyjpx_etf.ranking
+        import pyjpx_etf.search
+        import pyjpx_etf.sync  # noqa: F401
+
+        for name in ("as_of", "history", "ranking", "search", "sync"):
+            assert callable(getattr(pyjpx_etf, name)), name
+            assert not isinstance(getattr(pyjpx_etf, name), type(pyjpx_etf))
+
+    def test_all_names_resolve(self):
+        for name in pyjpx_etf.__all__:
+            assert getattr(pyjpx_etf, name) is not None
+        assert set(pyjpx_etf.__all__) <= set(dir(pyjpx_etf))
+
+    def test_unknown_attribute(self):
+        with pytest.raises(AttributeError):
+            pyjpx_etf.no_such_name  # noqa: B018
@@ -0,0 +1,89 @@
+"""Tests for _internal/_lock.py — inter-process file lock."""
+
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+from pyjpx_etf._internal._lock import (
+    FileLock,
+    lock_path,
+    remove_temp_files,
+    temp_path,
+)
+
+
+class TestFileLock:
+    def test_acquire_release(self, tmp_path):
+        with FileLock(tmp_path / "a.lock", timeout=1) as lock:
+            assert not lock.waited
+        with FileLock(tmp_path / "a.lock", timeout=1) as lock:
+            assert not lock.waited
+
+    def test_excludes_other_process(self, tmp_path):
+        path = tmp_path / "a.lock"
+        holder = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                textwrap.dedent(
+                    f"""
+                    import sys, time
+                    from pathlib import Path
+                    from pyjpx_etf._internal._lock import FileLock
+                    with FileLock(Path({str(path)!r}), timeout=5):
+                        print("locked", flush=True)
+                        time.sleep(0.5)
+                    """
+                ),
+            ],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            assert holder.stdout.readline().strip() == "locked"
+            with pytest.raises(TimeoutError):
+                FileLock(path, timeout=0.1).acquire()
+            with FileLock(path, timeout=5) as lock:
+                assert lock.waited
+        finally:
+            holder.wait(timeout=5)
+
+    def test_excludes_other_thread(self, tmp_path):
+        path = tmp_path / "a.lock"
+        inside = []
+        overlaps = []
+
+        def work(i):
+            with FileLock(path, timeout=5):
+                inside.append(i)
+                time.sleep(0.01)
+                overlaps.append(len(inside) > 1)
+                inside.remove(i)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert overlaps == [False] * 8
+
+
+class TestPaths:
+    def test_lock_path(self, tmp_path):
+        assert lock_path(tmp_path / "pcf.db") == tmp_path / "pcf.db.lock"
+
+    def test_temp_paths_are_unique(self, tmp_path):
+        a, b = temp_path(tmp_path / "pcf.db"), temp_path(tmp_path / "pcf.db")
+        assert a != b
+        assert a.parent == tmp_path and a.name.endswith(".tmp")
+
+    def test_remove_temp_files(self, tmp_path):
+        temp_path(tmp_path / "pcf.db")
+        temp_path(tmp_path / "pcf.db")
+        other = temp_path(tmp_path / "cache.db")
+        remove_temp_files(tmp_path / "pcf.db")
+        assert list(tmp_path.glob("*.tmp")) == [other]
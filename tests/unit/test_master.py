@@ -2,16 +2,25 @@ import json
 import time
 from unittest.mock import MagicMock, patch
 
-import pandas as pd
+import pytest
 
 from pyjpx_etf._internal import master
+from pyjpx_etf.exceptions import StaleDataWarning
 
-MOCK_MASTER_DF = pd.DataFrame(
-    [
-        ["2024/01/01", "1306", "TOPIX連動型上場投資信託", "extra"],
-        ["2024/01/01", "7203", "トヨタ自動車", "extra"],
-    ]
-)
+MOCK_MASTER_ROWS = [
+    ["日付", "コード", "銘柄名", "市場・商品区分"],
+    [20240101.0, "1306", "TOPIX連動型上場投資信託", "ETF・ETN"],
+    [20240101.0, 7203.0, "トヨタ自動車", "プライム（内国株式）"],
+]
+
+
+def _mock_book(rows):
+    """xlrd Book whose first sheet holds *rows*."""
+    sheet = MagicMock()
+    sheet.col_values.side_effect = lambda col: [row[col] for row in rows]
+    book = MagicMock()
+    book.sheet_by_index.return_value = sheet
+    return book
 
 
 def _mock_get_ok():
@@ -24,59 +33,79 @@ def _mock_get_ok():
 def _reset(tmp_path, monkeypatch):
     """Reset memory cache and redirect disk cache to tmp_path."""
     master._reset_cache()
-    monkeypatch.setattr(master._cache, "_disk_path", tmp_path / "master.json")
+    monkeypatch.setattr(master._cache, "_disk_path", tmp_path / "cache.db")
+
+
+class TestParseMasterXls:
+    def test_numeric_codes_as_text(self):
+        with patch(
+            "xlrd.open_workbook",
+            return_value=_mock_book(MOCK_MASTER_ROWS),
+        ) as mock_open:
+            result = master._parse_master_xls(b"xls")
+        mock_open.assert_called_once_with(file_contents=b"xls", on_demand=True)
+        assert result["7203"] == "トヨタ自動車"
+        assert result["1306"] == "TOPIX連動型上場投資信託"
 
 
 class TestGetJapaneseNames:
-    @patch("pyjpx_etf._internal.master.pd.read_excel", return_value=MOCK_MASTER_DF)
-    @patch("pyjpx_etf._internal.master.requests.get", return_value=_mock_get_ok())
+    @patch(
+        "xlrd.open_workbook",
+        return_value=_mock_book(MOCK_MASTER_ROWS),
+    )
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_returns_lookup_dict(self, mock_get, mock_read, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         result = master.get_japanese_names()
         assert result["1306"] == "TOPIX連動型上場投資信託"
         assert result["7203"] == "トヨタ自動車"
 
-    @patch("pyjpx_etf._internal.master.pd.read_excel", return_value=MOCK_MASTER_DF)
-    @patch("pyjpx_etf._internal.master.requests.get", return_value=_mock_get_ok())
+    @patch(
+        "xlrd.open_workbook",
+        return_value=_mock_book(MOCK_MASTER_ROWS),
+    )
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_caches_in_memory(self, mock_get, mock_read, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         master.get_japanese_names()
         master.get_japanese_names()
         mock_get.assert_called_once()
 
-    @patch("pyjpx_etf._internal.master.requests.get")
+    @patch("requests.get")
     def test_graceful_degradation(self, mock_get, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         mock_get.side_effect = Exception("network error")
-        result = master.get_japanese_names()
+        with pytest.warns(StaleDataWarning, match="no cached data"):
+            result = master.get_japanese_names()
         assert result == {}
 
-    @patch("pyjpx_etf._internal.master.pd.read_excel")
-    @patch("pyjpx_etf._internal.master.requests.get", return_value=_mock_get_ok())
-    def test_skips_nan_rows(self, mock_get, mock_read, tmp_path, monkeypatch):
+    @patch("xlrd.open_workbook")
+    @patch("requests.get", return_value=_mock_get_ok())
+    def test_skips_empty_rows(self, mock_get, mock_read, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
-        mock_read.return_value = pd.DataFrame(
+        mock_read.return_value = _mock_book(
             [
-                [None, None, None, None],
-                ["2024/01/01", "1306", "TOPIX連動型上場投資信託", "x"],
+                ["", "", "", ""],
+                ["", "9999", " ", ""],
+                [20240101.0, "1306", "TOPIX連動型上場投資信託", "x"],
             ]
         )
         result = master.get_japanese_names()
-        assert "nan" not in result
-        assert "1306" in result
+        assert result == {"1306": "TOPIX連動型上場投資信託"}
 
 
 class TestDiskCache:
-    @patch("pyjpx_etf._internal.master.pd.read_excel", return_value=MOCK_MASTER_DF)
-    @patch("pyjpx_etf._internal.master.requests.get", return_value=_mock_get_ok())
+    @patch(
+        "xlrd.open_workbook",
+        return_value=_mock_book(MOCK_MASTER_ROWS),
+    )
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_writes_disk_cache(self, mock_get, mock_read, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         master.get_japanese_names()
-        cache_file = tmp_path / "master.json"
-        assert cache_file.exists()
-        data = json.loads(cache_file.read_text(encoding="utf-8"))
-        assert "timestamp" in data
-        assert data["names"]["1306"] == "TOPIX連動型上場投資信託"
+        assert (tmp_path / "cache.db").exists()
+        _, data = master._cache._read_disk()
+        assert data["1306"] == "TOPIX連動型上場投資信託"
 
     def test_reads_fresh_disk_cache(self, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
@@ -91,8 +120,11 @@ class TestDiskCache:
         result = master.get_japanese_names()
         assert result["1306"] == "cached_name"
 
-    @patch("pyjpx_etf._internal.master.pd.read_excel", return_value=MOCK_MASTER_DF)
-    @patch("pyjpx_etf._internal.master.requests.get", return_value=_mock_get_ok())
+    @patch(
+        "xlrd.open_workbook",
+        return_value=_mock_book(MOCK_MASTER_ROWS),
+    )
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_expired_disk_cache_triggers_fetch(
         self, mock_get, mock_read, tmp_path, monkeypatch
     ):
@@ -111,8 +143,11 @@ class TestDiskCache:
         assert result["1306"] == "TOPIX連動型上場投資信託"
         mock_get.assert_called_once()
 
-    @patch("pyjpx_etf._internal.master.pd.read_excel", return_value=MOCK_MASTER_DF)
-    @patch("pyjpx_etf._internal.master.requests.get", return_value=_mock_get_ok())
+    @patch(
+        "xlrd.open_workbook",
+        return_value=_mock_book(MOCK_MASTER_ROWS),
+    )
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_refresh_bypasses_all_caches(
         self, mock_get, mock_read, tmp_path, monkeypatch
     ):
@@ -138,9 +173,10 @@ class TestDiskCache:
         cache_file = tmp_path / "master.json"
         cache_file.write_text("not json", encoding="utf-8")
         with (
-            patch("pyjpx_etf._internal.master.requests.get") as mock_get,
+            patch("requests.get") as mock_get,
             patch(
-                "pyjpx_etf._internal.master.pd.read_excel", return_value=MOCK_MASTER_DF
+                "xlrd.open_workbook",
+                return_value=_mock_book(MOCK_MASTER_ROWS),
             ),
         ):
             mock_get.return_value = _mock_get_ok()
@@ -9,9 +9,11 @@ from pyjpx_etf._internal import db
 from pyjpx_etf._internal.pipeline import (
     _fetch_all_etf_codes,
     _fetch_and_store_pcf,
+    _store_metrics,
     run_pipeline,
 )
 from pyjpx_etf.config import config
+from pyjpx_etf.exceptions import StaleDataWarning
 from pyjpx_etf.models import ETFInfo, Holding
 
 
@@ -68,8 +70,8 @@ class TestFetchAndStorePcf:
         assert result is True
         conn.commit()
 
-        row = conn.execute("SELECT * FROM pcf_info WHERE code='1306'").fetchone()
-        assert row is not None
+        assert db.read_etf_info("1306") == info
+        assert db.read_holdings("1306") == holdings
 
     @patch("pyjpx_etf._internal.fetcher.fetch_pcf", side_effect=Exception("fail"))
     def test_failure_returns_false(self, mock_fetch, tmp_db):
@@ -78,7 +80,52 @@ class TestFetchAndStorePcf:
         assert result is False
 
 
+class TestStoreMetrics:
+    @patch("pyjpx_etf._internal.fees.get_fees", return_value={"1306": 0.05})
+    @patch(
+        "pyjpx_etf._internal.rakuten.get_rakuten_data",
+        return_value={
+            "1306": {"fee": None, "dividend_yield": 1.9, "1m": 2.5, "ytd": 1.0},
+            "1321": {"fee": 0.11, "dividend_yield": 1.5, "1m": -1.0},
+        },
+    )
+    def test_stores_snapshot_with_fee_fallback(self, mock_data, mock_fees, tmp_db):
+        conn, _ = tmp_db
+        _store_metrics(conn, "2026-03-01")
+        conn.commit()
+        rows = conn.execute(
+            "SELECT s.code, m.fee, m.return_1m, m.return_ytd, m.return_3y "
+            "FROM etf_metrics m JOIN securities s ON s.id = m.etf_id ORDER BY s.code"
+        ).fetchall()
+        assert [tuple(r) for r in rows] == [
+            ("1306", 0.05, 2.5, 1.0, None),
+            ("1321", 0.11, -1.0, None, None),
+        ]
+
+    @patch("pyjpx_etf._internal.fees.get_fees", return_value={})
+    def test_skips_when_refresh_failed(self, mock_fees, tmp_db, tmp_path):
+        from pyjpx_etf._internal import cache_store, rakuten
+
+        path = tmp_path / "cache.db"
+        old = {"1306": {"fee": 0.06, "1m": 2.5}}
+        cache_store.SQLiteStore("rakuten").write(path, old, 0.0)  # long expired
+        with (
+            patch.object(rakuten._cache, "_disk_path", path),
+            patch.object(rakuten._cache, "_fetcher", side_effect=OSError("down")),
+        ):
+            rakuten._cache.reset()
+            try:
+                with pytest.warns(StaleDataWarning):
+                    assert rakuten.get_rakuten_data(refresh=True) == old
+                conn, _ = tmp_db
+                _store_metrics(conn, "2026-03-01")
+            finally:
+                rakuten._cache.reset()
+        assert conn.execute("SELECT COUNT(*) FROM etf_metrics").fetchone()[0] == 0
+
+
 class TestRunPipeline:
+    @patch("pyjpx_etf._internal.pipeline._store_metrics")
     @patch("pyjpx_etf._internal.pipeline._store_master_names")
     @patch("pyjpx_etf._internal.pipeline._store_fees")
     @patch("pyjpx_etf._internal.pipeline._fetch_and_store_pcf", return_value=True)
@@ -87,7 +134,7 @@ class TestRunPipeline:
         return_value=["1306"],
     )
     def test_runs_full_pipeline(
-        self, mock_codes, mock_pcf, mock_fees, mock_names, tmp_path
+        self, mock_codes, mock_pcf, mock_fees, mock_names, mock_metrics, tmp_path
     ):
         db_file = tmp_path / "pipeline.db"
         run_pipeline(db_file)
@@ -96,3 +143,4 @@ class TestRunPipeline:
         mock_pcf.assert_called_once()
         mock_fees.assert_called_once()
         mock_names.assert_called_once()
+        mock_metrics.assert_called_once()
@@ -0,0 +1,117 @@
+import io
+import pstats
+from pathlib import Path
+from unittest.mock import patch
+
+from pyjpx_etf import config
+from pyjpx_etf._internal.parser import parse_pcf
+from pyjpx_etf._internal.profiling import pop_profile, profiled
+from pyjpx_etf._internal.synth import pcf_csv
+from pyjpx_etf.cli import main
+
+
+class TestPopProfile:
+    def test_defaults(self):
+        assert pop_profile(["history", "1306", "--profile"], "etf") == (
+            Path("etf.prof"),
+            None,
+            ["history", "1306"],
+        )
+        assert pop_profile(["--memprofile"], "etf") == (None, Path("etf-mem"), [])
+        assert pop_profile(["--profile", "--memprofile", "--en"], "etf") == (
+            Path("etf.prof"),
+            Path("etf-mem"),
+            ["--en"],
+        )
+
+    def test_values(self):
+        profile, memprofile, rest = pop_profile(
+            ["--profile=out.prof", "--memprofile=snaps", "--format", "json"], "etf"
+        )
+        assert profile == Path("out.prof")
+        assert memprofile == Path("snaps")
+        assert rest == ["--format", "json"]
+
+    def test_positional_arguments_are_kept(self):
+        assert pop_profile(["--profile", "1306"], "etf") == (
+            Path("etf.prof"),
+            None,
+            ["1306"],
+        )
+        assert pop_profile(["--memprofile", "history", "1306"], "etf") == (
+            None,
+            Path("etf-mem"),
+            ["history", "1306"],
+        )
+
+
+class TestProfiled:
+    def test_profile(self, tmp_path):
+        out = io.StringIO()
+        path = tmp_path / "run.prof"
+        with profiled(path, out=out):
+            parse_pcf(pcf_csv("1306", 50))
+        assert "cumulative" in out.getvalue()
+        assert "parse_pcf" in out.getvalue()
+        stats = pstats.Stats(str(path))
+        assert any(func[2] == "parse_pcf" for func in stats.stats)
+
+    def test_memprofile_stages(self, tmp_path):
+        events = []
+        config.on_event = events.append
+        try:
+            out = io.StringIO()
+            with profiled(memprofile=tmp_path / "mem", out=out):
+                for _ in range(3):
+                    parse_pcf(pcf_csv("1306", 50))
+            assert config.on_event == events.append
+        finally:
+            config.on_event = None
+
+        assert len(events) == 3  # the existing hook still sees every event
+        report = out.getvalue()
+        assert "parse_pcf" in report
+        assert "Live at exit" in report
+        snaps = sorted(p.name for p in (tmp_path / "mem").iterdir())
+        assert snaps == ["01-parse_pcf.snap", "final.snap"]
+
+    def test_reports_when_block_exits(self, tmp_path):
+        out = io.StringIO()
+        try:
+            with profiled(tmp_path / "x.prof", tmp_path / "mem", out=out):
+                raise SystemExit(1)
+        except SystemExit:
+            pass
+        assert (tmp_path / "x.prof").is_file()
+        assert config.on_event is None
+
+
+class TestCLI:
+    def test_etf_profile(self, tmp_path, capsys):
+        path = tmp_path / "etf.prof"
+        with patch("sys.argv", ["etf", f"--profile={path}", "--version"]):
+            main()
+        captured = capsys.readouterr()
+        assert captured.out.startswith("pyjpx-etf ")
+        assert "cumulative" in captured.err
+        assert path.is_file()
+
+    def test_pipeline_profile(self, tmp_path):
+        from pyjpx_etf._internal import pipeline_cli
+
+        path = tmp_path / "p.prof"
+        argv = [
+            "pcf-pipeline",
+            "--db",
+            str(tmp_path / "pcf.db"),
+            "--profile",
+            str(path),
+        ]
+        with (
+            patch("sys.argv", argv),
+            patch.object(pipeline_cli, "run_pipeline") as run,
+            patch("logging.basicConfig"),
+        ):
+            pipeline_cli.main()
+        run.assert_called_once()
+        assert path.is_file()
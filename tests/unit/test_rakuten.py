@@ -2,7 +2,10 @@ import json
 import time
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 from pyjpx_etf._internal import rakuten
+from pyjpx_etf.exceptions import StaleDataWarning
 
 MOCK_CSV = (
     '"1306.T","01306","TOPIX ETF","東証ETF","TOPIX","0.06","株式","日本","2500",'
@@ -28,7 +31,7 @@ def _mock_get_ok(text=MOCK_CSV):
 def _reset(tmp_path, monkeypatch):
     """Reset memory cache and redirect disk cache to tmp_path."""
     rakuten._reset_cache()
-    monkeypatch.setattr(rakuten._cache, "_disk_path", tmp_path / "rakuten.json")
+    monkeypatch.setattr(rakuten._cache, "_disk_path", tmp_path / "cache.db")
 
 
 class TestNormalizeCode:
@@ -108,39 +111,49 @@ class TestParseRakutenCsv:
         assert result == {}
 
 
+class TestGetRakutenEntry:
+    @patch("requests.get", return_value=_mock_get_ok())
+    def test_single_code_from_disk(self, mock_get, tmp_path, monkeypatch):
+        _reset(tmp_path, monkeypatch)
+        expected = rakuten.get_rakuten_data()["1306"]
+        rakuten._reset_cache()
+        assert rakuten.get_rakuten_entry("1306") == expected
+        assert rakuten.get_rakuten_entry("9999") is None
+        mock_get.assert_called_once()
+
+
 class TestGetRakutenData:
-    @patch("pyjpx_etf._internal.rakuten.requests.get", return_value=_mock_get_ok())
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_returns_data(self, mock_get, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         result = rakuten.get_rakuten_data()
         assert "1306" in result
         assert "2644" in result
 
-    @patch("pyjpx_etf._internal.rakuten.requests.get", return_value=_mock_get_ok())
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_caches_in_memory(self, mock_get, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         rakuten.get_rakuten_data()
         rakuten.get_rakuten_data()
         mock_get.assert_called_once()
 
-    @patch("pyjpx_etf._internal.rakuten.requests.get")
+    @patch("requests.get")
     def test_graceful_degradation(self, mock_get, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         mock_get.side_effect = Exception("network error")
-        result = rakuten.get_rakuten_data()
+        with pytest.warns(StaleDataWarning, match="no cached data"):
+            result = rakuten.get_rakuten_data()
         assert result == {}
 
 
 class TestRakutenDiskCache:
-    @patch("pyjpx_etf._internal.rakuten.requests.get", return_value=_mock_get_ok())
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_writes_disk_cache(self, mock_get, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         rakuten.get_rakuten_data()
-        cache_file = tmp_path / "rakuten.json"
-        assert cache_file.exists()
-        data = json.loads(cache_file.read_text(encoding="utf-8"))
-        assert "timestamp" in data
-        assert "1306" in data["rakuten"]
+        assert (tmp_path / "cache.db").exists()
+        _, data = rakuten._cache._read_disk()
+        assert "1306" in data
 
     def test_reads_fresh_disk_cache(self, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
@@ -157,7 +170,7 @@ class TestRakutenDiskCache:
         result = rakuten.get_rakuten_data()
         assert result["1306"]["fee"] == 0.06
 
-    @patch("pyjpx_etf._internal.rakuten.requests.get", return_value=_mock_get_ok())
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_expired_disk_cache_triggers_fetch(self, mock_get, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         cache_file = tmp_path / "rakuten.json"
@@ -173,7 +186,7 @@ class TestRakutenDiskCache:
         assert result["1306"]["fee"] == 0.06
         mock_get.assert_called_once()
 
-    @patch("pyjpx_etf._internal.rakuten.requests.get", return_value=_mock_get_ok())
+    @patch("requests.get", return_value=_mock_get_ok())
     def test_refresh_bypasses_all_caches(self, mock_get, tmp_path, monkeypatch):
         _reset(tmp_path, monkeypatch)
         rakuten._cache._memory = {"1306": {"fee": 99.0}}
@@ -1,16 +1,21 @@
+import datetime
 import importlib
+import sqlite3
 from unittest.mock import patch
 
+import numpy as np
 import pandas as pd
 import pytest
 
 from pyjpx_etf import config
-from pyjpx_etf.ranking import ranking
+from pyjpx_etf.ranking import ranking, ranking_table
 
 # pyjpx_etf.ranking is shadowed by the function in __init__.py.
 # importlib gives us the actual module for patching.
 _ranking_mod = importlib.import_module("pyjpx_etf.ranking")
 
+PERIODS = ["1m", "3m", "6m", "1y", "3y", "5y", "10y", "ytd"]
+
 MOCK_RAKUTEN = {
     "1306": {
         "name_ja": "TOPIX連動型上場投資信託",
@@ -129,6 +134,132 @@ class TestRanking:
         assert df.iloc[0]["dividend_yield"] == 0.50
 
 
+@patch.object(_ranking_mod, "get_fees", return_value={})
+@patch.object(_ranking_mod, "get_rakuten_data", return_value=MOCK_RAKUTEN)
+class TestRankingTable:
+    def setup_method(self):
+        config.lang = "en"
+
+    def test_columns(self, mock_data, mock_fees):
+        df = ranking_table(["1m", "1y"])
+        assert list(df.columns) == [
+            "code",
+            "name",
+            "fee",
+            "dividend_yield",
+            "1m",
+            "1m_rank",
+            "1m_pct",
+            "1y",
+            "1y_rank",
+            "1y_pct",
+        ]
+        assert df.iloc[0]["name"] == "Semiconductor ETF"
+
+    def test_all_periods_by_default(self, mock_data, mock_fees):
+        df = ranking_table()
+        assert [p for p in PERIODS if p in df.columns] == PERIODS
+
+    def test_ranks_and_percentiles(self, mock_data, mock_fees):
+        df = ranking_table(["1m", "3y"]).set_index("code")
+        assert df["1m_rank"].to_dict() == {"2644": 1, "1306": 2, "1321": 3}
+        assert df.loc["2644", "1m_pct"] == 100.0
+        assert df.loc["1321", "1m_pct"] == pytest.approx(100 / 3)
+        # 2644 has no 3y return: no rank, and not counted for the others
+        assert pd.isna(df.loc["2644", "3y_rank"])
+        assert df.loc["1306", "3y_rank"] == 1
+        assert df.loc["1321", "3y_pct"] == 50.0
+
+    def test_orders_by_first_period(self, mock_data, mock_fees):
+        df = ranking_table(["3y", "1m"])
+        assert list(df["code"]) == ["1306", "1321"]  # 2644 lacks 3y
+
+    def test_composite_score(self, mock_data, mock_fees):
+        df = ranking_table(["1y"], score={"1y": 1, "fee": -1})
+        assert list(df["code"]) == ["2644", "1306", "1321"]
+        assert df.iloc[0]["score"] == pytest.approx(25.00 - 0.41)
+
+    def test_score_needs_every_weighted_value(self, mock_data, mock_fees):
+        df = ranking_table(["1m"], score={"1m": 1, "3y": 0.5})
+        assert "2644" not in set(df["code"])
+
+    def test_top_and_bottom_n(self, mock_data, mock_fees):
+        assert list(ranking_table(["1m"], n=2)["code"]) == ["2644", "1306"]
+        assert list(ranking_table(["1m"], n=-1)["code"]) == ["1321"]
+
+    def test_matches_ranking(self, mock_data, mock_fees):
+        table = ranking_table(["6m"], n=2)
+        single = ranking("6m", n=2)
+        assert list(table["code"]) == list(single["code"])
+        assert list(table["6m"]) == list(single["return"])
+
+    def test_invalid_period_raises(self, mock_data, mock_fees):
+        with pytest.raises(ValueError, match="period must be one of"):
+            ranking_table(["1m", "2y"])
+
+    def test_invalid_score_key_raises(self, mock_data, mock_fees):
+        with pytest.raises(ValueError, match="score keys"):
+            ranking_table(["1m"], score={"name": 1})
+
+
+class TestPreparedFrame:
+    def test_reused_until_source_changes(self):
+        fees = {}
+        with (
+            patch.object(_ranking_mod, "get_fees", return_value=fees),
+            patch.object(
+                _ranking_mod, "get_rakuten_data", return_value=MOCK_RAKUTEN
+            ) as mock_data,
+        ):
+            first = _ranking_mod._rakuten_frame()
+            ranking("1y")
+            ranking("3m", n=-1)
+            assert _ranking_mod._rakuten_frame() is first
+            assert mock_data.call_count == 4  # still asked, so refreshes show
+
+            mock_data.return_value = dict(MOCK_RAKUTEN)  # cache refreshed
+            assert _ranking_mod._rakuten_frame() is not first
+
+    def test_jpx_fee_fills_missing_rakuten_fee(self):
+        data = {
+            "1306": {**MOCK_RAKUTEN["1306"], "fee": None},
+            "1321": MOCK_RAKUTEN["1321"],
+        }
+        with (
+            patch.object(
+                _ranking_mod, "get_fees", return_value={"1306": 0.05, "1321": 0.9}
+            ),
+            patch.object(_ranking_mod, "get_rakuten_data", return_value=data),
+        ):
+            df = ranking(n=0).set_index("code")
+        assert df.loc["1306", "fee"] == 0.05
+        assert df.loc["1321", "fee"] == 0.20  # Rakuten's own fee wins
+
+    def test_no_returns_for_period(self):
+        data = {"2644": MOCK_RAKUTEN["2644"]}
+        with (
+            patch.object(_ranking_mod, "get_fees", return_value={}),
+            patch.object(_ranking_mod, "get_rakuten_data", return_value=data),
+        ):
+            df = ranking("10y")
+        assert df.empty
+        assert list(df.columns) == ["code", "name", "return", "fee", "dividend_yield"]
+
+
+class TestSelect:
+    def test_ties_at_cut_off_keep_data_order(self):
+        values = np.array([1.0] * 20 + [2.0] * 3)
+        assert list(_ranking_mod._select(values, 5)) == [20, 21, 22, 0, 1]
+        assert list(_ranking_mod._select(values, -5)) == [0, 1, 2, 3, 4]
+
+    @pytest.mark.parametrize("n", [3, -3, 0])
+    def test_matches_stable_sort(self, n):
+        values = np.array([2.0, 1.0, np.nan, 2.0, 3.0, 1.0, 2.0])
+        rows = [i for i, v in enumerate(values) if v == v]
+        expected = sorted(rows, key=lambda i: values[i], reverse=n >= 0)
+        assert list(_ranking_mod._select(values, n)) == expected[: abs(n) or None]
+
+
 @patch.object(_ranking_mod, "get_fees", return_value={})
 @patch.object(_ranking_mod, "get_rakuten_data", return_value={})
 class TestRankingEmpty:
@@ -142,3 +273,70 @@ class TestRankingEmpty:
             "fee",
             "dividend_yield",
         ]
+
+
+class TestRankingOnDate:
+    @pytest.fixture(autouse=True)
+    def metrics_db(self, tmp_path):
+        from pyjpx_etf._internal import db
+
+        config.db_path = tmp_path / "pcf.db"
+        conn = db.get_connection(readonly=False)
+        db.init_schema(conn)
+        db.upsert_etf(conn, "1306", name_ja="TOPIX連動型", name_en="TOPIX ETF")
+        db.upsert_etf(conn, "1321", name_ja="日経225連動型", name_en="Nikkei 225 ETF")
+        db.insert_metrics(
+            conn,
+            "2026-03-02",  # Monday
+            {
+                "1306": {"fee": 0.06, "dividend_yield": 1.9, "1m": 2.5, "3y": 30.0},
+                "1321": {"fee": 0.11, "dividend_yield": 1.5, "1m": 4.0},
+            },
+            PERIODS,
+        )
+        db.insert_metrics(
+            conn, "2026-03-03", {"1306": {"1m": 9.0}, "1321": {"1m": 1.0}}, PERIODS
+        )
+        conn.commit()
+        conn.close()
+        config.lang = "en"
+
+    def test_ranks_snapshot_of_that_day(self):
+        df = ranking("1m", date="2026-03-02")
+        assert list(df.columns) == ["code", "name", "return", "fee", "dividend_yield"]
+        assert list(df["code"]) == ["1321", "1306"]
+        assert df.iloc[0]["name"] == "Nikkei 225 ETF"
+        assert df.iloc[0]["fee"] == 0.11
+
+    def test_uses_latest_snapshot_on_or_before(self):
+        assert list(ranking("1m", date="2026-03-08")["return"]) == [9.0, 1.0]
+        assert ranking("1m", date="2026-03-01").empty
+
+    def test_date_object_and_invalid_date(self):
+        day = datetime.date(2026, 3, 2)
+        assert list(ranking("1m", date=day)["code"]) == ["1321", "1306"]
+        for bad in ("2026-13-01", "2026-02-30", "yesterday"):
+            with pytest.raises(ValueError):
+                ranking("1m", date=bad)
+
+    def test_db_without_metrics_table(self):
+        conn = sqlite3.connect(config.db_path)
+        conn.execute("DROP TABLE etf_metrics")  # built by an older release
+        conn.close()
+        assert ranking("1m", date="2026-03-02").empty
+
+    def test_n_and_missing_returns(self):
+        assert list(ranking("1m", n=-1, date="2026-03-02")["code"]) == ["1306"]
+        assert list(ranking("3y", n=0, date="2026-03-02")["code"]) == ["1306"]
+
+    def test_does_not_touch_rakuten(self):
+        with patch.object(_ranking_mod, "get_rakuten_data") as mock_data:
+            ranking("1m", date="2026-03-02")
+        mock_data.assert_not_called()
+
+    def test_missing_db_raises(self, tmp_path):
+        from pyjpx_etf.exceptions import DatabaseError
+
+        config.db_path = tmp_path / "none.db"
+        with pytest.raises(DatabaseError):
+            ranking("1m", date="2026-03-02")
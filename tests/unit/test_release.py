@@ -0,0 +1,130 @@
+"""Tests for _internal/release.py — compressed DB and manifest."""
+
+import hashlib
+import json
+import lzma
+import shutil
+import sqlite3
+
+from pyjpx_etf._internal import db
+from pyjpx_etf._internal.release import MANIFEST_NAME, V1_ASSET, write_artifacts
+from pyjpx_etf.config import _DB_ASSET, config
+from pyjpx_etf.models import Holding
+
+
+def _make_db(path, updated_at="2026-03-02T00:00:00+00:00", day="2026-03-02"):
+    original = config.db_path
+    config.db_path = path
+    conn = db.get_connection(readonly=False)
+    db.init_schema(conn)
+    db.insert_pcf_info(conn, "1306", day, name="TOPIX ETF")
+    db.update_meta(conn, "updated_at", updated_at)
+    conn.commit()
+    conn.close()
+    config.db_path = original
+
+
+class TestWriteArtifacts:
+    def test_writes_xz_and_manifest(self, tmp_path):
+        db_file = tmp_path / "pcf.db"
+        _make_db(db_file)
+        paths = write_artifacts(db_file, tmp_path / "out")
+        names = [p.name for p in paths]
+        assert names == [f"{_DB_ASSET}.xz", V1_ASSET, MANIFEST_NAME]
+
+    def test_xz_roundtrips(self, tmp_path):
+        db_file = tmp_path / "pcf.db"
+        _make_db(db_file)
+        xz_path, _, _ = write_artifacts(db_file, tmp_path / "out")
+        assert lzma.decompress(xz_path.read_bytes()) == db_file.read_bytes()
+
+    def test_manifest_checksum_matches_db(self, tmp_path):
+        db_file = tmp_path / "pcf.db"
+        _make_db(db_file)
+        *_, manifest_path = write_artifacts(db_file, tmp_path / "out")
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        raw = db_file.read_bytes()
+        assert manifest["db"]["sha256"] == hashlib.sha256(raw).hexdigest()
+        assert manifest["db"]["size"] == len(raw)
+        assert manifest["db"]["name"] == _DB_ASSET
+        assert manifest["schema_version"] == db.SCHEMA_VERSION
+        assert manifest["updated_at"] == "2026-03-02T00:00:00+00:00"
+        assert manifest["artifacts"][0]["compression"] == "xz"
+
+
+class TestV1Export:
+    def _export(self, tmp_path):
+        db_file = tmp_path / "v2.db"
+        _make_db(db_file)
+        original = config.db_path
+        config.db_path = db_file
+        conn = db.get_connection(readonly=False)
+        db.upsert_etf(conn, "1306", fee=0.06)
+        holding = Holding("7203", "Toyota", "", "", "JPY", 10.0, 2500.0, 1.0)
+        db.insert_holdings(conn, "1306", "2026-03-02", [holding])
+        conn.commit()
+        conn.close()
+        config.db_path = original
+        write_artifacts(db_file, tmp_path / "out")
+        return tmp_path / "out" / V1_ASSET
+
+    def test_is_v1(self, tmp_path):
+        conn = sqlite3.connect(self._export(tmp_path))
+        assert db.schema_version(conn) == 1
+        assert conn.execute("SELECT code, date, name FROM pcf_info").fetchall() == [
+            ("1306", "2026-03-02", "TOPIX ETF")
+        ]
+        assert conn.execute(
+            "SELECT code, date, holding_code, name, isin FROM pcf_holdings"
+        ).fetchall() == [("1306", "2026-03-02", "7203", "Toyota", None)]
+        conn.close()
+
+    def test_migrates_back_to_the_same_reads(self, tmp_path):
+        original = config.db_path
+        config.db_path = self._export(tmp_path)
+        try:
+            conn = db.get_connection(readonly=False)
+            db.init_schema(conn)
+            conn.close()
+            assert db.read_etf_info("1306").name == "TOPIX ETF"
+            [holding] = db.read_holdings("1306")
+            assert (holding.code, holding.name, holding.price) == (
+                "7203",
+                "Toyota",
+                2500.0,
+            )
+            assert db.read_etf_fee("1306") == 0.06
+        finally:
+            config.db_path = original
+
+
+class TestPatches:
+    def test_no_patch_without_base(self, tmp_path):
+        db_file = tmp_path / "pcf.db"
+        _make_db(db_file)
+        *_, manifest_path = write_artifacts(db_file, tmp_path / "out")
+        assert json.loads(manifest_path.read_text())["patches"] == []
+
+    def test_patch_extends_previous_manifest(self, tmp_path):
+        out = tmp_path / "out"
+        out.mkdir()
+        (out / MANIFEST_NAME).write_text(
+            json.dumps(
+                {"schema_version": db.SCHEMA_VERSION, "patches": [{"name": "old"}]}
+            )
+        )
+        base = tmp_path / "base.db"
+        _make_db(base, "2026-03-02T00:00:00+00:00", "2026-03-02")
+        db_file = tmp_path / "pcf.db"
+        shutil.copyfile(base, db_file)
+        _make_db(db_file, "2026-03-03T00:00:00+00:00", "2026-03-03")
+
+        paths = write_artifacts(db_file, out, base=base)
+        assert paths[2].name == "pcf-v2-patch-20260303T000000.db.xz"
+        manifest = json.loads((out / MANIFEST_NAME).read_text())
+        old, new = manifest["patches"]
+        assert old == {"name": "old"}
+        assert new["base"] == "2026-03-02T00:00:00+00:00"
+        assert new["updated_at"] == manifest["updated_at"]
+        raw = lzma.decompress(paths[2].read_bytes())
+        assert new["sha256"] == hashlib.sha256(raw).hexdigest()
@@ -0,0 +1,196 @@
+import datetime
+import importlib
+import json
+import os
+import threading
+from http.client import HTTPConnection
+from unittest.mock import patch
+
+import pytest
+
+from pyjpx_etf import config
+from pyjpx_etf._internal import db
+from pyjpx_etf._internal.server import QueryServer, bench
+from pyjpx_etf.models import Holding
+
+_ranking_mod = importlib.import_module("pyjpx_etf.ranking")
+
+
+def _build_db(path, weight=0.02, name_en="TOPIX ETF"):
+    config.db_path = path
+    conn = db.get_connection(readonly=False)
+    db.init_schema(conn)
+    db.upsert_etf(conn, "1306", name_ja="TOPIX連動型", name_en=name_en, fee=0.06)
+    db.upsert_etf(conn, "2644", name_ja="半導体ETF", name_en="Semiconductor ETF")
+    for day, w in (("2026-02-27", weight), ("2026-03-02", weight + 0.01)):
+        h = Holding("6857", "ADVANTEST", "JP2", "TSE", "JPY", 500.0, 9e3, w)
+        for code in ("1306", "2644"):
+            db.insert_pcf_info(conn, code, day, name=code, cash_component=100.0)
+            db.insert_holdings(conn, code, day, [h])
+    db.insert_metrics(
+        conn,
+        datetime.date.today().isoformat(),
+        {"1306": {"fee": 0.06, "1m": 2.5}, "2644": {"1m": 5.1}},
+        ["1m"],
+    )
+    db.update_meta(conn, "updated_at", "2026-03-02T07:00:00")
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def server(tmp_path):
+    config.lang = "en"
+    _build_db(tmp_path / "pcf.db")
+    srv = QueryServer(("127.0.0.1", 0), config.db_path)
+    thread = threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _get(server, path):
+    conn = HTTPConnection("127.0.0.1", server.server_address[1])
+    try:
+        conn.request("GET", path)
+        resp = conn.getresponse()
+        return resp.status, json.loads(resp.read())
+    finally:
+        conn.close()
+
+
+class TestEndpoints:
+    def test_health(self, server):
+        status, body = _get(server, "/health")
+        assert status == 200
+        assert body["updated_at"] == "2026-03-02T07:00:00"
+
+    def test_etf(self, server):
+        status, body = _get(server, "/etf/1306")
+        assert status == 200
+        assert body["date"] == "2026-03-02"
+        assert body["fee"] == 0.06
+        assert body["nav"] == round(100.0 + 500.0 * 9e3)
+        assert body["holdings"][0]["code"] == "6857"
+        assert body["holdings"][0]["weight"] == pytest.approx(0.03)
+
+    def test_etf_on_date(self, server):
+        _, body = _get(server, "/etf/1306?date=2026-02-27")
+        assert body["holdings"][0]["weight"] == pytest.approx(0.02)
+
+    def test_search(self, server):
+        status, body = _get(server, "/search/6857?n=1")
+        assert status == 200
+        assert len(body) == 1
+        assert body[0]["code"] in ("1306", "2644")
+
+    def test_history(self, server):
+        _, series = _get(server, "/history/1306/6857")
+        assert [r["date"] for r in series] == ["2026-02-27", "2026-03-02"]
+        _, changes = _get(server, "/history/1306")
+        assert changes[0]["weight_change"] == pytest.approx(0.01)
+
+    def test_ranking_on_date(self, server):
+        today = datetime.date.today().isoformat()
+        status, body = _get(server, f"/ranking?period=1m&date={today}")
+        assert status == 200
+        assert [r["code"] for r in body] == ["2644", "1306"]
+        assert body[0]["fee"] is None
+
+    def test_ranking_without_date_matches_ranking(self, server):
+        data = {
+            "1306": {"name_en": "TOPIX ETF", "1m": 9.0, "fee": None},
+            "1321": {"name_en": "Nikkei 225 ETF", "1m": 1.0, "fee": 0.11},
+        }
+        with (
+            patch.object(_ranking_mod, "get_rakuten_data", return_value=data),
+            patch.object(_ranking_mod, "get_fees", return_value={}),
+            patch.object(_ranking_mod, "_frame_cache", None),
+            patch.object(_ranking_mod, "ranking", wraps=_ranking_mod.ranking) as rank,
+        ):
+            _, body = _get(server, "/ranking?period=1m")
+            assert _get(server, "/ranking?period=1m")[1] == body
+            assert rank.call_count == 1  # the response is cached
+            assert [r["code"] for r in body] == ["1306", "1321"]
+            assert body[0]["fee"] is None  # NaN is not valid JSON
+
+            data = {**data, "1321": {**data["1321"], "1m": 20.0}}  # refreshed
+            with patch.object(_ranking_mod, "get_rakuten_data", return_value=data):
+                _, body = _get(server, "/ranking?period=1m")
+            assert [r["code"] for r in body] == ["1321", "1306"]
+            assert rank.call_count == 2
+
+    def test_keep_alive(self, server):
+        conn = HTTPConnection("127.0.0.1", server.server_address[1])
+        try:
+            for _ in range(3):
+                conn.request("GET", "/etf/1306")
+                resp = conn.getresponse()
+                assert resp.status == 200
+                resp.read()
+        finally:
+            conn.close()
+
+    @pytest.mark.parametrize(
+        ("path", "status"),
+        [
+            ("/etf/9999", 404),
+            ("/nope", 404),
+            ("/search/6857?n=x", 400),
+            ("/etf/1306?date=yesterday", 400),
+            ("/ranking?period=2w", 400),
+        ],
+    )
+    def test_errors(self, server, path, status):
+        got, body = _get(server, path)
+        assert got == status
+        assert "error" in body
+
+
+class TestReload:
+    def test_replaced_db_is_picked_up(self, server, tmp_path):
+        _, before = _get(server, "/history/1306/6857")
+        old = server.generation()
+
+        _build_db(tmp_path / "new.db", weight=0.05, name_en="TOPIX ETF (new)")
+        os.replace(tmp_path / "new.db", tmp_path / "pcf.db")
+        config.db_path = tmp_path / "pcf.db"
+
+        _, after = _get(server, "/history/1306/6857")
+        assert before[0]["weight"] == pytest.approx(0.02)
+        assert after[0]["weight"] == pytest.approx(0.05)
+        assert server.generation() is not old
+
+    def test_responses_cached_per_generation(self, server):
+        gen = server.generation()
+        _get(server, "/search/6857")
+        with patch(
+            "pyjpx_etf._internal.db_read._search_rows", side_effect=AssertionError
+        ):
+            status, _ = _get(server, "/search/6857")
+        assert status == 200
+        assert server.generation() is gen
+
+
+class TestBench:
+    def test_reports_percentiles(self, tmp_path):
+        config.lang = "en"
+        _build_db(tmp_path / "pcf.db")
+        result = bench(config.db_path, requests=40, concurrency=2)
+        assert result["total"]["requests"] == 40
+        assert result["rps"] > 0
+        assert {"etf", "search", "history", "ranking"} <= result["endpoints"].keys()
+        p = result["total"]
+        assert p["p50"] <= p["p95"] <= p["p99"]
+
+    def test_cli(self, tmp_path, capsys):
+        from pyjpx_etf.cli import main
+
+        _build_db(tmp_path / "pcf.db")
+        argv = ["etf", "serve", "--bench", "-n", "20", "-c", "2", "--en"]
+        with patch("sys.argv", argv):
+            main()
+        out = capsys.readouterr().out
+        assert "p99 ms" in out
+        assert "total" in out
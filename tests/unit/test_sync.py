@@ -1,13 +1,23 @@
 """Tests for sync.py — download DB from GitHub Releases."""
 
+import hashlib
 import importlib
+import lzma
+import os
+import shutil
+import sqlite3
+import threading
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
 import requests
 
-from pyjpx_etf.config import config
+from pyjpx_etf._internal import db
+from pyjpx_etf._internal.db_patch import build_patch
+from pyjpx_etf.config import _DB_MANIFEST_URL, _DB_RELEASE_BASE, _DB_RELEASE_URL, config
 from pyjpx_etf.exceptions import DatabaseError
+from pyjpx_etf.models import Holding
 from pyjpx_etf.sync import sync
 
 # pyjpx_etf.sync is shadowed by the function in __init__.py.
@@ -39,12 +49,33 @@ class TestSync:
     def test_skips_if_fresh(self, mock_requests):
         db_file = config.db_path
         db_file.parent.mkdir(parents=True, exist_ok=True)
-        db_file.write_bytes(b"existing")
+        conn = db.get_connection(readonly=False)
+        db.init_schema(conn)
+        conn.close()
 
         path = sync()
         assert path == db_file
         mock_requests.get.assert_not_called()
 
+    @patch.object(_sync_mod, "requests")
+    def test_redownloads_old_schema(self, mock_requests):
+        db_file = config.db_path
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_file)
+        conn.execute(
+            "CREATE TABLE pcf_holdings (code TEXT, date TEXT, holding_code TEXT)"
+        )
+        conn.close()
+
+        mock_resp = MagicMock()
+        mock_resp.headers = {"content-length": "0"}
+        mock_resp.iter_content.return_value = [b"new"]
+        mock_resp.raise_for_status.return_value = None
+        mock_requests.get.return_value = mock_resp
+
+        path = sync()
+        assert path.read_bytes() == b"new"
+
     @patch.object(_sync_mod, "requests")
     def test_force_redownloads(self, mock_requests):
         db_file = config.db_path
@@ -68,3 +99,491 @@ class TestSync:
         mock_requests.RequestException = requests.RequestException
         with pytest.raises(DatabaseError, match="Failed to download"):
             sync(force=True)
+
+
+_XZ_URL = f"{_DB_RELEASE_BASE}/pcf-v2.db.xz"
+
+
+def _response(body=b"", *, status=200, json_data=None, headers=None):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.headers = {"content-length": str(len(body)), **(headers or {})}
+    resp.iter_content.side_effect = lambda chunk_size: iter(
+        [body[i : i + 7] for i in range(0, len(body), 7)]
+    )
+    resp.json.return_value = json_data
+    if status >= 400:
+        resp.raise_for_status.side_effect = requests.HTTPError(f"HTTP {status}")
+    return resp
+
+
+def _manifest(content, *, sha256=None):
+    return {
+        "format": 1,
+        "schema_version": 2,
+        "db": {
+            "name": "pcf-v2.db",
+            "size": len(content),
+            "sha256": sha256 or hashlib.sha256(content).hexdigest(),
+        },
+        "artifacts": [{"name": "pcf-v2.db.xz", "compression": "xz"}],
+    }
+
+
+def _serve(mock_requests, routes):
+    mock_requests.RequestException = requests.RequestException
+    mock_requests.get.side_effect = lambda url, **kwargs: routes.get(
+        url, _response(status=404)
+    )
+
+
+class TestCompressedSync:
+    CONTENT = b"SQLite format 3\x00" + b"pcf" * 1000
+
+    @patch.object(_sync_mod, "requests")
+    def test_prefers_compressed_artifact(self, mock_requests):
+        _serve(
+            mock_requests,
+            {
+                _DB_MANIFEST_URL: _response(json_data=_manifest(self.CONTENT)),
+                _XZ_URL: _response(lzma.compress(self.CONTENT)),
+            },
+        )
+        path = sync(force=True)
+        assert path.read_bytes() == self.CONTENT
+        urls = [c.args[0] for c in mock_requests.get.call_args_list]
+        assert _DB_RELEASE_URL not in urls
+
+    @patch.object(_sync_mod, "requests")
+    def test_falls_back_when_compressed_missing(self, mock_requests):
+        _serve(
+            mock_requests,
+            {
+                _DB_MANIFEST_URL: _response(json_data=_manifest(self.CONTENT)),
+                _DB_RELEASE_URL: _response(self.CONTENT),
+            },
+        )
+        assert sync(force=True).read_bytes() == self.CONTENT
+
+    @patch.object(_sync_mod, "requests")
+    def test_falls_back_on_corrupt_compressed(self, mock_requests):
+        _serve(
+            mock_requests,
+            {
+                _DB_MANIFEST_URL: _response(json_data=_manifest(self.CONTENT)),
+                _XZ_URL: _response(lzma.compress(self.CONTENT)[:-20]),
+                _DB_RELEASE_URL: _response(self.CONTENT),
+            },
+        )
+        assert sync(force=True).read_bytes() == self.CONTENT
+
+    @patch.object(_sync_mod, "requests")
+    def test_checksum_mismatch_keeps_existing_db(self, mock_requests):
+        db_file = config.db_path
+        db_file.write_bytes(b"existing")
+        _serve(
+            mock_requests,
+            {
+                _DB_MANIFEST_URL: _response(
+                    json_data=_manifest(self.CONTENT, sha256="0" * 64)
+                ),
+                _XZ_URL: _response(lzma.compress(self.CONTENT)),
+                _DB_RELEASE_URL: _response(self.CONTENT),
+            },
+        )
+        with pytest.raises(DatabaseError, match="Checksum mismatch"):
+            sync(force=True)
+        assert db_file.read_bytes() == b"existing"
+        assert not list(db_file.parent.glob("*.tmp"))
+
+    @patch.object(_sync_mod, "requests")
+    def test_removes_temp_files_of_killed_syncs(self, mock_requests):
+        stale = config.db_path.with_name(".pcf.db.abc123.tmp")
+        stale.write_bytes(b"partial")
+        _serve(
+            mock_requests,
+            {
+                _DB_MANIFEST_URL: _response(json_data=_manifest(self.CONTENT)),
+                _XZ_URL: _response(lzma.compress(self.CONTENT)),
+            },
+        )
+        sync(force=True)
+        assert not stale.exists()
+
+    @patch.object(_sync_mod, "requests")
+    def test_plain_download_without_manifest(self, mock_requests):
+        _serve(mock_requests, {_DB_RELEASE_URL: _response(self.CONTENT)})
+        assert sync(force=True).read_bytes() == self.CONTENT
+
+
+def _write_day(path, day, updated_at, holding):
+    conn = sqlite3.connect(path)
+    db.init_schema(conn)
+    db.insert_pcf_info(conn, "1306", day, name="TOPIX ETF")
+    db.insert_holdings(conn, "1306", day, [holding])
+    db.update_meta(conn, "updated_at", updated_at)
+    conn.commit()
+    conn.close()
+
+
+class TestPatchSync:
+    @pytest.fixture()
+    def release(self, tmp_path):
+        """Local DB at "A" (stale) and a release at "B" with the A -> B patch."""
+        local = config.db_path
+        _write_day(
+            local,
+            "2026-03-01",
+            "A",
+            Holding("7203", "TOYOTA", "JP001", "TSE", "JPY", 1000.0, 2500.0, 1.0),
+        )
+        old = os.path.getmtime(local) - 2 * 24 * 3600
+        os.utime(local, (old, old))
+
+        new = tmp_path / "new.db"
+        shutil.copyfile(local, new)
+        _write_day(
+            new,
+            "2026-03-02",
+            "B",
+            Holding("9984", "SOFTBANK", "JP003", "TSE", "JPY", 100.0, 9000.0, 1.0),
+        )
+        raw = tmp_path / "patch.db"
+        build_patch(new, local, raw)
+        patch = raw.read_bytes()
+        manifest = {
+            **_manifest(new.read_bytes()),
+            "updated_at": "B",
+            "patches": [
+                {
+                    "name": "pcf-v2-patch-B.db.xz",
+                    "base": "A",
+                    "updated_at": "B",
+                    "sha256": hashlib.sha256(patch).hexdigest(),
+                }
+            ],
+        }
+        return new, manifest, lzma.compress(patch)
+
+    @patch.object(_sync_mod, "requests")
+    def test_applies_missing_patches(self, mock_requests, release):
+        new, manifest, patch = release
+        _serve(
+            mock_requests,
+            {
+                _DB_MANIFEST_URL: _response(json_data=manifest),
+                f"{_DB_RELEASE_BASE}/pcf-v2-patch-B.db.xz": _response(patch),
+            },
+        )
+        sync()
+        urls = [c.args[0] for c in mock_requests.get.call_args_list]
+        assert _DB_RELEASE_URL not in urls and _XZ_URL not in urls
+        assert db.read_etf_dates("1306")[0].isoformat() == "2026-03-02"
+        assert not list(config.db_path.parent.glob("*.tmp"))
+
+    @patch.object(_sync_mod, "requests")
+    def test_full_download_when_too_far_behind(self, mock_requests, release):
+        new, manifest, patch = release
+        manifest["patches"][0]["base"] = "older"
+        _serve(
+            mock_requests,
+            {
+                _DB_MANIFEST_URL: _response(json_data=manifest),
+                _DB_RELEASE_URL: _response(new.read_bytes()),
+            },
+        )
+        assert sync().read_bytes() == new.read_bytes()
+
+    @patch.object(_sync_mod, "requests")
+    def test_full_download_when_chain_loops(self, mock_requests, release):
+        new, manifest, patch = release
+        manifest["patches"][0]["updated_at"] = "A"  # A -> A, never reaches B
+        _serve(
+            mock_requests,
+            {
+                _DB_MANIFEST_URL: _response(json_data=manifest),
+                _DB_RELEASE_URL: _response(new.read_bytes()),
+            },
+        )
+        assert sync().read_bytes() == new.read_bytes()
+
+    @patch.object(_sync_mod, "requests")
+    def test_full_download_when_patch_corrupt(self, mock_requests, release):
+        new, manifest, patch = release
+        manifest["patches"][0]["sha256"] = "0" * 64
+        _serve(
+            mock_requests,
+            {
+                _DB_MANIFEST_URL: _response(json_data=manifest),
+                f"{_DB_RELEASE_BASE}/pcf-v2-patch-B.db.xz": _response(patch),
+                _DB_RELEASE_URL: _response(new.read_bytes()),
+            },
+        )
+        assert sync().read_bytes() == new.read_bytes()
+
+    @patch.object(_sync_mod, "requests")
+    def test_full_download_on_schema_change(self, mock_requests, release):
+        new, manifest, patch = release
+        manifest["schema_version"] = db.SCHEMA_VERSION + 1
+        _serve(
+            mock_requests,
+            {
+                _DB_MANIFEST_URL: _response(json_data=manifest),
+                _DB_RELEASE_URL: _response(new.read_bytes()),
+            },
+        )
+        assert sync().read_bytes() == new.read_bytes()
+
+    @patch.object(_sync_mod, "requests")
+    def test_up_to_date_only_touches(self, mock_requests, release):
+        _, manifest, _ = release
+        manifest["updated_at"] = "A"
+        _serve(mock_requests, {_DB_MANIFEST_URL: _response(json_data=manifest)})
+        before = config.db_path.read_bytes()
+        sync()
+        assert config.db_path.read_bytes() == before
+        assert mock_requests.get.call_count == 1
+        assert sync() == config.db_path  # fresh again: no further requests
+        assert mock_requests.get.call_count == 1
+
+
+class _RangeServer:
+    """Serves *body* at *url*, honouring Range/If-Range/If-None-Match."""
+
+    def __init__(self, url, body, *, etag='"v1"', ranges=True, fail_after=None):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.ranges = ranges
+        self.fail_after = fail_after
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def __call__(self, url, headers=None, **kwargs):
+        headers = headers or {}
+        with self._lock:
+            self.requests.append((url, headers))
+        if url != self.url:
+            return _response(status=404)
+        if headers.get("If-None-Match") == self.etag:
+            return _response(status=304)
+        rng = headers.get("Range")
+        if_range = headers.get("If-Range")
+        if rng and self.ranges and (if_range is None or if_range == self.etag):
+            first, _, last = rng.removeprefix("bytes=").partition("-")
+            if int(first) >= len(self.body):
+                headers = {"Content-Range": f"bytes */{len(self.body)}"}
+                return _response(status=416, headers=headers)
+            stop = int(last) + 1 if last else len(self.body)
+            resp = _response(self.body[int(first) : stop], status=206)
+        else:
+            resp = _response(self.body)
+        resp.headers["ETag"] = self.etag
+        if self.fail_after is not None:
+            data = self.body[: self.fail_after]
+
+            def broken(chunk_size):
+                yield data
+                raise requests.ConnectionError("connection reset")
+
+            resp.iter_content.side_effect = broken
+        return resp
+
+
+class TestResumableDownload:
+    CONTENT = bytes(range(256)) * 400
+
+    @pytest.fixture(autouse=True)
+    def _requests(self):
+        with patch.object(_sync_mod, "requests") as mock_requests:
+            mock_requests.RequestException = requests.RequestException
+            self.mock = mock_requests
+            yield
+
+    def _part(self):
+        return config.db_path.with_name("pcf-v2.db.part")
+
+    def test_interrupted_download_keeps_part(self):
+        self.mock.get.side_effect = _RangeServer(
+            _DB_RELEASE_URL, self.CONTENT, fail_after=1000
+        )
+        with pytest.raises(DatabaseError, match="connection reset"):
+            sync(force=True)
+        assert self._part().read_bytes() == self.CONTENT[:1000]
+        assert not config.db_path.exists()
+
+    def test_resumes_with_range_request(self):
+        self._part().write_bytes(self.CONTENT[:1000])
+        self._part().with_name("pcf-v2.db.part.etag").write_text('"v1"')
+        server = _RangeServer(_DB_RELEASE_URL, self.CONTENT)
+        self.mock.get.side_effect = server
+        assert sync(force=True).read_bytes() == self.CONTENT
+        _, headers = server.requests[-1]
+        assert headers["Range"] == "bytes=1000-"
+        assert headers["If-Range"] == '"v1"'
+        assert not self._part().exists()
+
+    def test_complete_part_is_not_requested_again(self):
+        self._part().write_bytes(self.CONTENT)
+        server = _RangeServer(_DB_RELEASE_URL, self.CONTENT)
+        manifest = {**_manifest(self.CONTENT), "artifacts": []}
+        routes = {_DB_MANIFEST_URL: _response(json_data=manifest)}
+        self.mock.get.side_effect = lambda url, **kw: (
+            routes.get(url) or server(url, **kw)
+        )
+        assert sync(force=True).read_bytes() == self.CONTENT
+        assert server.requests == []
+        assert not self._part().exists()
+
+    def test_complete_part_answered_416(self):
+        self._part().write_bytes(self.CONTENT)
+        self._part().with_name("pcf-v2.db.part.etag").write_text('"v1"')
+        server = _RangeServer(_DB_RELEASE_URL, self.CONTENT)
+        self.mock.get.side_effect = server
+        assert sync(force=True).read_bytes() == self.CONTENT
+        _, headers = server.requests[-1]
+        assert headers["Range"] == f"bytes={len(self.CONTENT)}-"
+        assert not self._part().exists()
+
+    def test_overlong_part_restarts(self):
+        self._part().write_bytes(self.CONTENT + b"junk")
+        self.mock.get.side_effect = _RangeServer(_DB_RELEASE_URL, self.CONTENT)
+        assert sync(force=True).read_bytes() == self.CONTENT
+        assert not list(config.db_path.parent.glob("*.part*"))
+
+    def test_restarts_when_asset_changed(self):
+        self._part().write_bytes(b"stale bytes")
+        self._part().with_name("pcf-v2.db.part.etag").write_text('"v0"')
+        self.mock.get.side_effect = _RangeServer(_DB_RELEASE_URL, self.CONTENT)
+        assert sync(force=True).read_bytes() == self.CONTENT
+
+    def test_parallel_ranges(self, monkeypatch):
+        monkeypatch.setattr(_sync_mod, "_PARALLEL_MIN_SIZE", 1)
+        monkeypatch.setattr(config, "download_workers", 4)
+        server = _RangeServer(_DB_RELEASE_URL, self.CONTENT)
+        routes = {_DB_MANIFEST_URL: _response(json_data=_manifest(self.CONTENT))}
+        self.mock.get.side_effect = lambda url, **kw: (
+            routes.get(url) or server(url, **kw)
+        )
+        assert sync(force=True).read_bytes() == self.CONTENT
+        ranges = sorted(h["Range"] for u, h in server.requests if u == server.url)
+        assert ranges == [
+            "bytes=0-25599",
+            "bytes=25600-51199",
+            "bytes=51200-76799",
+            "bytes=76800-102399",
+        ]
+
+    def test_parallel_falls_back_without_range_support(self, monkeypatch):
+        monkeypatch.setattr(_sync_mod, "_PARALLEL_MIN_SIZE", 1)
+        monkeypatch.setattr(config, "download_workers", 4)
+        server = _RangeServer(_DB_RELEASE_URL, self.CONTENT, ranges=False)
+        routes = {_DB_MANIFEST_URL: _response(json_data=_manifest(self.CONTENT))}
+        self.mock.get.side_effect = lambda url, **kw: (
+            routes.get(url) or server(url, **kw)
+        )
+        assert sync(force=True).read_bytes() == self.CONTENT
+        assert not list(config.db_path.parent.glob("*.part*"))
+
+
+class TestConditionalSync:
+    @pytest.fixture()
+    def stale_db(self):
+        db_file = config.db_path
+        conn = db.get_connection(readonly=False)
+        db.init_schema(conn)
+        conn.close()
+        old = os.path.getmtime(db_file) - 2 * 24 * 3600
+        os.utime(db_file, (old, old))
+        return db_file
+
+    @patch.object(_sync_mod, "requests")
+    def test_records_validators(self, mock_requests):
+        server = _RangeServer(_DB_RELEASE_URL, b"db bytes", etag='"abc"')
+        mock_requests.get.side_effect = server
+        sync(force=True)
+        saved = _sync_mod._load_validators(config.db_path)
+        assert saved == {_DB_RELEASE_URL: {"etag": '"abc"'}}
+
+    @patch.object(_sync_mod, "requests")
+    def test_skips_unchanged_asset(self, mock_requests, stale_db):
+        mock_requests.RequestException = requests.RequestException
+        _sync_mod._save_validators(stale_db, {_DB_RELEASE_URL: {"etag": '"abc"'}})
+        before = stale_db.read_bytes()
+        server = _RangeServer(_DB_RELEASE_URL, b"new bytes", etag='"abc"')
+        mock_requests.get.side_effect = server
+        assert sync() == stale_db
+        assert stale_db.read_bytes() == before
+        assert time.time() - stale_db.stat().st_mtime < 3600
+        _, headers = server.requests[-1]
+        assert headers["If-None-Match"] == '"abc"'
+
+    @patch.object(_sync_mod, "requests")
+    def test_skips_unchanged_manifest(self, mock_requests, stale_db):
+        _sync_mod._save_validators(
+            stale_db, {_DB_MANIFEST_URL: {"last_modified": "Mon, 02 Mar 2026"}}
+        )
+        mock_requests.get.return_value = _response(status=304)
+        sync()
+        assert mock_requests.get.call_count == 1
+        _, kwargs = mock_requests.get.call_args
+        assert kwargs["headers"] == {"If-Modified-Since": "Mon, 02 Mar 2026"}
+
+    @patch.object(_sync_mod, "requests")
+    def test_force_ignores_validators(self, mock_requests, stale_db):
+        _sync_mod._save_validators(stale_db, {_DB_RELEASE_URL: {"etag": '"abc"'}})
+        server = _RangeServer(_DB_RELEASE_URL, b"new bytes", etag='"abc"')
+        mock_requests.get.side_effect = server
+        assert sync(force=True).read_bytes() == b"new bytes"
+
+
+class TestSyncLock:
+    @pytest.fixture()
+    def published(self, tmp_path):
+        """Bytes of a valid current-schema DB to serve."""
+        path = tmp_path / "published.db"
+        conn = sqlite3.connect(path)
+        db.init_schema(conn)
+        conn.close()
+        return path.read_bytes()
+
+    @patch.object(_sync_mod, "requests")
+    def test_concurrent_syncs_download_once(self, mock_requests, published):
+        downloads = []
+
+        def get(url, **kwargs):
+            if url != _DB_RELEASE_URL:
+                return _response(status=404)
+            downloads.append(url)
+            resp = _response(published)
+
+            def slow(chunk_size):
+                time.sleep(0.2)
+                yield published
+
+            resp.iter_content.side_effect = slow
+            return resp
+
+        mock_requests.RequestException = requests.RequestException
+        mock_requests.get.side_effect = get
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(sync())) for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results == [config.db_path] * 4
+        assert downloads == [_DB_RELEASE_URL]
+        assert config.db_path.read_bytes() == published
+
+    @patch.object(_sync_mod, "requests")
+    def test_lock_timeout_raises(self, mock_requests, monkeypatch):
+        from pyjpx_etf._internal._lock import FileLock, lock_path
+
+        monkeypatch.setattr(config, "lock_timeout", 0.1)
+        with FileLock(lock_path(config.db_path), timeout=1):
+            with pytest.raises(DatabaseError, match="Timed out"):
+                sync(force=True)
+        mock_requests.get.assert_not_called()